@@ -7,5 +7,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ecommerce.settings')
+# Páginas de leitura assíncronas (loja/views_async.py)
+os.environ.setdefault('LOJA_VIEWS_ASSINCRONAS', '1')
 
 application = get_asgi_application()
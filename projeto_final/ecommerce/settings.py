@@ -2,6 +2,7 @@
 Django settings for ecommerce project.
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -31,6 +32,11 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    # Antes da sessão e da autenticação, para contar as consultas delas
+    "loja.middleware.PerfilSQLMiddleware",
+    "loja.middleware.PerfilTemplatesMiddleware",
+    # Só ativo com réplica configurada (LOJA_REPLICA)
+    "loja.middleware.ReplicaMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -45,8 +51,19 @@ TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": [BASE_DIR / "templates"],
-        "APP_DIRS": True,
         "OPTIONS": {
+            # Cada template é lido e compilado uma vez por processo. Explícito
+            # para não depender do padrão do Django; o runserver limpa o
+            # cache quando um template muda.
+            "loaders": [
+                (
+                    "django.template.loaders.cached.Loader",
+                    [
+                        "django.template.loaders.filesystem.Loader",
+                        "django.template.loaders.app_directories.Loader",
+                    ],
+                ),
+            ],
             "context_processors": [
                 "django.template.context_processors.debug",
                 "django.template.context_processors.request",
@@ -61,6 +78,9 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "ecommerce.wsgi.application"
 
+# Views assíncronas da vitrine; ecommerce/asgi.py liga por padrão
+LOJA_VIEWS_ASSINCRONAS = os.environ.get("LOJA_VIEWS_ASSINCRONAS", "0") == "1"
+
 
 # Database
 DATABASES = {
@@ -70,6 +90,87 @@ DATABASES = {
     }
 }
 
+# LOJA_BANCO=producao: SQLite ajustado para vários processos e checkouts
+# simultâneos. Os PRAGMAs rodam a cada conexão nova (init_command):
+# - WAL: leitores não bloqueiam o escritor e vice-versa
+# - synchronous=NORMAL: seguro com WAL, sem fsync a cada commit
+# - mmap de 256 MB e 64 MB de cache de páginas por conexão
+# timeout é quanto tempo uma escrita espera o lock antes de "database is
+# locked"; as conexões ficam abertas entre requisições (CONN_MAX_AGE) e são
+# testadas antes de reutilizar (CONN_HEALTH_CHECKS).
+LOJA_BANCO = os.environ.get("LOJA_BANCO", "padrao")
+
+if LOJA_BANCO == "producao":
+    DATABASES["default"].update({
+        "CONN_MAX_AGE": 600,
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            "timeout": 20,
+            "init_command": (
+                "PRAGMA journal_mode=WAL;"
+                "PRAGMA synchronous=NORMAL;"
+                "PRAGMA mmap_size=268435456;"
+                "PRAGMA cache_size=-65536;"
+                "PRAGMA temp_store=MEMORY;"
+            ),
+        },
+    })
+
+# Checkout abre a transação com BEGIN IMMEDIATE no SQLite (loja/transacoes.py)
+LOJA_CHECKOUT_IMEDIATO = os.environ.get("LOJA_CHECKOUT_IMEDIATO", "1") == "1"
+
+# LOJA_REPLICA=<arquivo>: Produto e Categoria são lidos de uma cópia do
+# banco (loja/roteador.py), atualizada por `manage.py sincronizar_replica`.
+# Quem grava lê do primário por LOJA_REPLICA_ATRASO segundos.
+LOJA_REPLICA_ALIAS = "replica"
+LOJA_REPLICA_ATRASO = 10
+
+if os.environ.get("LOJA_REPLICA"):
+    DATABASES[LOJA_REPLICA_ALIAS] = {
+        **DATABASES["default"],
+        "NAME": os.environ["LOJA_REPLICA"],
+        # Nos testes a réplica é o próprio banco de teste
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_ROUTERS = ["loja.roteador.RoteadorReplica"]
+
+
+# Cache (fragmentos do catálogo, ver loja/fragmentos.py)
+# LOJA_CACHE=locmem (padrão, testes), arquivo ou redis
+LOJA_CACHE = os.environ.get("LOJA_CACHE", "locmem")
+
+if LOJA_CACHE == "redis":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ.get("LOJA_REDIS_URL", "redis://127.0.0.1:6379/1"),
+        }
+    }
+elif LOJA_CACHE == "arquivo":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": BASE_DIR / "cache",
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+LOJA_FRAGMENTOS_TIMEOUT = 60 * 60 * 24
+
+# Segundos que um proxy ou CDN pode servir home, produtos e produto_detalhe
+# a visitas sem cookie; com sessão vale o ETag (loja/condicional.py)
+LOJA_CATALOGO_MAX_AGE = int(os.environ.get("LOJA_CATALOGO_MAX_AGE", 60))
+
+# Página inteira em cache para visitantes sem sessão (loja/cache_pagina.py);
+# as versões dos fragmentos invalidam, o timeout é só um teto
+LOJA_CACHE_PAGINAS = os.environ.get("LOJA_CACHE_PAGINAS", "1") == "1"
+LOJA_CACHE_PAGINAS_TIMEOUT = 10 * 60
+
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -101,11 +202,27 @@ USE_TZ = True
 # Static files (CSS, Images, JavaScript)
 STATIC_URL = "/static/"
 STATICFILES_DIRS = [BASE_DIR / "static"]
+STATIC_ROOT = BASE_DIR / "staticfiles"
+
+# collectstatic grava os arquivos com o hash do conteúdo no nome e as
+# versões .gz/.br ao lado (loja/estaticos.py). Com DEBUG=False os templates
+# passam a usar os nomes com hash, então o collectstatic é obrigatório.
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "loja.estaticos.ArmazenamentoComprimido"},
+}
+
+# Com DEBUG=False e sem servidor na frente (nginx), o próprio Django entrega
+# o STATIC_ROOT com as versões comprimidas e cache de um ano
+LOJA_SERVIR_ESTATICOS = os.environ.get("LOJA_SERVIR_ESTATICOS", "1") == "1"
 
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Larguras das miniaturas de produto (loja/imagens.py)
+LOJA_MINIATURAS_LARGURAS = (160, 400, 800)
+
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
@@ -116,5 +233,62 @@ LOGIN_REDIRECT_URL = "perfil"
 LOGIN_URL = "login"
 PASSWORD_CHANGE_REDIRECT_URL = 'perfil'
 
+# Busca do catálogo (loja/busca.py)
+LOJA_BUSCA_BACKEND = "loja.busca.BuscaFTS5"
+
+# Armazenamento do carrinho: sessão (loja.carrinho.Carrinho) ou banco
+# (loja.carrinho.CarrinhoBanco, preços e estoque sempre atuais)
+LOJA_CARRINHO_BACKEND = "loja.carrinho.Carrinho"
+
+# Segundos que cada linha do carrinho segura o estoque (loja/reservas.py);
+# as vencidas são apagadas por `manage.py liberar_reservas`
+LOJA_RESERVA_TTL = int(os.environ.get("LOJA_RESERVA_TTL", 15 * 60))
+
 
+# Perfil de SQL por requisição (loja/middleware.py). O Server-Timing mostra
+# consultas e tempos internos a qualquer cliente: por padrão, só com DEBUG
+LOJA_PERFIL_SQL = os.environ.get("LOJA_PERFIL_SQL", "1" if DEBUG else "0") == "1"
+# Fração das requisições registradas no log; as com suspeita de N+1 sempre entram
+LOJA_PERFIL_SQL_AMOSTRA = float(os.environ.get("LOJA_PERFIL_SQL_AMOSTRA", "0.1"))
+LOJA_PERFIL_SQL_REPETICOES = 5
+# Tempo por template e por {% block %} (loja/perfil_templates.py), na mesma
+# amostra; troca o loader dos templates pelo que mede. Por padrão, só com DEBUG
+LOJA_PERFIL_TEMPLATES = os.environ.get("LOJA_PERFIL_TEMPLATES", "1" if DEBUG else "0") == "1"
 
+if LOJA_PERFIL_TEMPLATES:
+    _, _filhos = TEMPLATES[0]["OPTIONS"]["loaders"][0]
+    TEMPLATES[0]["OPTIONS"]["loaders"][0] = ("loja.perfil_templates.Loader", _filhos)
+
+LOGS_DIR = BASE_DIR / "logs"
+LOGS_DIR.mkdir(exist_ok=True)
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        # A mensagem já é uma linha JSON; só acrescenta a hora
+        "json": {"format": '{"hora": "%(asctime)s", "nivel": "%(levelname)s", "dados": %(message)s}'},
+    },
+    "handlers": {
+        "arquivo_sql": {
+            "class": "logging.handlers.RotatingFileHandler",
+            "filename": LOGS_DIR / "sql.log",
+            "maxBytes": 5 * 1024 * 1024,
+            "backupCount": 5,
+            "encoding": "utf-8",
+            "formatter": "json",
+        },
+        "arquivo_templates": {
+            "class": "logging.handlers.RotatingFileHandler",
+            "filename": LOGS_DIR / "templates.log",
+            "maxBytes": 5 * 1024 * 1024,
+            "backupCount": 5,
+            "encoding": "utf-8",
+            "formatter": "json",
+        },
+    },
+    "loggers": {
+        "loja.sql": {"handlers": ["arquivo_sql"], "level": "INFO", "propagate": False},
+        "loja.templates": {"handlers": ["arquivo_templates"], "level": "INFO", "propagate": False},
+    },
+}
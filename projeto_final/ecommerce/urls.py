@@ -5,7 +5,9 @@ URL configuration for ecommerce project.
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
+
+from loja.estaticos import servir
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -15,6 +17,8 @@ urlpatterns = [
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
+elif settings.LOJA_SERVIR_ESTATICOS:
+    urlpatterns += [re_path(rf"^{settings.STATIC_URL.strip('/')}/(?P<caminho>.+)$", servir)]
 
 
     
@@ -6,7 +6,7 @@ from .models import Contato
 
 @admin.register(Categoria)
 class CategoriaAdmin(admin.ModelAdmin):
-    list_display = ['nome', 'ativo']
+    list_display = ['nome', 'ativo', 'produtos_disponiveis']
     list_filter = ['ativo']
     search_fields = ['nome', 'descricao']
 
@@ -15,7 +15,7 @@ class CategoriaAdmin(admin.ModelAdmin):
 class ProdutoAdmin(admin.ModelAdmin):
     list_display = ['nome', 'categoria', 'preco', 'estoque', 'destaque', 'ativo', 'data_cadastro']
     list_filter = ['categoria', 'destaque', 'ativo', 'data_cadastro']
-    search_fields = ['nome', 'descricao', 'especificacoes']
+    search_fields = ['nome', 'sku', 'descricao', 'especificacoes']
     list_editable = ['preco', 'estoque', 'destaque', 'ativo']
     date_hierarchy = 'data_cadastro'
 
@@ -0,0 +1,217 @@
+"""
+API JSON de leitura do catálogo, para o app (que hoje lê o HTML da vitrine).
+
+- api/produtos/: produtos ativos, mais novos primeiro, com ?categoria= e
+  paginação por ?cursor= e ?por_pagina= (paginacao.py);
+- api/produtos/?ids=3,1,2: vários produtos numa consulta só, na ordem
+  pedida, com os ids que não existem (ou estão inativos) em "ausentes";
+- api/categorias/: categorias ativas.
+
+?fields=id,nome,preco escolhe os campos (CAMPOS_PRODUTO, CAMPOS_CATEGORIA).
+As linhas saem direto de values(), sem instanciar os modelos.
+
+A resposta não depende de sessão nem de cookie: o JSON pronto fica no
+cache por URL e pela versão dos escopos de fragmentos.py (os sinais que
+invalidam a vitrine invalidam a API), e sai `public` por
+LOJA_CATALOGO_MAX_AGE, com ETag do conteúdo. Um acerto não consulta o banco.
+"""
+
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.http import require_safe
+
+from . import cache_pagina, condicional, consultas
+from .fragmentos import CATEGORIAS, TODOS_PRODUTOS, escopo_produtos, versao
+from .paginacao import LIMITE_MAXIMO, limitar_tamanho, paginar_por_cursor
+
+# Nome na API -> campo do modelo (ou expressão, quando o nome é outro)
+CAMPOS_PRODUTO = {
+    "id": "id",
+    "nome": "nome",
+    "sku": "sku",
+    "descricao": "descricao",
+    "preco": "preco",
+    "estoque": "estoque",
+    "imagem": "imagem",
+    "especificacoes": "especificacoes",
+    "destaque": "destaque",
+    "categoria_id": "categoria_id",
+    "categoria_nome": F("categoria__nome"),
+    "data_cadastro": "data_cadastro",
+    "data_atualizacao": "data_atualizacao",
+}
+# Sem ?fields=: o que o card de produtos.html mostra
+PADRAO_PRODUTO = ("id", "nome", "preco", "estoque", "imagem", "categoria_id", "categoria_nome")
+
+CAMPOS_CATEGORIA = {
+    "id": "id",
+    "nome": "nome",
+    "descricao": "descricao",
+    "produtos_disponiveis": "produtos_disponiveis",
+}
+PADRAO_CATEGORIA = tuple(CAMPOS_CATEGORIA)
+
+
+class ParametroInvalido(Exception):
+    pass
+
+
+def _campos(request, disponiveis, padrao):
+    pedidos = request.GET.get("fields")
+    if not pedidos:
+        return list(padrao)
+    campos = list(dict.fromkeys(nome.strip() for nome in pedidos.split(",") if nome.strip()))
+    desconhecidos = [nome for nome in campos if nome not in disponiveis]
+    if desconhecidos or not campos:
+        raise ParametroInvalido(
+            f"Campos desconhecidos: {', '.join(desconhecidos) or '(nenhum)'}. "
+            f"Disponíveis: {', '.join(disponiveis)}"
+        )
+    return campos
+
+
+def valores(queryset, disponiveis, campos):
+    """
+    queryset.values() com os campos pedidos, já com os nomes da API
+    """
+    simples, apelidos = [], {}
+    for nome in campos:
+        expressao = disponiveis[nome]
+        if isinstance(expressao, str):
+            simples.append(expressao)
+        else:
+            apelidos[nome] = expressao
+    return queryset.values(*simples, **apelidos)
+
+
+def _ids(valor):
+    try:
+        ids = [int(pk) for pk in valor.split(",") if pk.strip()]
+    except ValueError:
+        raise ParametroInvalido("ids deve ser uma lista de números separados por vírgula")
+    if not ids or len(ids) > LIMITE_MAXIMO:
+        raise ParametroInvalido(f"Informe de 1 a {LIMITE_MAXIMO} ids")
+    return list(dict.fromkeys(ids))
+
+
+def _categoria(valor):
+    # Vazio é "todas", como no filtro da vitrine
+    if not valor:
+        return None
+    try:
+        categoria_id = int(valor)
+    except ValueError:
+        categoria_id = 0
+    if categoria_id <= 0:
+        raise ParametroInvalido("categoria deve ser o id (número positivo) de uma categoria")
+    return categoria_id
+
+
+def _erro(erro):
+    return JsonResponse({"erro": str(erro)}, status=400, json_dumps_params={"ensure_ascii": False})
+
+
+def _url_imagens(linhas):
+    for linha in linhas:
+        linha["imagem"] = default_storage.url(linha["imagem"]) if linha["imagem"] else None
+
+
+def _responder(request, escopos, montar):
+    """
+    JSON de montar() pelo cache; 400 se um parâmetro for inválido
+    """
+    chave = None
+    if getattr(settings, "LOJA_CACHE_PAGINAS", True):
+        url = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        chave = f"loja:api:{request.resolver_match.view_name}:{url}:{versao(*escopos)}"
+        guardada = cache.get(chave)
+    else:
+        guardada = None
+
+    if guardada is None:
+        try:
+            dados = montar()
+        except ParametroInvalido as erro:
+            return _erro(erro)
+        conteudo = json.dumps(
+            dados, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(",", ":")
+        ).encode()
+        guardada = (conteudo, '"%s"' % hashlib.blake2b(conteudo, digest_size=12).hexdigest())
+        if chave:
+            cache.set(chave, guardada, cache_pagina.TIMEOUT)
+
+    conteudo, etag = guardada
+    resposta = get_conditional_response(request, etag=etag)
+    if resposta is None:
+        resposta = HttpResponse(conteudo, content_type="application/json")
+    resposta.headers["ETag"] = etag
+    patch_cache_control(resposta, public=True, max_age=condicional.MAX_AGE)
+    return resposta
+
+
+@require_safe
+def produtos(request):
+    """Produtos ativos, paginados, ou os de ?ids="""
+    try:
+        categoria_id = _categoria(request.GET.get("categoria"))
+    except ParametroInvalido as erro:
+        return _erro(erro)
+    ids = request.GET.get("ids")
+
+    def montar():
+        campos = _campos(request, CAMPOS_PRODUTO, PADRAO_PRODUTO)
+        # O cursor e a ordem de ?ids= precisam destas colunas
+        extras = [nome for nome in ("id", "data_cadastro") if nome not in campos]
+        linhas_de = lambda queryset: valores(queryset, CAMPOS_PRODUTO, campos + extras)  # noqa: E731
+
+        if ids is not None:
+            pedidos = _ids(ids)
+            encontrados = {
+                linha["id"]: linha
+                for linha in linhas_de(consultas.catalogo().filter(id__in=pedidos).order_by())
+            }
+            dados = {
+                "produtos": [encontrados[pk] for pk in pedidos if pk in encontrados],
+                "ausentes": [pk for pk in pedidos if pk not in encontrados],
+            }
+        else:
+            pagina = paginar_por_cursor(
+                linhas_de(consultas.catalogo(categoria_id)),
+                request.GET.get("cursor"),
+                limitar_tamanho(request.GET.get("por_pagina")),
+            )
+            dados = {"produtos": pagina.itens, "proximo_cursor": pagina.proximo_cursor}
+
+        for linha in dados["produtos"]:
+            for nome in extras:
+                del linha[nome]
+        if "imagem" in campos:
+            _url_imagens(dados["produtos"])
+        return dados
+
+    # categoria_nome vem da categoria; o filtro usa o escopo dela
+    escopos = (
+        (TODOS_PRODUTOS, CATEGORIAS) if ids is not None
+        else (escopo_produtos(categoria_id), CATEGORIAS)
+    )
+    return _responder(request, escopos, montar)
+
+
+@require_safe
+def categorias(request):
+    """Categorias ativas"""
+
+    def montar():
+        campos = _campos(request, CAMPOS_CATEGORIA, PADRAO_CATEGORIA)
+        linhas = valores(consultas.categorias_ativas(), CAMPOS_CATEGORIA, campos)
+        return {"categorias": list(linhas)}
+
+    return _responder(request, (CATEGORIAS,), montar)
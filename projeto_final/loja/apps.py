@@ -5,3 +5,6 @@ class LojaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'loja'
     verbose_name = 'Loja de Celulares'
+
+    def ready(self):
+        from . import signals  # noqa: F401
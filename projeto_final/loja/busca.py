@@ -0,0 +1,132 @@
+"""
+Backends de busca do catálogo.
+
+O backend ativo vem de settings.LOJA_BUSCA_BACKEND. O padrão usa uma tabela
+virtual FTS5 do SQLite (loja_produto_busca), mantida em sincronia com
+Produto pelos sinais em loja/signals.py e reconstruída com
+`manage.py reconstruir_busca`.
+"""
+
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q, Value
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+TABELA_FTS = "loja_produto_busca"
+
+# Pesos do bm25 por coluna: nome, descricao, especificacoes
+PESOS = (10.0, 1.0, 2.0)
+
+TERMO = re.compile(r"\w+", re.UNICODE)
+
+
+class BuscaSimples:
+    """
+    Busca por icontains nas três colunas de texto (sem índice)
+    """
+
+    ordena_por_relevancia = False
+
+    def filtrar(self, queryset, termo):
+        return queryset.filter(
+            Q(nome__icontains=termo)
+            | Q(descricao__icontains=termo)
+            | Q(especificacoes__icontains=termo)
+        )
+
+    def indexar(self, produto):
+        pass
+
+    def indexar_varios(self, produtos):
+        pass
+
+    def remover(self, produto_id):
+        pass
+
+    def reconstruir(self):
+        return 0
+
+
+class BuscaFTS5(BuscaSimples):
+    """
+    Busca full-text com FTS5.
+
+    O tokenizer unicode61 com remove_diacritics ignora acentos ("célula"
+    acha "celula"), cada termo vira prefixo ("sams" acha "Samsung") e o
+    resultado é ordenado por bm25 na anotação `relevancia`.
+    """
+
+    ordena_por_relevancia = True
+
+    def expressao(self, termo):
+        """
+        Monta a consulta MATCH: todos os termos, cada um como prefixo
+        """
+        termos = TERMO.findall(termo)
+        return " ".join(f'"{t}"*' for t in termos)
+
+    def filtrar(self, queryset, termo):
+        expressao = self.expressao(termo)
+        if not expressao:
+            return queryset.none().annotate(relevancia=Value(0.0))
+
+        # A tabela FTS entra uma vez na consulta: o MATCH roda uma vez só e
+        # o bm25 sai da mesma linha, sem uma subconsulta por produto
+        pesos = ", ".join(str(p) for p in PESOS)
+        return queryset.extra(
+            tables=[TABELA_FTS],
+            where=[f"{TABELA_FTS}.rowid = loja_produto.id", f"{TABELA_FTS} MATCH %s"],
+            params=[expressao],
+        ).annotate(relevancia=RawSQL(f"bm25({TABELA_FTS}, {pesos})", ()))
+
+    def indexar(self, produto):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {TABELA_FTS} WHERE rowid = %s", [produto.pk])
+            cursor.execute(
+                f"INSERT INTO {TABELA_FTS} (rowid, nome, descricao, especificacoes) "
+                "VALUES (%s, %s, %s, %s)",
+                [produto.pk, produto.nome, produto.descricao, produto.especificacoes],
+            )
+
+    def indexar_varios(self, produtos):
+        """
+        Indexa um lote inteiro; bulk_create não dispara os sinais
+        """
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {TABELA_FTS} WHERE rowid = %s", [[p.pk] for p in produtos]
+            )
+            cursor.executemany(
+                f"INSERT INTO {TABELA_FTS} (rowid, nome, descricao, especificacoes) "
+                "VALUES (%s, %s, %s, %s)",
+                [[p.pk, p.nome, p.descricao, p.especificacoes] for p in produtos],
+            )
+
+    def remover(self, produto_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {TABELA_FTS} WHERE rowid = %s", [produto_id])
+
+    def reconstruir(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {TABELA_FTS}")
+            cursor.execute(
+                f"INSERT INTO {TABELA_FTS} (rowid, nome, descricao, especificacoes) "
+                "SELECT id, nome, descricao, especificacoes FROM loja_produto"
+            )
+            cursor.execute(f"INSERT INTO {TABELA_FTS} ({TABELA_FTS}) VALUES ('optimize')")
+            cursor.execute(f"SELECT count(*) FROM {TABELA_FTS}")
+            return cursor.fetchone()[0]
+
+
+@lru_cache(maxsize=None)
+def obter_backend():
+    caminho = getattr(settings, "LOJA_BUSCA_BACKEND", "loja.busca.BuscaFTS5")
+    backend = import_string(caminho)
+    # FTS5 só existe no SQLite
+    if issubclass(backend, BuscaFTS5) and connection.vendor != "sqlite":
+        backend = BuscaSimples
+    return backend()
@@ -0,0 +1,135 @@
+"""
+Cache de página inteira do catálogo para visitantes anônimos.
+
+home, produtos e produto_detalhe guardam o HTML inteiro no cache, por URL
+e pela versão dos escopos de fragmentos da página (fragmentos.py): os
+mesmos sinais que invalidam os fragmentos invalidam as páginas. Um acerto
+não passa pelo ORM nem pelo template.
+
+Só entram GETs sem cookie de sessão e sem mensagens. Sem sessão não há
+usuário logado nem carrinho, então o cabeçalho de base.html é o mesmo para
+todos. Se a página tiver um formulário POST, o token CSRF é guardado como
+um marcador e trocado, ao servir, por um token desta visita; sem ele a
+resposta não cria cookie e sai `public`, mesmo para quem já tem o cookie
+do CSRF. settings.LOJA_CACHE_PAGINAS=False desliga tudo.
+"""
+
+import hashlib
+import re
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.http import parse_http_date_safe
+
+from . import condicional
+from .fragmentos import aversao, escopo_produtos, versao
+
+TIMEOUT = getattr(settings, "LOJA_CACHE_PAGINAS_TIMEOUT", 10 * 60)
+
+MARCADOR_CSRF = "__loja_csrf__"
+_CAMPO_CSRF = re.compile(r'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+
+
+def elegivel(request):
+    return (
+        getattr(settings, "LOJA_CACHE_PAGINAS", True)
+        and request.method in ("GET", "HEAD")
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and CookieStorage.cookie_name not in request.COOKIES
+    )
+
+
+def _chave(request, versao_escopos):
+    url = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f"loja:pagina:{request.resolver_match.view_name}:{url}:{versao_escopos}"
+
+
+def _servir(request, chave, guardada):
+    """
+    Resposta montada do cache, com token CSRF e validadores desta visita
+    """
+    conteudo = guardada["conteudo"]
+    # Sem formulário POST na página não há token: nada de cookie, e a
+    # resposta é a mesma para todos os visitantes sem sessão
+    com_token = MARCADOR_CSRF in conteudo
+    csrf = request.COOKIES.get(settings.CSRF_COOKIE_NAME, "") if com_token else ""
+    etag = 'W/"%s"' % hashlib.blake2b(f"{chave}|{csrf}".encode(), digest_size=12).hexdigest()
+    modificado = guardada["modificado"]
+    compartilhavel = None if com_token else True
+    if resposta := condicional.nao_modificado(request, etag, modificado, compartilhavel):
+        return resposta
+    if com_token:
+        conteudo = conteudo.replace(MARCADOR_CSRF, get_token(request))
+    resposta = HttpResponse(conteudo, content_type=guardada["tipo"])
+    return condicional.finalizar(request, resposta, etag, modificado, compartilhavel)
+
+
+def _para_guardar(request, resposta):
+    """
+    O que guardar da resposta, ou None se ela tem algo desta visita
+    (sessão criada, cookies além do CSRF)
+    """
+    if (
+        resposta.status_code != 200
+        or resposta.streaming
+        or request.session.modified
+        or set(resposta.cookies) - {settings.CSRF_COOKIE_NAME}
+    ):
+        return None
+    conteudo = _CAMPO_CSRF.sub(rf"\g<1>{MARCADOR_CSRF}\g<2>", resposta.content.decode(resposta.charset))
+    return {
+        "conteudo": conteudo,
+        "tipo": resposta["Content-Type"],
+        "modificado": parse_http_date_safe(resposta.headers.get("Last-Modified")),
+    }
+
+
+def anonima(*escopos, por_categoria=False):
+    """
+    Guarda a view para visitantes anônimos; `escopos` são os escopos de
+    fragmentos.py dos dados da página, mais o da categoria do filtro
+    (?categoria=) se por_categoria
+    """
+
+    def escopos_da_requisicao(request):
+        if por_categoria:
+            return (*escopos, escopo_produtos(request.GET.get("categoria")))
+        return escopos
+
+    def decorador(view):
+        if iscoroutinefunction(view):
+
+            @wraps(view)
+            async def interna(request, *args, **kwargs):
+                if not elegivel(request):
+                    return await view(request, *args, **kwargs)
+                chave = _chave(request, await aversao(*escopos_da_requisicao(request)))
+                if (guardada := await cache.aget(chave)) is not None:
+                    return _servir(request, chave, guardada)
+                resposta = await view(request, *args, **kwargs)
+                if (guardar := _para_guardar(request, resposta)) is not None:
+                    await cache.aset(chave, guardar, TIMEOUT)
+                return resposta
+
+        else:
+
+            @wraps(view)
+            def interna(request, *args, **kwargs):
+                if not elegivel(request):
+                    return view(request, *args, **kwargs)
+                chave = _chave(request, versao(*escopos_da_requisicao(request)))
+                if (guardada := cache.get(chave)) is not None:
+                    return _servir(request, chave, guardada)
+                resposta = view(request, *args, **kwargs)
+                if (guardar := _para_guardar(request, resposta)) is not None:
+                    cache.set(chave, guardar, TIMEOUT)
+                return resposta
+
+        return interna
+
+    return decorador
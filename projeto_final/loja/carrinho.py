@@ -1,47 +1,79 @@
+import uuid
 from decimal import Decimal
 
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from . import reservas
+from .imagens import miniatura_url
+from .models import CarrinhoItem, Produto
+
+# Chave pequena com o total de unidades, lida pelo contador do base.html
+CHAVE_QUANTIDADE = 'carrinho_qtd'
+
+# A foto do carrinho tem 80px (160 para telas de alta densidade)
+TAMANHO_MINIATURA = 160
+
+
 class Carrinho:
     def __init__(self, request):
         self.session = request.session
+        # Também identifica as reservas de estoque do carrinho
+        self.chave = self.session.get('carrinho_id')
         self.carrinho = self.session.get('carrinho', {})
 
+    def _garantir_chave(self):
+        if not self.chave:
+            self.chave = uuid.uuid4().hex
+            self.session['carrinho_id'] = self.chave
+
     def adicionar(self, produto, quantidade=1):
         """
-        Adiciona produto respeitando o estoque disponível
+        Adiciona produto reservando as unidades; devolve quantas entraram
+        (0 se não há mais unidades livres)
         """
+        self._garantir_chave()
         produto_id = str(produto.id)
 
         quantidade_atual = self.carrinho.get(produto_id, {}).get('quantidade', 0)
-        nova_quantidade = quantidade_atual + quantidade
 
-        # NAO permite passar do estoque
-        if nova_quantidade > produto.estoque:
-            nova_quantidade = produto.estoque
+        # NAO permite passar do estoque livre (estoque - reservas dos outros)
+        nova_quantidade = reservas.reservar(self.chave, produto, quantidade_atual + quantidade)
+        if nova_quantidade <= 0:
+            self.remover(produto)
+            return 0
 
         if produto_id not in self.carrinho:
             self.carrinho[produto_id] = {
                 'nome': produto.nome,
                 'preco': float(produto.preco),
                 'quantidade': nova_quantidade,
-                'imagem': getattr(produto.imagem, 'url', '')
+                'imagem': miniatura_url(produto.imagem, TAMANHO_MINIATURA)
             }
         else:
             self.carrinho[produto_id]['quantidade'] = nova_quantidade
 
         self.salvar()
+        return nova_quantidade - quantidade_atual
 
     def diminuir(self, produto, quantidade=1):
         """
         Diminui a quantidade do produto no carrinho
         """
+        # Sessões de antes das reservas têm carrinho mas não carrinho_id
+        self._garantir_chave()
         produto_id = str(produto.id)
 
         if produto_id in self.carrinho:
-            self.carrinho[produto_id]['quantidade'] -= quantidade
+            nova_quantidade = self.carrinho[produto_id]['quantidade'] - quantidade
+            if nova_quantidade > 0:
+                nova_quantidade = reservas.reservar(self.chave, produto, nova_quantidade)
 
-            if self.carrinho[produto_id]['quantidade'] <= 0:
-                del self.carrinho[produto_id]
+            if nova_quantidade <= 0:
+                self.remover(produto)
+                return
 
+            self.carrinho[produto_id]['quantidade'] = nova_quantidade
             self.salvar()
 
     def remover(self, produto):
@@ -50,21 +82,31 @@ class Carrinho:
         """
         produto_id = str(produto.id)
 
+        if self.chave:
+            reservas.liberar(self.chave, produto.id)
         if produto_id in self.carrinho:
             del self.carrinho[produto_id]
             self.salvar()
 
     def salvar(self):
         self.session['carrinho'] = self.carrinho
+        self.session[CHAVE_QUANTIDADE] = len(self)
         self.session.modified = True
 
     def limpar(self):
         """
         Limpa o carrinho (usado no checkout)
         """
+        if self.chave:
+            reservas.liberar(self.chave)
         self.session['carrinho'] = {}
+        self.session[CHAVE_QUANTIDADE] = 0
         self.session.modified = True
 
+    async def acarregar(self):
+        # Tudo vem da sessão, que a view async já carregou
+        pass
+
     def __len__(self):
         return sum(item['quantidade'] for item in self.carrinho.values())
 
@@ -87,3 +129,190 @@ class Carrinho:
             Decimal(item['preco']) * item['quantidade']
             for item in self.carrinho.values()
         )
+
+
+class CarrinhoBanco(Carrinho):
+    """
+    Carrinho guardado na tabela CarrinhoItem.
+
+    A sessão guarda só a chave do carrinho. Preço, nome e imagem são lidos
+    do produto atual, com um único in_bulk() por requisição.
+    """
+
+    def __init__(self, request):
+        self.session = request.session
+        self.chave = self.session.get('carrinho_id')
+        self._linhas = None
+
+    def _carregar(self):
+        """
+        Retorna {produto_id: (produto, quantidade)}, consultando uma vez só
+        """
+        if self._linhas is None:
+            self._linhas = {}
+            if self.chave:
+                quantidades = dict(
+                    CarrinhoItem.objects.filter(chave=self.chave)
+                    .values_list('produto_id', 'quantidade')
+                )
+                produtos = Produto.objects.in_bulk(quantidades.keys())
+                self._linhas = self._montar_linhas(quantidades, produtos)
+        return self._linhas
+
+    async def acarregar(self):
+        """
+        _carregar() com o ORM assíncrono, para as views async
+        """
+        if self._linhas is None:
+            self._linhas = {}
+            if self.chave:
+                quantidades = {
+                    pk: quantidade
+                    async for pk, quantidade in CarrinhoItem.objects.filter(chave=self.chave)
+                    .values_list('produto_id', 'quantidade')
+                }
+                produtos = await Produto.objects.ain_bulk(quantidades.keys())
+                self._linhas = self._montar_linhas(quantidades, produtos)
+
+    @staticmethod
+    def _montar_linhas(quantidades, produtos):
+        return {
+            pk: (produtos[pk], quantidade)
+            for pk, quantidade in quantidades.items()
+            if pk in produtos
+        }
+
+    def adicionar(self, produto, quantidade=1):
+        """
+        Adiciona produto reservando as unidades; devolve quantas entraram
+        """
+        self._garantir_chave()
+        linhas = self._carregar()
+
+        quantidade_atual = linhas.get(produto.id, (produto, 0))[1]
+        nova_quantidade = reservas.reservar(self.chave, produto, quantidade_atual + quantidade)
+
+        if nova_quantidade <= 0:
+            self.remover(produto)
+            return 0
+
+        CarrinhoItem.objects.update_or_create(
+            chave=self.chave,
+            produto=produto,
+            defaults={'quantidade': nova_quantidade},
+        )
+        linhas[produto.id] = (produto, nova_quantidade)
+        self.salvar()
+        return nova_quantidade - quantidade_atual
+
+    def diminuir(self, produto, quantidade=1):
+        """
+        Diminui a quantidade do produto no carrinho
+        """
+        linhas = self._carregar()
+        if produto.id not in linhas:
+            return
+
+        nova_quantidade = linhas[produto.id][1] - quantidade
+        if nova_quantidade > 0:
+            nova_quantidade = reservas.reservar(self.chave, produto, nova_quantidade)
+        if nova_quantidade <= 0:
+            self.remover(produto)
+            return
+
+        CarrinhoItem.objects.filter(chave=self.chave, produto=produto).update(
+            quantidade=nova_quantidade
+        )
+        linhas[produto.id] = (linhas[produto.id][0], nova_quantidade)
+        self.salvar()
+
+    def remover(self, produto):
+        """
+        Remove o produto completamente do carrinho
+        """
+        if not self.chave:
+            return
+        reservas.liberar(self.chave, produto.id)
+        CarrinhoItem.objects.filter(chave=self.chave, produto=produto).delete()
+        self._carregar().pop(produto.id, None)
+        self.salvar()
+
+    def salvar(self):
+        # As linhas já estão no banco; na sessão só vai o contador
+        self.session[CHAVE_QUANTIDADE] = len(self)
+
+    def limpar(self):
+        """
+        Limpa o carrinho (usado no checkout)
+        """
+        if self.chave:
+            reservas.liberar(self.chave)
+            CarrinhoItem.objects.filter(chave=self.chave).delete()
+        self._linhas = {}
+        self.salvar()
+
+    def __len__(self):
+        return sum(quantidade for _, quantidade in self._carregar().values())
+
+    def __iter__(self):
+        for produto, quantidade in self._carregar().values():
+            yield {
+                'id': produto.id,
+                'nome': produto.nome,
+                'preco': produto.preco,
+                'quantidade': quantidade,
+                'subtotal': produto.preco * quantidade,
+                'imagem': miniatura_url(produto.imagem, TAMANHO_MINIATURA),
+                'estoque': produto.estoque,
+            }
+
+    def total(self):
+        return sum(
+            (produto.preco * quantidade for produto, quantidade in self._carregar().values()),
+            Decimal('0'),
+        )
+
+
+def obter_carrinho(request):
+    """
+    Instancia o carrinho configurado em settings.LOJA_CARRINHO_BACKEND
+    """
+    caminho = getattr(settings, 'LOJA_CARRINHO_BACKEND', 'loja.carrinho.Carrinho')
+    return import_string(caminho)(request)
+
+
+def quantidade_no_carrinho(request):
+    """
+    Total de unidades para o contador, sem montar o carrinho inteiro
+    """
+    quantidade = request.session.get(CHAVE_QUANTIDADE)
+    if quantidade is None:
+        # Sessões anteriores ao contador: calcula e guarda, mas sem criar
+        # sessão para quem nunca usou o carrinho
+        quantidade = len(obter_carrinho(request))
+        if quantidade:
+            request.session[CHAVE_QUANTIDADE] = quantidade
+    return quantidade
+
+
+async def aobter_carrinho(request):
+    """
+    obter_carrinho() para views assíncronas, com as linhas já carregadas
+    """
+    # Qualquer leitura assíncrona carrega a sessão inteira no cache dela
+    await request.session.aget('carrinho_id')
+    carrinho = obter_carrinho(request)
+    await carrinho.acarregar()
+    return carrinho
+
+
+async def aquantidade_no_carrinho(request):
+    """
+    quantidade_no_carrinho() sem tocar o banco de forma síncrona
+    """
+    quantidade = await request.session.aget(CHAVE_QUANTIDADE)
+    if quantidade is None:
+        quantidade = len(await aobter_carrinho(request))
+        if quantidade:
+            await request.session.aset(CHAVE_QUANTIDADE, quantidade)
+    return quantidade
@@ -0,0 +1,102 @@
+"""
+GET condicional das páginas do catálogo (home, produtos e produto_detalhe).
+
+O Last-Modified é o mais recente entre o data_atualizacao dos produtos que
+a página pode mostrar e as versões dos fragmentos dela, que são o horário
+da última invalidação (fragmentos.py): categoria renomeada ou desativada e
+produto apagado não mexem em data_atualizacao, mas trocam a versão. O ETag
+(fraco) junta esse horário às versões e ao que o cabeçalho mostra da
+sessão: usuário, contador do carrinho, mensagens pendentes e o cookie do
+CSRF, já que os formulários de login/logout levam o token. Se o
+If-None-Match bate, a view responde 304 antes de buscar as listas e
+renderizar.
+
+Com cookie (sessão, CSRF) a resposta é `private, no-cache`: o navegador
+guarda e confirma a cada uso, e só o ETag vale para o 304, porque o
+Last-Modified não vê o carrinho. Sem cookie nenhum, na ida e na volta, ela
+é `public` por settings.LOJA_CATALOGO_MAX_AGE segundos, e um proxy ou CDN
+na frente pode servir as visitas anônimas. Sempre com Vary: Cookie.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+MAX_AGE = getattr(settings, "LOJA_CATALOGO_MAX_AGE", 60)
+
+
+def mais_recente(*horarios):
+    horarios = [horario for horario in horarios if horario is not None]
+    return max(horarios) if horarios else None
+
+
+def validadores(request, atualizado_em, carrinho_qtd, *versoes):
+    """
+    (ETag, Last-Modified em segundos) da página para esta sessão
+    """
+    partes = [
+        atualizado_em.isoformat() if atualizado_em else "",
+        *versoes,
+        str(request.user.pk or ""),
+        str(carrinho_qtd or 0),
+        # Só conta as mensagens; quem as consome é o template
+        str(len(get_messages(request))),
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ""),
+    ]
+    resumo = hashlib.blake2b("|".join(partes).encode(), digest_size=12).hexdigest()
+    return f'W/"{resumo}"', _modificado_em(atualizado_em, versoes)
+
+
+def _modificado_em(atualizado_em, versoes):
+    """
+    Last-Modified em segundos: o maior entre o horário e as versões (ns)
+    """
+    invalidado_ns = max((int(v) for versao in versoes for v in versao.split("-")), default=0)
+    segundos = [-(-invalidado_ns // 10**9)] if invalidado_ns else []
+    if atualizado_em:
+        segundos.append(int(atualizado_em.timestamp()))
+    return max(segundos, default=None)
+
+
+def nao_modificado(request, etag, modificado, compartilhavel=None):
+    """
+    Resposta 304 (ou 412) se o cliente já tem esta versão; senão None.
+    compartilhavel: ver finalizar()
+    """
+    if compartilhavel is None:
+        compartilhavel = not request.COOKIES
+    resposta = get_conditional_response(
+        request, etag=etag, last_modified=modificado if compartilhavel else None
+    )
+    if resposta is not None:
+        return finalizar(request, resposta, etag, modificado, compartilhavel)
+    return None
+
+
+def finalizar(request, response, etag, modificado, compartilhavel=None):
+    """
+    Validadores e Cache-Control. compartilhavel=True diz que a resposta não
+    depende de cookie nenhum (cache_pagina.py); None decide pela requisição
+    """
+    if modificado and not response.has_header("Last-Modified"):
+        response.headers["Last-Modified"] = http_date(modificado)
+    response.headers.setdefault("ETag", etag)
+
+    # O SessionMiddleware e o CsrfViewMiddleware põem os cookies depois da
+    # view; o que eles vão fazer já está marcado na requisição
+    if compartilhavel is None:
+        compartilhavel = not request.COOKIES
+    compartilhavel = compartilhavel and not (
+        response.cookies
+        or request.session.modified
+        or request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+    )
+    if compartilhavel:
+        patch_cache_control(response, public=True, max_age=MAX_AGE)
+    else:
+        patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ["Cookie"])
+    return response
@@ -0,0 +1,106 @@
+"""
+Consultas da vitrine usadas pelas views.
+
+Ficam aqui para que `manage.py verificar_indices` confira o plano de
+execução exatamente das mesmas consultas que as páginas executam.
+"""
+
+from django.db.models import Prefetch
+
+from .models import Categoria, ItemPedido, Pedido, Produto
+
+# Campos lidos pelos cards de listagem (produtos.html)
+CAMPOS_CARD_PRODUTO = (
+    "id",
+    "nome",
+    "preco",
+    "estoque",
+    "ativo",
+    "imagem",
+    "miniaturas",
+    "data_cadastro",
+    "categoria__nome",
+)
+
+
+def produtos_destaque(limite=6):
+    return Produto.objects.filter(ativo=True, destaque=True).order_by("-data_cadastro")[:limite]
+
+
+def categorias_ativas():
+    return Categoria.objects.filter(ativo=True)
+
+
+def catalogo(categoria_id=None):
+    """
+    Produtos ativos do catálogo, só com os campos do card
+    """
+    produtos = (
+        Produto.objects.filter(ativo=True)
+        .select_related("categoria")
+        .only(*CAMPOS_CARD_PRODUTO)
+    )
+    if categoria_id:
+        produtos = produtos.filter(categoria_id=categoria_id)
+    return produtos
+
+
+def relacionados(produto, limite=4):
+    """
+    Vizinhos pré-calculados do produto (loja/recomendacoes.py), na ordem
+    """
+    return (
+        Produto.objects.filter(recomendado_em__produto=produto.id, ativo=True, estoque__gt=0)
+        .order_by("recomendado_em__posicao")[:limite]
+    )
+
+
+def mesma_categoria(produto, limite=4):
+    """
+    Para produtos que ainda não passaram pelo cálculo dos relacionados
+    """
+    return (
+        Produto.objects.filter(categoria=produto.categoria_id, ativo=True, estoque__gt=0)
+        .exclude(id=produto.id)
+        .order_by("-data_cadastro", "id")[:limite]
+    )
+
+
+def atualizacoes(categoria_id=None):
+    """
+    data_atualizacao dos produtos, o mais recente primeiro. Inclui os
+    inativos: um produto que sai da vitrine também muda a página
+    """
+    produtos = Produto.objects.order_by("-data_atualizacao").values_list("data_atualizacao", flat=True)
+    if categoria_id:
+        produtos = produtos.filter(categoria_id=categoria_id)
+    return produtos
+
+
+def atualizacoes_relacionados(produto):
+    """
+    data_atualizacao dos vizinhos do produto; são poucos, o máximo sai em Python
+    """
+    return (
+        Produto.objects.filter(recomendado_em__produto=produto.id)
+        .order_by()
+        .values_list("data_atualizacao", flat=True)
+    )
+
+
+def pedidos_do_usuario(usuario):
+    """
+    Pedidos do cliente com itens e produtos pré-carregados
+    """
+    itens = ItemPedido.objects.select_related("produto").only(
+        "pedido",
+        "quantidade",
+        "preco_unitario",
+        "produto_nome",
+        "produto_imagem",
+        "produto__nome",
+        "produto__imagem",
+    )
+    return Pedido.objects.filter(cliente__usuario=usuario).prefetch_related(
+        Prefetch("itens", queryset=itens)
+    )
@@ -0,0 +1,56 @@
+"""
+Contadores de produtos disponíveis por categoria.
+
+Categoria.produtos_disponiveis guarda quantos produtos ativos e com
+estoque a categoria tem, para a vitrine mostrar as contagens sem um COUNT
+por categoria a cada página. Os sinais de Produto (loja/signals.py), o
+checkout (loja/pedidos.py) e a importação ajustam o contador junto com a
+mudança; `manage.py reconciliar_contadores` recalcula tudo de uma vez.
+"""
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .fragmentos import CATEGORIAS, invalidar
+from .models import Categoria, Produto
+
+
+def conta(ativo, estoque):
+    """
+    Se um produto nesse estado entra no contador da categoria
+    """
+    return bool(ativo) and estoque > 0
+
+
+def ajustar(deltas):
+    """
+    Soma {categoria_id: n} aos contadores com UPDATE relativo
+    """
+    deltas = {pk: delta for pk, delta in deltas.items() if pk and delta}
+    for categoria_id, delta in deltas.items():
+        Categoria.objects.filter(pk=categoria_id).update(
+            produtos_disponiveis=F("produtos_disponiveis") + delta
+        )
+    if deltas:
+        # As contagens aparecem nos fragmentos de categorias
+        transaction.on_commit(lambda: invalidar(CATEGORIAS))
+
+
+def reconciliar(categoria_ids=None):
+    """
+    Recalcula os contadores num único UPDATE com subconsulta agregada
+    """
+    disponiveis = (
+        Produto.objects.filter(categoria=OuterRef("pk"), ativo=True, estoque__gt=0)
+        .order_by()
+        .values("categoria")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    categorias = Categoria.objects.all()
+    if categoria_ids is not None:
+        categorias = categorias.filter(pk__in=categoria_ids)
+    atualizadas = categorias.update(produtos_disponiveis=Coalesce(Subquery(disponiveis), 0))
+    transaction.on_commit(lambda: invalidar(CATEGORIAS))
+    return atualizadas
@@ -1,6 +1,13 @@
-from .carrinho import Carrinho
+from django.utils.functional import SimpleLazyObject
+
+from .carrinho import obter_carrinho, quantidade_no_carrinho
+
 
 def carrinho_context(request):
+    """
+    Carrinho e contador preguiçosos: a sessão só é lida se o template usar
+    """
     return {
-        'carrinho': Carrinho(request)
+        'carrinho': SimpleLazyObject(lambda: obter_carrinho(request)),
+        'carrinho_qtd': SimpleLazyObject(lambda: quantidade_no_carrinho(request)),
     }
@@ -0,0 +1,142 @@
+"""
+Catálogo sintético para benchmarks.
+
+Tudo é criado com bulk_create; use só em bancos descartáveis, como o de
+banco_de_teste().
+"""
+
+import random
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from . import contadores, recomendacoes, relatorios
+from .busca import obter_backend
+from .models import Categoria, Cliente, ItemPedido, Pedido, Produto
+
+PALAVRAS = (
+    "Galaxy", "iPhone", "Redmi", "Moto", "Edge", "Poco", "Pro", "Max", "Lite",
+    "Plus", "Ultra", "5G", "128GB", "256GB", "câmera", "bateria", "tela",
+    "AMOLED", "carregador", "rápido", "dual", "chip", "preto", "azul", "verde",
+)
+
+
+@contextmanager
+def banco_de_teste(arquivo=None):
+    """
+    Cria um banco de teste vazio e migrado e o apaga no fim.
+
+    Sem `arquivo`, o SQLite fica em memória. Os outros aliases (a réplica
+    de leitura) passam a apontar para o mesmo banco enquanto ele existe.
+    """
+    conexao = connections[DEFAULT_DB_ALIAS]
+    nome_original = conexao.settings_dict["NAME"]
+    if arquivo:
+        conexao.settings_dict["TEST"]["NAME"] = str(arquivo)
+    conexao.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+
+    espelhos = {
+        outra.alias: outra.settings_dict
+        for outra in connections.all()
+        if outra.alias != DEFAULT_DB_ALIAS
+    }
+    for alias in espelhos:
+        connections[alias].close()
+        connections[alias].creation.set_as_test_mirror(conexao.settings_dict)
+    try:
+        yield
+    finally:
+        for alias, settings_dict in espelhos.items():
+            connections[alias].close()
+            connections[alias].settings_dict = settings_dict
+        conexao.creation.destroy_test_db(nome_original, verbosity=0)
+
+
+def _texto(rng, palavras):
+    return " ".join(rng.choice(PALAVRAS) for _ in range(palavras))
+
+
+def semear(categorias=10, produtos=2000, clientes=50, pedidos=500, itens_por_pedido=3, semente=42):
+    """
+    Popula o banco e devolve um resumo com ids úteis para os cenários
+    """
+    rng = random.Random(semente)
+    tamanho_lote = 500
+
+    Categoria.objects.bulk_create(
+        [Categoria(nome=f"Categoria {i}", descricao=_texto(rng, 8)) for i in range(categorias)],
+        batch_size=tamanho_lote,
+    )
+    categoria_ids = list(Categoria.objects.values_list("id", flat=True))
+
+    Produto.objects.bulk_create(
+        [
+            Produto(
+                nome=f"{_texto(rng, 3)} {i}",
+                categoria_id=rng.choice(categoria_ids),
+                descricao=_texto(rng, 40),
+                especificacoes=_texto(rng, 15),
+                preco=Decimal(rng.randrange(50000, 900000)) / 100,
+                estoque=rng.randrange(0, 200),
+                destaque=rng.random() < 0.05,
+                ativo=rng.random() < 0.95,
+            )
+            for i in range(produtos)
+        ],
+        batch_size=tamanho_lote,
+    )
+    produtos_criados = {
+        pk: (nome, preco) for pk, nome, preco in Produto.objects.values_list("id", "nome", "preco")
+    }
+    produto_ids = list(produtos_criados)
+
+    # Uma senha só, com hash calculado uma vez
+    senha = make_password("benchmark")
+    User.objects.bulk_create(
+        [User(username=f"cliente{i}", password=senha) for i in range(clientes)],
+        batch_size=tamanho_lote,
+    )
+    usuarios = User.objects.filter(username__startswith="cliente").values_list("id", flat=True)
+    Cliente.objects.bulk_create(
+        [
+            Cliente(usuario_id=pk, cpf=f"{pk:011d}", telefone="", endereco="", cidade="", estado="SP", cep="")
+            for pk in usuarios
+        ],
+        batch_size=tamanho_lote,
+    )
+    cliente_ids = list(Cliente.objects.values_list("id", flat=True))
+
+    Pedido.objects.bulk_create(
+        [
+            Pedido(cliente_id=rng.choice(cliente_ids), status="confirmado", valor_total=0)
+            for _ in range(pedidos)
+        ],
+        batch_size=tamanho_lote,
+    )
+    itens = []
+    for pedido_id in Pedido.objects.values_list("id", flat=True):
+        for produto_id in rng.sample(produto_ids, min(itens_por_pedido, len(produto_ids))):
+            itens.append(
+                ItemPedido(
+                    pedido_id=pedido_id,
+                    produto_id=produto_id,
+                    quantidade=rng.randrange(1, 4),
+                    preco_unitario=produtos_criados[produto_id][1],
+                    produto_nome=produtos_criados[produto_id][0],
+                )
+            )
+    ItemPedido.objects.bulk_create(itens, batch_size=tamanho_lote)
+
+    obter_backend().reconstruir()
+    relatorios.reconstruir()
+    contadores.reconciliar()
+    recomendacoes.reconstruir()
+
+    return {
+        "categoria_id": categoria_ids[0],
+        "produto_id": Produto.objects.filter(ativo=True, estoque__gt=0).values_list("id", flat=True).first(),
+        "pedido_id": Pedido.objects.values_list("id", flat=True).first(),
+    }
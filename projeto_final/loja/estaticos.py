@@ -0,0 +1,145 @@
+"""
+Arquivos estáticos com hash no nome e versões comprimidas.
+
+O CSS das páginas fica em static/css/ em vez de <style> em cada HTML: o
+navegador baixa uma vez e reaproveita em todas as páginas. O
+`manage.py collectstatic` grava em STATIC_ROOT cada arquivo com o hash do
+conteúdo no nome (base.3f2a9c1d7e4b.css, semântica do
+ManifestStaticFilesStorage) e, ao lado, as versões .gz e .br (o .br só com
+o pacote opcional `brotli` instalado).
+
+Como o nome muda quando o conteúdo muda, os arquivos com hash podem ficar
+em cache por um ano (immutable). `servir` entrega o STATIC_ROOT assim,
+escolhendo a versão comprimida pelo Accept-Encoding, quando não há um
+servidor na frente fazendo isso (settings.LOJA_SERVIR_ESTATICOS).
+"""
+
+import gzip
+import mimetypes
+import posixpath
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+
+try:
+    import brotli
+except ImportError:  # opcional: sem ele só há as versões .gz
+    brotli = None
+
+COMPRIMIVEIS = {".css", ".js", ".mjs", ".svg", ".json", ".map", ".txt", ".xml", ".html", ".ico"}
+# Abaixo disso o cabeçalho do gzip come o ganho
+TAMANHO_MINIMO = 256
+
+# Preferência: brotli comprime melhor que gzip
+SUFIXOS = {"br": ".br", "gzip": ".gz"}
+
+CACHE_IMUTAVEL = "public, max-age=31536000, immutable"
+# Nomes sem hash: o navegador confirma a cada uso (304 se não mudou)
+CACHE_REVALIDAR = "public, max-age=0, must-revalidate"
+
+
+def comprimir(conteudo):
+    """
+    {codificação: bytes} das versões que ficam menores que o original
+    """
+    versoes = {"gzip": gzip.compress(conteudo, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        versoes["br"] = brotli.compress(conteudo, quality=11)
+    return {codificacao: dados for codificacao, dados in versoes.items() if len(dados) < len(conteudo)}
+
+
+class ArmazenamentoComprimido(ManifestStaticFilesStorage):
+    """
+    ManifestStaticFilesStorage que grava também nome.gz e nome.br
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for nome in sorted(set(self.hashed_files.values())):
+            self.gravar_comprimidos(nome)
+
+    def gravar_comprimidos(self, nome):
+        if posixpath.splitext(nome)[1].lower() not in COMPRIMIVEIS:
+            return
+        with self.open(nome) as arquivo:
+            conteudo = arquivo.read()
+        if len(conteudo) < TAMANHO_MINIMO:
+            return
+        for codificacao, dados in comprimir(conteudo).items():
+            destino = nome + SUFIXOS[codificacao]
+            if self.exists(destino):
+                self.delete(destino)
+            self._save(destino, ContentFile(dados))
+
+
+@lru_cache(maxsize=1)
+def nomes_com_hash():
+    """
+    Nomes do manifesto do collectstatic (lido uma vez por processo)
+    """
+    return frozenset(getattr(staticfiles_storage, "hashed_files", {}).values())
+
+
+def codificacoes_aceitas(cabecalho):
+    aceitas = set()
+    for parte in cabecalho.split(","):
+        nome, _, parametros = parte.partition(";")
+        parametros = parametros.replace(" ", "")
+        if parametros.startswith("q="):
+            try:
+                if float(parametros[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        aceitas.add(nome.strip().lower())
+    return aceitas
+
+
+@require_safe
+def servir(request, caminho):
+    """
+    Arquivo do STATIC_ROOT, na melhor versão comprimida que o cliente aceita
+    """
+    try:
+        arquivo = Path(safe_join(settings.STATIC_ROOT, posixpath.normpath(caminho).lstrip("/")))
+    except SuspiciousFileOperation:
+        raise Http404("Arquivo estático inválido")
+    if not arquivo.is_file():
+        raise Http404("Arquivo estático não encontrado")
+
+    modificado = arquivo.stat().st_mtime
+    if not was_modified_since(request.headers.get("If-Modified-Since"), modificado):
+        return HttpResponseNotModified()
+
+    tipo, _ = mimetypes.guess_type(arquivo.name)
+    aceitas = codificacoes_aceitas(request.headers.get("Accept-Encoding", ""))
+    enviado, codificacao = arquivo, None
+    for candidata, sufixo in SUFIXOS.items():
+        variante = arquivo.with_name(arquivo.name + sufixo)
+        if candidata in aceitas and variante.is_file():
+            enviado, codificacao = variante, candidata
+            break
+
+    resposta = FileResponse(enviado.open("rb"), content_type=tipo or "application/octet-stream")
+    # FileResponse põe o nome do .gz/.br em Content-Disposition
+    del resposta.headers["Content-Disposition"]
+    if codificacao:
+        resposta.headers["Content-Encoding"] = codificacao
+    resposta.headers["Last-Modified"] = http_date(modificado)
+    resposta.headers["Cache-Control"] = (
+        CACHE_IMUTAVEL if posixpath.normpath(caminho) in nomes_com_hash() else CACHE_REVALIDAR
+    )
+    patch_vary_headers(resposta, ["Accept-Encoding"])
+    return resposta
@@ -1,4 +1,5 @@
 from django import forms
+from .imagens import gerar_miniaturas_do_produto
 from .models import Produto, Categoria
 
 class ProdutoForm(forms.ModelForm):
@@ -21,6 +22,13 @@ class ProdutoForm(forms.ModelForm):
             'categoria': forms.Select(),
         }
 
+    def save(self, commit=True):
+        produto = super().save(commit=commit)
+        # Miniaturas geradas já no upload, não na primeira visita
+        if commit and 'imagem' in self.changed_data and produto.imagem:
+            gerar_miniaturas_do_produto(produto)
+        return produto
+
 class CategoriaForm(forms.ModelForm):
     class Meta:
         model = Categoria
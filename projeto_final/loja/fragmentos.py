@@ -0,0 +1,72 @@
+"""
+Versões dos fragmentos de template em cache.
+
+Cada escopo ("categorias", "produtos:todas", "produtos:<categoria_id>")
+tem uma versão guardada no próprio cache. Os templates incluem a versão
+no vary_on do {% cache %}; os sinais de Produto e Categoria trocam a
+versão, e os fragmentos antigos simplesmente deixam de ser lidos.
+
+A versão é o horário da invalidação em nanossegundos; condicional.py usa
+isso no Last-Modified das páginas.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+CATEGORIAS = "categorias"
+TODOS_PRODUTOS = "produtos:todas"
+
+# Os fragmentos só mudam quando os sinais invalidam; o timeout é só um teto
+TIMEOUT = getattr(settings, "LOJA_FRAGMENTOS_TIMEOUT", 60 * 60 * 24)
+
+
+def escopo_produtos(categoria_id=None):
+    return f"produtos:{categoria_id}" if categoria_id else TODOS_PRODUTOS
+
+
+def _chave(escopo):
+    return f"loja:versao:{escopo}"
+
+
+def versao(*escopos):
+    """
+    Versão combinada dos escopos, para usar como vary_on
+    """
+    chaves = [_chave(escopo) for escopo in escopos]
+    versoes = cache.get_many(chaves)
+    for chave in chaves:
+        if chave not in versoes:
+            # Versão nova a partir do relógio: se a chave for despejada do
+            # cache, nunca volta a um número que já foi usado
+            cache.add(chave, time.time_ns(), None)
+            versoes[chave] = cache.get(chave)
+    return "-".join(str(versoes[chave]) for chave in chaves)
+
+
+async def aversao(*escopos):
+    """
+    versao() para views assíncronas, sem bloquear o loop de eventos
+    """
+    chaves = [_chave(escopo) for escopo in escopos]
+    versoes = await cache.aget_many(chaves)
+    for chave in chaves:
+        if chave not in versoes:
+            await cache.aadd(chave, time.time_ns(), None)
+            versoes[chave] = await cache.aget(chave)
+    return "-".join(str(versoes[chave]) for chave in chaves)
+
+
+def invalidar(*escopos):
+    agora = time.time_ns()
+    cache.set_many({_chave(escopo): agora for escopo in escopos}, None)
+
+
+def invalidar_produtos(*categoria_ids):
+    """
+    Invalida as grades de todas as categorias e das categorias afetadas
+    """
+    escopos = {TODOS_PRODUTOS}
+    escopos.update(escopo_produtos(pk) for pk in categoria_ids if pk)
+    invalidar(*escopos)
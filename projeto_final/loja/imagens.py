@@ -0,0 +1,165 @@
+"""
+Miniaturas das imagens de produto.
+
+Para cada imagem enviada são geradas versões em WebP e JPEG nas larguras
+de settings.LOJA_MINIATURAS_LARGURAS, em media/miniaturas/. Os templates
+usam a tag {% imagem_responsiva %} (templatetags/loja_imagens.py) para
+servir a menor versão adequada com srcset.
+
+A largura real de cada miniatura fica em Produto.miniaturas quando ela é
+gerada, para que as páginas não consultem o storage a cada imagem.
+"""
+
+import logging
+import posixpath
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+LARGURAS = tuple(getattr(settings, "LOJA_MINIATURAS_LARGURAS", (160, 400, 800)))
+PASTA = "miniaturas"
+
+logger = logging.getLogger(__name__)
+
+# formato -> (extensão, opções do Pillow)
+FORMATOS = {
+    "webp": ("webp", {"quality": 80, "method": 4}),
+    "jpeg": ("jpg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+def caminho_miniatura(nome, largura, formato="webp"):
+    """
+    produtos/foto.png -> miniaturas/produtos/foto-png-400.webp
+
+    A extensão original entra no nome porque foto.png e foto.jpg podem
+    coexistir na mesma pasta.
+    """
+    raiz, original = posixpath.splitext(nome)
+    extensao = FORMATOS[formato][0]
+    return f"{PASTA}/{raiz}-{original.lstrip('.').lower()}-{largura}.{extensao}"
+
+
+def _largura_do_arquivo(caminho):
+    # Image.open só lê o cabeçalho
+    with default_storage.open(caminho, "rb") as arquivo:
+        return Image.open(arquivo).width
+
+
+def gerar_miniaturas(nome, forcar=False):
+    """
+    Gera todas as larguras e formatos de uma imagem do storage.
+
+    Nunca amplia: se a original for menor que a largura pedida, a versão
+    fica no tamanho original. Retorna quantos arquivos foram escritos e a
+    largura real de cada versão ({"400": 320}), que vai para
+    Produto.miniaturas.
+    """
+    larguras = {}
+    pendentes = []
+    for largura in LARGURAS:
+        faltando = [
+            formato for formato in FORMATOS
+            if forcar or not default_storage.exists(caminho_miniatura(nome, largura, formato))
+        ]
+        if faltando:
+            pendentes += [(largura, formato) for formato in faltando]
+        else:
+            larguras[str(largura)] = _largura_do_arquivo(caminho_miniatura(nome, largura, "jpeg"))
+    if not pendentes:
+        return 0, larguras
+
+    with default_storage.open(nome, "rb") as arquivo:
+        original = ImageOps.exif_transpose(Image.open(arquivo))
+        original.load()
+
+    if original.mode not in ("RGB", "RGBA"):
+        transparente = "A" in original.getbands() or "transparency" in original.info
+        original = original.convert("RGBA" if transparente else "RGB")
+
+    for largura, formato in pendentes:
+        imagem = original.copy()
+        if imagem.width > largura:
+            altura = round(imagem.height * largura / imagem.width)
+            imagem = imagem.resize((largura, altura), Image.LANCZOS)
+        if formato == "jpeg" and imagem.mode != "RGB":
+            # JPEG não tem transparência: aplica sobre fundo branco
+            fundo = Image.new("RGB", imagem.size, (255, 255, 255))
+            fundo.paste(imagem, mask=imagem.getchannel("A"))
+            imagem = fundo
+
+        buffer = BytesIO()
+        imagem.save(buffer, format=formato.upper(), **FORMATOS[formato][1])
+
+        destino = caminho_miniatura(nome, largura, formato)
+        if default_storage.exists(destino):
+            default_storage.delete(destino)
+        default_storage.save(destino, ContentFile(buffer.getvalue()))
+        larguras[str(largura)] = imagem.width
+
+    return len(pendentes), larguras
+
+
+def gerar_miniaturas_do_produto(produto):
+    """
+    Regera as miniaturas da imagem do produto e guarda as larguras nele.
+
+    Se o Pillow não conseguir ler a imagem, o produto fica sem miniaturas
+    e as páginas servem a original.
+    """
+    try:
+        _, produto.miniaturas = gerar_miniaturas(produto.imagem.name, forcar=True)
+    except OSError as erro:  # inclui UnidentifiedImageError
+        logger.warning("Miniaturas de %s não geradas: %s", produto.imagem.name, erro)
+        produto.miniaturas = {}
+    produto.save(update_fields=["miniaturas", "data_atualizacao"])
+
+
+def larguras_geradas(imagem):
+    """
+    {largura pedida: largura real} das miniaturas da imagem, em ordem
+    """
+    registradas = getattr(imagem.instance, "miniaturas", None) or {}
+    return {
+        largura: registradas[str(largura)]
+        for largura in LARGURAS
+        if str(largura) in registradas
+    }
+
+
+def largura_adequada(largura):
+    """
+    Menor largura gerada que cobre a largura pedida
+    """
+    for disponivel in LARGURAS:
+        if disponivel >= largura:
+            return disponivel
+    return LARGURAS[-1]
+
+
+def miniatura_url(imagem, largura, formato="jpeg"):
+    """
+    URL da miniatura, ou da original se ela ainda não foi gerada
+    """
+    if not imagem:
+        return ""
+    escolhida = largura_adequada(largura)
+    if escolhida in larguras_geradas(imagem):
+        return default_storage.url(caminho_miniatura(imagem.name, escolhida, formato))
+    return imagem.url
+
+
+def srcset(imagem, formato):
+    """
+    Candidatos com a largura real de cada arquivo; versões que ficaram do
+    mesmo tamanho (original pequena) entram uma vez só
+    """
+    candidatos = {}
+    for largura, real in larguras_geradas(imagem).items():
+        candidatos.setdefault(real, caminho_miniatura(imagem.name, largura, formato))
+    return ", ".join(
+        f"{default_storage.url(caminho)} {real}w" for real, caminho in candidatos.items()
+    )
@@ -0,0 +1,258 @@
+"""
+Importação e exportação do catálogo em CSV ou JSONL.
+
+Usado por `manage.py importar_produtos` e `exportar_produtos`. Os dois
+lados trabalham em lotes: nem o arquivo nem o catálogo inteiro ficam na
+memória. O SKU identifica o produto; linha com SKU que já existe atualiza
+o produto (menos imagem e data de cadastro), SKU novo cria. Produtos sem
+SKU (cadastrados pelo painel) ficam fora da exportação: não teriam como
+voltar pela importação.
+"""
+
+import csv
+import json
+import time
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Q
+
+from . import contadores
+from .busca import obter_backend
+from .fragmentos import invalidar_produtos
+from .models import Categoria, Produto
+from .transacoes import transacao_de_escrita
+
+CAMPOS = [
+    "sku", "nome", "categoria", "preco", "estoque",
+    "descricao", "especificacoes", "destaque", "ativo",
+]
+
+# Regravados quando o SKU já existe
+ATUALIZADOS = [
+    "nome", "categoria", "preco", "estoque", "descricao",
+    "especificacoes", "destaque", "ativo", "data_atualizacao",
+]
+
+VERDADEIROS = {"1", "true", "sim", "s", "yes", "y"}
+FALSOS = {"0", "false", "nao", "não", "n", "no"}
+
+
+class LinhaInvalida(ValueError):
+    pass
+
+
+def formato_do_arquivo(nome):
+    return "jsonl" if nome.endswith((".jsonl", ".ndjson")) else "csv"
+
+
+def ler_linhas(arquivo, formato):
+    """
+    Um dicionário por registro do arquivo já aberto
+    """
+    if formato == "csv":
+        yield from csv.DictReader(arquivo)
+        return
+    for texto in arquivo:
+        if not texto.strip():
+            continue
+        try:
+            yield json.loads(texto)
+        except ValueError as erro:
+            # Não para a importação; vira erro do registro em converter()
+            yield LinhaInvalida(f"JSON inválido: {erro}")
+
+
+class MapaDeCategorias:
+    """
+    Nome da categoria -> id, carregado uma vez, sem diferenciar maiúsculas
+    """
+
+    def __init__(self, criar=False):
+        self.criar = criar
+        self.criadas = 0
+        # Do primário: a réplica pode não ter as categorias recém-criadas
+        self.ids = {}
+        for nome, pk in Categoria.objects.using(DEFAULT_DB_ALIAS).order_by("id").values_list("nome", "id"):
+            self.ids.setdefault(nome.casefold(), pk)
+
+    def id(self, nome):
+        chave = nome.casefold()
+        if chave not in self.ids:
+            if not self.criar:
+                raise LinhaInvalida(f"categoria desconhecida: {nome!r}")
+            self.ids[chave] = Categoria.objects.create(nome=nome).pk
+            self.criadas += 1
+        return self.ids[chave]
+
+
+def _texto(dados, campo):
+    valor = dados.get(campo)
+    return "" if valor is None else str(valor).strip()
+
+
+def _booleano(dados, campo, padrao):
+    valor = dados.get(campo)
+    if isinstance(valor, bool):
+        return valor
+    texto = _texto(dados, campo).casefold()
+    if not texto:
+        return padrao
+    if texto in VERDADEIROS:
+        return True
+    if texto in FALSOS:
+        return False
+    raise LinhaInvalida(f"{campo} inválido: {valor!r}")
+
+
+def converter(dados, categorias):
+    """
+    Valida um registro e monta o Produto (ainda não salvo)
+    """
+    if isinstance(dados, LinhaInvalida):
+        raise dados
+
+    sku, nome, categoria = (_texto(dados, campo) for campo in ("sku", "nome", "categoria"))
+    faltando = [campo for campo, valor in (("sku", sku), ("nome", nome), ("categoria", categoria)) if not valor]
+    if faltando:
+        raise LinhaInvalida(f"campos obrigatórios vazios: {', '.join(faltando)}")
+    for campo, valor in (("sku", sku), ("nome", nome)):
+        limite = Produto._meta.get_field(campo).max_length
+        if len(valor) > limite:
+            raise LinhaInvalida(f"{campo} com mais de {limite} caracteres")
+
+    texto_preco = _texto(dados, "preco")
+    if "," in texto_preco and "." not in texto_preco:
+        texto_preco = texto_preco.replace(",", ".")
+    try:
+        preco = Decimal(texto_preco).quantize(Decimal("0.01"))
+    except InvalidOperation:
+        raise LinhaInvalida(f"preço inválido: {dados.get('preco')!r}")
+    campo = Produto._meta.get_field("preco")
+    teto = 10 ** (campo.max_digits - campo.decimal_places)
+    if not preco.is_finite() or not 0 <= preco < teto:
+        raise LinhaInvalida(f"preço inválido: {dados.get('preco')!r}")
+
+    try:
+        estoque = int(_texto(dados, "estoque") or 0)
+    except ValueError:
+        raise LinhaInvalida(f"estoque inválido: {dados.get('estoque')!r}")
+    if estoque < 0:
+        raise LinhaInvalida(f"estoque negativo: {dados.get('estoque')!r}")
+
+    return Produto(
+        sku=sku,
+        nome=nome,
+        categoria_id=categorias.id(categoria),
+        preco=preco,
+        estoque=estoque,
+        descricao=_texto(dados, "descricao"),
+        especificacoes=_texto(dados, "especificacoes"),
+        destaque=_booleano(dados, "destaque", False),
+        ativo=_booleano(dados, "ativo", True),
+    )
+
+
+def _gravar(produtos):
+    """
+    Upsert de um lote; devolve as categorias que tinham esses SKUs antes
+    """
+    with transacao_de_escrita():
+        anteriores = dict(
+            Produto.objects.filter(sku__in=[p.sku for p in produtos])
+            .values_list("sku", "categoria_id")
+        )
+        Produto.objects.bulk_create(
+            produtos,
+            update_conflicts=True,
+            unique_fields=["sku"],
+            update_fields=ATUALIZADOS,
+        )
+        # bulk_create não dispara os sinais que mantêm a busca e os contadores
+        obter_backend().indexar_varios(produtos)
+        contadores.reconciliar({p.categoria_id for p in produtos} | set(anteriores.values()))
+    return anteriores
+
+
+def importar(linhas, lote=1000, criar_categorias=False, ao_errar=None, progresso=None):
+    """
+    Grava os registros de `linhas` em lotes de `lote`.
+
+    Registros inválidos são pulados e passados para ao_errar(numero,
+    mensagem); progresso(resultado) é chamado depois de cada lote.
+    """
+    categorias = MapaDeCategorias(criar_categorias)
+    resultado = {"linhas": 0, "criados": 0, "atualizados": 0, "erros": 0, "categorias_criadas": 0}
+    tocadas = set()
+    inicio = time.perf_counter()
+
+    numeradas = enumerate(linhas, start=1)
+    while bloco := list(islice(numeradas, lote)):
+        produtos = {}
+        for numero, dados in bloco:
+            try:
+                produto = converter(dados, categorias)
+            except LinhaInvalida as erro:
+                resultado["erros"] += 1
+                if ao_errar:
+                    ao_errar(numero, str(erro))
+                continue
+            # SKU repetido no mesmo lote: vale o último
+            produtos[produto.sku] = produto
+
+        if produtos:
+            anteriores = _gravar(list(produtos.values()))
+            resultado["atualizados"] += len(anteriores)
+            resultado["criados"] += len(produtos) - len(anteriores)
+            tocadas.update(anteriores.values())
+            tocadas.update(p.categoria_id for p in produtos.values())
+
+        resultado["linhas"] += len(bloco)
+        resultado["categorias_criadas"] = categorias.criadas
+        resultado["segundos"] = time.perf_counter() - inicio
+        if progresso:
+            progresso(resultado)
+
+    resultado["segundos"] = time.perf_counter() - inicio
+    if tocadas:
+        invalidar_produtos(*tocadas)
+    return resultado
+
+
+def sem_sku():
+    return Produto.objects.filter(Q(sku__isnull=True) | Q(sku=""))
+
+
+def exportar(arquivo, formato, lote=2000, progresso=None):
+    """
+    Escreve o catálogo em `arquivo`, lendo `lote` produtos por vez.
+
+    progresso(total) é chamado a cada lote; devolve o total de produtos.
+    Os produtos de sem_sku() ficam de fora.
+    """
+    colunas = [campo if campo != "categoria" else "categoria__nome" for campo in CAMPOS]
+    linhas = (
+        Produto.objects.exclude(pk__in=sem_sku()).order_by("id")
+        .values_list(*colunas).iterator(chunk_size=lote)
+    )
+
+    if formato == "csv":
+        escritor = csv.writer(arquivo)
+        escritor.writerow(CAMPOS)
+
+    total = 0
+    for linha in linhas:
+        registro = dict(zip(CAMPOS, linha))
+        registro["preco"] = str(registro["preco"])
+        if formato == "csv":
+            registro["destaque"] = int(registro["destaque"])
+            registro["ativo"] = int(registro["ativo"])
+            escritor.writerow(registro.values())
+        else:
+            arquivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+        total += 1
+        if progresso and total % lote == 0:
+            progresso(total)
+    return total
@@ -0,0 +1,234 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from loja import dados_sinteticos
+from loja.management.commands.benchmark_rotas import percentil
+
+# modo -> (servidor, views assíncronas)
+MODOS = {
+    "wsgi": ("wsgi", False),
+    "asgi-sync": ("asgi", False),
+    "asgi": ("asgi", True),
+}
+
+
+def caminhos_da_vitrine(ids):
+    return [
+        "/",
+        "/produtos/",
+        f"/produtos/?categoria={ids['categoria_id']}",
+        f"/produto/{ids['produto_id']}/",
+        "/carrinho/",
+    ]
+
+
+def carga_wsgi(caminhos, clientes, requisicoes, threads, lentidao):
+    """
+    `clientes` threads fazendo requisições em sequência contra um servidor
+    com `threads` workers. O cliente lento segura o worker enquanto lê.
+    """
+    from django.core.wsgi import get_wsgi_application
+
+    aplicacao = get_wsgi_application()
+    workers = threading.Semaphore(threads)
+
+    def cliente(indice):
+        resultados = []
+        for numero in range(requisicoes):
+            caminho, _, query = caminhos[(indice + numero) % len(caminhos)].partition("?")
+            environ = {"PATH_INFO": caminho, "QUERY_STRING": query}
+            setup_testing_defaults(environ)
+            status = []
+
+            inicio = time.perf_counter()
+            with workers:
+                corpo = aplicacao(environ, lambda s, h, exc_info=None: status.append(s))
+                try:
+                    for _ in corpo:
+                        time.sleep(lentidao)
+                finally:
+                    corpo.close()
+            resultados.append((time.perf_counter() - inicio, status[0].startswith("200")))
+        return resultados
+
+    with ThreadPoolExecutor(max_workers=clientes) as executor:
+        return [r for lote in executor.map(cliente, range(clientes)) for r in lote]
+
+
+def carga_asgi(caminhos, clientes, requisicoes, lentidao):
+    """
+    `clientes` tarefas no mesmo loop. O cliente lento só atrasa o próprio
+    send; nenhuma thread fica presa esperando por ele.
+    """
+    from django.core.asgi import get_asgi_application
+
+    aplicacao = get_asgi_application()
+
+    async def requisitar(url):
+        caminho, _, query = url.partition("?")
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": caminho,
+            "raw_path": caminho.encode(),
+            "query_string": query.encode(),
+            "headers": [(b"host", b"127.0.0.1")],
+            "server": ("127.0.0.1", 80),
+            "client": ("127.0.0.1", 50000),
+        }
+        concluido = asyncio.Event()
+        pedido_enviado = False
+        status = []
+
+        async def receive():
+            nonlocal pedido_enviado
+            if not pedido_enviado:
+                pedido_enviado = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            # Só desconecta quando a resposta terminou
+            await concluido.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(mensagem):
+            if mensagem["type"] == "http.response.start":
+                status.append(mensagem["status"])
+            elif mensagem["type"] == "http.response.body":
+                await asyncio.sleep(lentidao)
+                if not mensagem.get("more_body"):
+                    concluido.set()
+
+        await aplicacao(scope, receive, send)
+        return status[0] == 200
+
+    async def cliente(indice):
+        resultados = []
+        for numero in range(requisicoes):
+            inicio = time.perf_counter()
+            ok = await requisitar(caminhos[(indice + numero) % len(caminhos)])
+            resultados.append((time.perf_counter() - inicio, ok))
+        return resultados
+
+    async def todos():
+        lotes = await asyncio.gather(*(cliente(indice) for indice in range(clientes)))
+        return [r for lote in lotes for r in lote]
+
+    return asyncio.run(todos())
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara a vazão das páginas da vitrine servidas por WSGI (views "
+        "síncronas) e por ASGI (views síncronas e assíncronas) com muitos "
+        "clientes lentos simultâneos, num banco de teste com catálogo sintético."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--produtos", type=int, default=2000)
+        parser.add_argument("--clientes", type=int, default=100,
+                            help="Clientes simultâneos")
+        parser.add_argument("--requisicoes", type=int, default=10,
+                            help="Requisições em sequência por cliente")
+        parser.add_argument("--threads", type=int, default=8,
+                            help="Workers do servidor WSGI")
+        parser.add_argument("--lentidao", type=float, default=0.05,
+                            help="Segundos que o cliente leva para ler cada bloco da resposta")
+        parser.add_argument("--modos", nargs="+", choices=sorted(MODOS), default=list(MODOS))
+        # Uso interno: cada modo roda num processo próprio, com as URLs dele
+        parser.add_argument("--modo", choices=sorted(MODOS), help="(interno)")
+        parser.add_argument("--banco", help="(interno)")
+        parser.add_argument("--caminhos", help="(interno)")
+
+    def handle(self, *args, **options):
+        if options["modo"]:
+            self.rodar_modo(options)
+            return
+
+        if connection.vendor != "sqlite":
+            raise CommandError("O benchmark cria um banco SQLite temporário.")
+
+        banco = str(Path(tempfile.mkdtemp(prefix="benchmark-asgi-")) / "db.sqlite3")
+        with dados_sinteticos.banco_de_teste(banco):
+            ids = dados_sinteticos.semear(produtos=options["produtos"])
+            connection.close()
+
+            resultados = {}
+            for modo in options["modos"]:
+                self.stdout.write(f"rodando {modo}...")
+                resultados[modo] = self.processo_do_modo(modo, banco, caminhos_da_vitrine(ids), options)
+
+        self.stdout.write(
+            f"{options['clientes']} clientes x {options['requisicoes']} requisições, "
+            f"{options['lentidao'] * 1000:.0f}ms de leitura por bloco, "
+            f"{options['threads']} workers WSGI"
+        )
+        self.stdout.write(f"{'modo':<10} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'erros':>6}")
+        for modo, linha in resultados.items():
+            self.stdout.write(
+                f"{modo:<10} {linha['req_s']:>8.1f} {linha['p50_ms']:>8.1f} "
+                f"{linha['p95_ms']:>8.1f} {linha['erros']:>6}"
+            )
+
+    def processo_do_modo(self, modo, banco, caminhos, options):
+        _, assincronas = MODOS[modo]
+        ambiente = dict(os.environ, LOJA_VIEWS_ASSINCRONAS="1" if assincronas else "0")
+        # Tudo lê e grava no banco do benchmark, sem réplica
+        ambiente.pop("LOJA_REPLICA", None)
+        comando = [
+            sys.executable, str(Path(settings.BASE_DIR) / "manage.py"), "benchmark_asgi",
+            "--modo", modo, "--banco", banco, "--caminhos", json.dumps(caminhos),
+            "--clientes", str(options["clientes"]),
+            "--requisicoes", str(options["requisicoes"]),
+            "--threads", str(options["threads"]),
+            "--lentidao", str(options["lentidao"]),
+            "--skip-checks",
+        ]
+        saida = subprocess.run(comando, env=ambiente, capture_output=True, text=True)
+        if saida.returncode != 0:
+            raise CommandError(f"O modo {modo} falhou:\n{saida.stderr}")
+        return json.loads(saida.stdout.strip().splitlines()[-1])
+
+    def rodar_modo(self, options):
+        # O banco de teste já está populado; só aponta a conexão para ele
+        settings.DATABASES["default"]["NAME"] = options["banco"]
+        connection.settings_dict["NAME"] = options["banco"]
+
+        servidor, _ = MODOS[options["modo"]]
+        caminhos = json.loads(options["caminhos"])
+        argumentos = (caminhos, options["clientes"], options["requisicoes"])
+
+        # Aquece caches de template e de fragmentos antes de medir
+        if servidor == "wsgi":
+            carga_wsgi(caminhos, 1, len(caminhos), 1, 0)
+        else:
+            carga_asgi(caminhos, 1, len(caminhos), 0)
+
+        inicio = time.perf_counter()
+        if servidor == "wsgi":
+            resultados = carga_wsgi(*argumentos, options["threads"], options["lentidao"])
+        else:
+            resultados = carga_asgi(*argumentos, options["lentidao"])
+        duracao = time.perf_counter() - inicio
+
+        latencias = [segundos * 1000 for segundos, _ in resultados]
+        self.stdout.write(json.dumps({
+            "req_s": len(resultados) / duracao,
+            "p50_ms": percentil(latencias, 50),
+            "p95_ms": percentil(latencias, 95),
+            "erros": sum(1 for _, ok in resultados if not ok),
+        }))
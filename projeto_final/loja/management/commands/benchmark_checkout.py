@@ -0,0 +1,112 @@
+import random
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+
+from loja import dados_sinteticos
+from loja.models import Categoria, Cliente, Pedido, Produto
+from loja.pedidos import EstoqueInsuficiente, finalizar_pedido
+
+PREFIXO = "bench-checkout"
+
+
+class Command(BaseCommand):
+    help = (
+        "Dispara compradores em paralelo contra um produto de estoque limitado "
+        "e verifica que nada foi vendido além do estoque, num banco SQLite "
+        "temporário (o banco configurado não é tocado)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--compradores", type=int, default=50)
+        parser.add_argument("--estoque", type=int, default=20)
+        parser.add_argument("--quantidade", type=int, default=1,
+                            help="Unidades compradas por cada comprador")
+        parser.add_argument("--tentativas", type=int, default=20,
+                            help="Novas tentativas quando o banco está travado")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("O benchmark cria um banco SQLite temporário.")
+
+        # Em arquivo, não em memória: as threads disputam o travamento do
+        # banco como os processos do servidor
+        pasta = Path(tempfile.mkdtemp(prefix="benchmark-checkout-"))
+        try:
+            with dados_sinteticos.banco_de_teste(pasta / "db.sqlite3"):
+                self.disparar(options)
+        finally:
+            shutil.rmtree(pasta, ignore_errors=True)
+
+    def disparar(self, options):
+        compradores = options["compradores"]
+        estoque = options["estoque"]
+        quantidade = options["quantidade"]
+        tentativas = options["tentativas"]
+
+        categoria = Categoria.objects.create(nome=PREFIXO)
+        produto = Produto.objects.create(
+            nome=PREFIXO, categoria=categoria, descricao="", preco=10, estoque=estoque
+        )
+        clientes = [
+            Cliente.objects.create(
+                usuario=User.objects.create(username=f"{PREFIXO}-{i}"),
+                cpf=f"bench-{i:08d}",
+            )
+            for i in range(compradores)
+        ]
+
+        largada = threading.Barrier(compradores)
+        carrinho = [{"id": produto.id, "quantidade": quantidade}]
+
+        def comprar(cliente):
+            largada.wait()
+            try:
+                for tentativa in range(tentativas + 1):
+                    try:
+                        finalizar_pedido(cliente, carrinho)
+                        return "vendido", tentativa
+                    except EstoqueInsuficiente:
+                        return "sem_estoque", tentativa
+                    except OperationalError:
+                        # "database is locked": espera um pouco e tenta de novo
+                        time.sleep(random.uniform(0.005, 0.05))
+                return "erro_banco", tentativas
+            finally:
+                connection.close()
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=compradores) as executor:
+            respostas = list(executor.map(comprar, clientes))
+        duracao = time.perf_counter() - inicio
+
+        produto.refresh_from_db()
+        pedidos = Pedido.objects.filter(cliente__in=clientes).count()
+        resultados = [resultado for resultado, _ in respostas]
+        repeticoes = sum(tentativa for _, tentativa in respostas)
+        vendidos = resultados.count("vendido")
+
+        self.stdout.write(f"compradores: {compradores} x {quantidade} un")
+        self.stdout.write(f"estoque inicial: {estoque}, final: {produto.estoque}")
+        self.stdout.write(
+            f"vendidos: {vendidos}, sem estoque: {resultados.count('sem_estoque')}, "
+            f"erros de banco: {resultados.count('erro_banco')}"
+        )
+        self.stdout.write(f"novas tentativas por banco travado: {repeticoes}")
+        self.stdout.write(f"tempo: {duracao:.3f}s ({compradores / duracao:.1f} checkouts/s)")
+
+        vendido_total = vendidos * quantidade
+        if (
+            produto.estoque < 0
+            or pedidos != vendidos
+            or produto.estoque != estoque - vendido_total
+        ):
+            raise CommandError("Venda além do estoque ou baixa inconsistente!")
+        self.stdout.write(self.style.SUCCESS("Nenhuma venda além do estoque."))
@@ -0,0 +1,168 @@
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+
+from loja import consultas, dados_sinteticos
+from loja.management.commands.benchmark_rotas import percentil
+from loja.models import Cliente, Produto
+from loja.paginacao import paginar_por_cursor
+from loja.pedidos import finalizar_pedido
+
+# perfil -> variáveis de ambiente do processo que roda o perfil
+PERFIS = {
+    "padrao": {"LOJA_BANCO": "padrao", "LOJA_CHECKOUT_IMEDIATO": "0"},
+    "imediato": {"LOJA_BANCO": "padrao", "LOJA_CHECKOUT_IMEDIATO": "1"},
+    "producao": {"LOJA_BANCO": "producao", "LOJA_CHECKOUT_IMEDIATO": "1"},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Disputa de escrita: compradores fecham pedidos em paralelo enquanto "
+        "leitores navegam no catálogo, em cada perfil de banco (journal "
+        "padrão com BEGIN DEFERRED, com BEGIN IMMEDIATE, e o perfil de "
+        "produção com WAL). Usa cópias de um banco SQLite temporário."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--compradores", type=int, default=16)
+        parser.add_argument("--pedidos", type=int, default=25,
+                            help="Checkouts por comprador")
+        parser.add_argument("--leitores", type=int, default=4,
+                            help="Threads lendo o catálogo durante os checkouts")
+        parser.add_argument("--perfis", nargs="+", choices=list(PERFIS), default=list(PERFIS))
+        # Uso interno: cada perfil roda num processo com as settings dele
+        parser.add_argument("--banco", help="(interno)")
+
+    def handle(self, *args, **options):
+        if options["banco"]:
+            self.rodar_perfil(options)
+            return
+
+        if connection.vendor != "sqlite":
+            raise CommandError("O benchmark compara perfis do SQLite.")
+
+        pasta = Path(tempfile.mkdtemp(prefix="benchmark-escrita-"))
+        semente = pasta / "semente.sqlite3"
+        try:
+            with dados_sinteticos.banco_de_teste(semente):
+                dados_sinteticos.semear(produtos=200, clientes=options["compradores"], pedidos=0)
+                Produto.objects.update(ativo=True, estoque=10**6)
+                connection.close()
+
+                resultados = {}
+                for perfil in options["perfis"]:
+                    # Cada perfil parte de uma cópia idêntica do banco
+                    banco = pasta / f"{perfil}.sqlite3"
+                    shutil.copy(semente, banco)
+                    self.stdout.write(f"rodando {perfil}...")
+                    resultados[perfil] = self.processo_do_perfil(perfil, banco, options)
+        finally:
+            shutil.rmtree(pasta, ignore_errors=True)
+
+        self.stdout.write(
+            f"{options['compradores']} compradores x {options['pedidos']} checkouts, "
+            f"{options['leitores']} leitores"
+        )
+        self.stdout.write(
+            f"{'perfil':<10} {'checkout/s':>10} {'p95 ms':>8} {'travados':>9} {'leituras/s':>11}"
+        )
+        for perfil, linha in resultados.items():
+            self.stdout.write(
+                f"{perfil:<10} {linha['checkouts_s']:>10.1f} {linha['p95_ms']:>8.1f} "
+                f"{linha['travados']:>9} {linha['leituras_s']:>11.1f}"
+            )
+
+    def processo_do_perfil(self, perfil, banco, options):
+        comando = [
+            sys.executable, str(Path(settings.BASE_DIR) / "manage.py"), "benchmark_escrita",
+            "--banco", str(banco),
+            "--compradores", str(options["compradores"]),
+            "--pedidos", str(options["pedidos"]),
+            "--leitores", str(options["leitores"]),
+            "--skip-checks",
+        ]
+        ambiente = dict(os.environ, **PERFIS[perfil])
+        # Tudo lê e grava no banco do benchmark, sem réplica
+        ambiente.pop("LOJA_REPLICA", None)
+        saida = subprocess.run(comando, env=ambiente, capture_output=True, text=True)
+        if saida.returncode != 0:
+            raise CommandError(f"O perfil {perfil} falhou:\n{saida.stderr}")
+        return json.loads(saida.stdout.strip().splitlines()[-1])
+
+    def rodar_perfil(self, options):
+        settings.DATABASES["default"]["NAME"] = options["banco"]
+        connection.settings_dict["NAME"] = options["banco"]
+        if "WAL" not in connection.settings_dict["OPTIONS"].get("init_command", ""):
+            # journal_mode fica gravado no arquivo; garante o modo do perfil
+            with connection.cursor() as cursor:
+                cursor.execute("PRAGMA journal_mode=DELETE")
+
+        clientes = list(Cliente.objects.order_by("id")[: options["compradores"]])
+        produto_ids = list(Produto.objects.values_list("id", flat=True))
+        connection.close()
+
+        largada = threading.Barrier(len(clientes) + options["leitores"])
+        terminou = threading.Event()
+
+        def comprar(cliente):
+            rng = random.Random(cliente.id)
+            latencias, travados = [], 0
+            largada.wait()
+            try:
+                for _ in range(options["pedidos"]):
+                    carrinho = [
+                        {"id": pk, "quantidade": 1} for pk in rng.sample(produto_ids, 3)
+                    ]
+                    inicio = time.perf_counter()
+                    try:
+                        finalizar_pedido(cliente, carrinho)
+                        latencias.append(time.perf_counter() - inicio)
+                    except OperationalError:
+                        # "database is locked": o cliente veria um erro 500
+                        travados += 1
+                return latencias, travados
+            finally:
+                connection.close()
+
+        def ler():
+            leituras = 0
+            largada.wait()
+            try:
+                while not terminou.is_set():
+                    try:
+                        paginar_por_cursor(consultas.catalogo(), None, 24)
+                        leituras += 1
+                    except OperationalError:
+                        pass
+                return leituras
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=len(clientes) + options["leitores"]) as executor:
+            leitores = [executor.submit(ler) for _ in range(options["leitores"])]
+            inicio = time.perf_counter()
+            compras = list(executor.map(comprar, clientes))
+            duracao = time.perf_counter() - inicio
+            terminou.set()
+            leituras = sum(futuro.result() for futuro in leitores)
+
+        latencias = [segundos * 1000 for lote, _ in compras for segundos in lote]
+        self.stdout.write(json.dumps({
+            "checkouts_s": len(latencias) / duracao,
+            "p95_ms": percentil(latencias, 95) if latencias else 0,
+            "travados": sum(travados for _, travados in compras),
+            "leituras_s": leituras / duracao,
+        }))
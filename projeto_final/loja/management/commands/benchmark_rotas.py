@@ -0,0 +1,287 @@
+import json
+import math
+import time
+from collections import namedtuple
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from loja import dados_sinteticos, urls
+from loja.models import Categoria, Produto
+
+BASELINE_PADRAO = Path(settings.BASE_DIR) / "benchmarks" / "rotas.json"
+
+# Mudam o número de consultas; com --latencia, todos os parâmetros contam
+PARAMETROS_DO_CATALOGO = ("categorias", "produtos", "clientes", "pedidos")
+
+# usuario: None (anônimo), "cliente" ou "staff"
+# argumentos(ids) roda fora da medição, antes de cada requisição, e devolve
+# os kwargs da URL; as rotas de exclusão criam ali o objeto que vão apagar.
+# descartavel: sessão nova a cada requisição (para o logout)
+# cache_frio: limpa o cache antes de cada requisição, fora da medição; mede
+# a renderização inteira que o cache de página e os fragmentos escondem
+Cenario = namedtuple(
+    "Cenario",
+    ["nome", "rota", "usuario", "argumentos", "metodo", "query", "descartavel", "cache_frio"],
+    defaults=(None, lambda ids: {}, "get", "", False, False),
+)
+
+
+def _categoria_descartavel(ids):
+    return {"categoria_id": Categoria.objects.create(nome="descartável").id}
+
+
+def _produto_descartavel(ids):
+    produto = Produto.objects.create(
+        nome="descartável", categoria_id=ids["categoria_id"], descricao="", preco=1
+    )
+    return {"produto_id": produto.id}
+
+
+def cenarios():
+    produto = lambda ids: {"produto_id": ids["produto_id"]}  # noqa: E731
+    categoria = lambda ids: {"categoria_id": ids["categoria_id"]}  # noqa: E731
+    return [
+        Cenario("home", "home"),
+        Cenario("produtos", "produtos"),
+        Cenario("produtos (categoria)", "produtos", query="categoria={categoria_id}"),
+        Cenario("produtos (busca)", "produtos", query="busca=galaxy pro"),
+        Cenario("produto_detalhe", "produto_detalhe", argumentos=produto),
+        Cenario("home (cache frio)", "home", cache_frio=True),
+        Cenario("produtos (cache frio)", "produtos", cache_frio=True),
+        Cenario("produtos (busca, frio)", "produtos", query="busca=galaxy pro", cache_frio=True),
+        Cenario("produto_detalhe (cache frio)", "produto_detalhe", argumentos=produto, cache_frio=True),
+        Cenario("home (cliente)", "home", "cliente"),
+        Cenario("produtos (cliente)", "produtos", "cliente"),
+        Cenario("produto_detalhe (cliente)", "produto_detalhe", "cliente", produto),
+        Cenario("sobre", "sobre"),
+        Cenario("contato", "contato"),
+        Cenario("cadastro", "cadastro"),
+        Cenario("login", "login"),
+        Cenario("logout", "logout", "cliente", descartavel=True),
+        Cenario("perfil", "perfil", "cliente"),
+        Cenario("adicionar_carrinho", "adicionar_carrinho", "cliente", produto),
+        Cenario("carrinho", "carrinho", "cliente"),
+        Cenario("diminuir_carrinho", "diminuir_carrinho", "cliente", produto),
+        Cenario("remover_carrinho", "remover_carrinho", "cliente", produto),
+        Cenario("historico_compras", "historico_compras", "cliente"),
+        Cenario("checkout", "checkout", "cliente"),
+        Cenario("checkout_sucesso", "checkout_sucesso", "cliente",
+                lambda ids: {"pedido_id": ids["pedido_id"]}),
+        Cenario("password_change", "password_change", "cliente"),
+        Cenario("painel_admin", "painel_admin", "staff"),
+        Cenario("admin_vendas", "admin_vendas", "staff"),
+        Cenario("admin_vendas_csv", "admin_vendas_csv", "staff"),
+        Cenario("admin_vendas_csv (filtros)", "admin_vendas_csv", "staff",
+                query="de=2000-01-01&ate=2100-12-31&status=confirmado"),
+        Cenario("admin_produtos", "admin_produtos", "staff"),
+        Cenario("admin_criar_produto", "admin_criar_produto", "staff"),
+        Cenario("admin_editar_produto", "admin_editar_produto", "staff", produto),
+        Cenario("admin_deletar_produto", "admin_deletar_produto", "staff", _produto_descartavel),
+        Cenario("admin_categorias", "admin_categorias", "staff"),
+        Cenario("admin_criar_categoria", "admin_criar_categoria", "staff"),
+        Cenario("admin_editar_categoria", "admin_editar_categoria", "staff", categoria),
+        Cenario("admin_deletar_categoria", "admin_deletar_categoria", "staff", _categoria_descartavel),
+        Cenario("api_produtos", "api_produtos"),
+        Cenario("api_produtos (categoria)", "api_produtos", query="categoria={categoria_id}"),
+        Cenario("api_produtos (fields)", "api_produtos", query="fields=id,nome,preco"),
+        Cenario("api_produtos (ids)", "api_produtos", query="ids={produto_id},1,2,3"),
+        Cenario("api_categorias", "api_categorias"),
+    ]
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[max(0, math.ceil(len(ordenados) * p / 100) - 1)]
+
+
+def parametros(options):
+    return {
+        chave: options[chave]
+        for chave in (*PARAMETROS_DO_CATALOGO, "repeticoes", "aquecimento")
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede consultas SQL, latência (p50/p95) e tamanho da resposta de cada "
+        "rota de loja.urls num banco de teste com catálogo sintético, e "
+        "compara com o baseline gravado. O número de consultas é sempre "
+        "comparado; a latência só com --latencia, contra um baseline gravado "
+        "na mesma máquina."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--categorias", type=int, default=10)
+        parser.add_argument("--produtos", type=int, default=2000)
+        parser.add_argument("--clientes", type=int, default=50)
+        parser.add_argument("--pedidos", type=int, default=500)
+        parser.add_argument("--repeticoes", type=int, default=20)
+        parser.add_argument("--aquecimento", type=int, default=2,
+                            help="Requisições descartadas antes de medir (cache frio)")
+        parser.add_argument("--saida", help="Grava o resultado em JSON neste arquivo")
+        parser.add_argument("--baseline", default=str(BASELINE_PADRAO))
+        parser.add_argument("--salvar-baseline", action="store_true",
+                            help="Substitui o baseline pelo resultado desta execução")
+        parser.add_argument("--latencia", action="store_true",
+                            help="Também falha se o p95 piorar (baseline desta máquina)")
+        parser.add_argument("--tolerancia", type=float, default=0.5,
+                            help="Aumento de p95 aceito, em fração do baseline")
+        parser.add_argument("--folga-ms", type=float, default=5.0,
+                            help="Aumento de p95 ignorado, em ms, por ser ruído")
+
+    def handle(self, *args, **options):
+        faltando = {padrao.name for padrao in urls.urlpatterns} - {c.rota for c in cenarios()}
+        if faltando:
+            raise CommandError(f"Rotas sem cenário de benchmark: {', '.join(sorted(faltando))}")
+
+        # Compara com o baseline só se ele foi medido com os mesmos parâmetros
+        baseline = Path(options["baseline"])
+        anterior = None
+        if not options["salvar_baseline"] and baseline.exists():
+            anterior = json.loads(baseline.read_text(encoding="utf-8"))
+            diferentes = self.parametros_diferentes(
+                anterior["parametros"], parametros(options), options["latencia"]
+            )
+            if diferentes:
+                raise CommandError(
+                    f"Parâmetros diferentes dos de {baseline} ({', '.join(diferentes)}); "
+                    "rode com os mesmos valores ou grave outro baseline."
+                )
+
+        setup_test_environment()
+        try:
+            # Cache isolado: o benchmark não pode limpar o cache de produção
+            with dados_sinteticos.banco_de_teste(), override_settings(CACHES={"default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "benchmark-rotas",
+            }}):
+                resultado = self.medir(options)
+        finally:
+            teardown_test_environment()
+
+        texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+        if options["saida"]:
+            Path(options["saida"]).write_text(texto + "\n", encoding="utf-8")
+        self.imprimir(resultado["rotas"])
+
+        if options["salvar_baseline"]:
+            baseline.parent.mkdir(parents=True, exist_ok=True)
+            baseline.write_text(texto + "\n", encoding="utf-8")
+            self.stdout.write(self.style.SUCCESS(f"Baseline gravado em {baseline}"))
+        elif anterior is not None:
+            regressoes = self.comparar(anterior["rotas"], resultado["rotas"], options)
+            if regressoes:
+                for regressao in regressoes:
+                    self.stderr.write(f"  {regressao}")
+                raise CommandError(f"{len(regressoes)} regressão(ões) em relação a {baseline}")
+            self.stdout.write(self.style.SUCCESS(f"Sem regressões em relação a {baseline}"))
+
+    def medir(self, options):
+        cache.clear()
+        inicio = time.perf_counter()
+        ids = dados_sinteticos.semear(
+            categorias=options["categorias"],
+            produtos=options["produtos"],
+            clientes=options["clientes"],
+            pedidos=options["pedidos"],
+        )
+        semeadura = time.perf_counter() - inicio
+
+        usuarios = {
+            "cliente": User.objects.get(username="cliente0"),
+            "staff": User.objects.create(username="benchmark-staff", is_staff=True),
+        }
+        clientes = {None: Client()}
+        for tipo, usuario in usuarios.items():
+            clientes[tipo] = Client()
+            clientes[tipo].force_login(usuario)
+
+        rotas = {}
+        for cenario in cenarios():
+            latencias, consultas = [], []
+            for rodada in range(options["aquecimento"] + options["repeticoes"]):
+                cliente = clientes[cenario.usuario]
+                if cenario.descartavel:
+                    cliente = Client()
+                    cliente.force_login(usuarios[cenario.usuario])
+                url = reverse(cenario.rota, kwargs=cenario.argumentos(ids))
+                if cenario.query:
+                    url += "?" + cenario.query.format(**ids)
+
+                # O log de consultas tem limite; cheio, a contagem zera
+                connection.queries_log.clear()
+                if cenario.cache_frio:
+                    cache.clear()
+                with CaptureQueriesContext(connection) as capturadas:
+                    comeco = time.perf_counter()
+                    resposta = getattr(cliente, cenario.metodo)(url)
+                    # Respostas em streaming só consultam o banco ao serem lidas
+                    corpo = (
+                        b"".join(resposta.streaming_content) if resposta.streaming
+                        else resposta.content
+                    )
+                    duracao = time.perf_counter() - comeco
+
+                if rodada >= options["aquecimento"]:
+                    latencias.append(duracao * 1000)
+                    consultas.append(len(capturadas))
+
+            rotas[cenario.nome] = {
+                "status": resposta.status_code,
+                "consultas": max(consultas),
+                "p50_ms": round(percentil(latencias, 50), 2),
+                "p95_ms": round(percentil(latencias, 95), 2),
+                "bytes": len(corpo),
+            }
+
+        return {
+            "parametros": parametros(options),
+            "semeadura_s": round(semeadura, 2),
+            "rotas": rotas,
+        }
+
+    def imprimir(self, rotas):
+        self.stdout.write(f"{'rota':<28} {'status':>6} {'SQL':>4} {'p50 ms':>8} {'p95 ms':>8} {'bytes':>8}")
+        for nome, linha in rotas.items():
+            self.stdout.write(
+                f"{nome:<28} {linha['status']:>6} {linha['consultas']:>4} "
+                f"{linha['p50_ms']:>8.2f} {linha['p95_ms']:>8.2f} {linha['bytes']:>8}"
+            )
+
+    @staticmethod
+    def parametros_diferentes(anteriores, atuais, latencia):
+        chaves = atuais if latencia else PARAMETROS_DO_CATALOGO
+        return [
+            f"{chave}: {anteriores.get(chave)} -> {atuais[chave]}"
+            for chave in chaves
+            if anteriores.get(chave) != atuais[chave]
+        ]
+
+    def comparar(self, anteriores, atuais, options):
+        regressoes = []
+        for nome, atual in atuais.items():
+            anterior = anteriores.get(nome)
+            if anterior is None:
+                continue
+            if atual["status"] != anterior["status"]:
+                regressoes.append(f"{nome}: status {anterior['status']} -> {atual['status']}")
+            if atual["consultas"] > anterior["consultas"]:
+                regressoes.append(f"{nome}: consultas {anterior['consultas']} -> {atual['consultas']}")
+            # O p95 do baseline só vale na máquina em que foi gravado
+            if not options["latencia"]:
+                continue
+            limite = max(
+                anterior["p95_ms"] * (1 + options["tolerancia"]),
+                anterior["p95_ms"] + options["folga_ms"],
+            )
+            if atual["p95_ms"] > limite:
+                regressoes.append(f"{nome}: p95 {anterior['p95_ms']}ms -> {atual['p95_ms']}ms")
+        return regressoes
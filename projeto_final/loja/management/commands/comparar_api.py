@@ -0,0 +1,107 @@
+import gzip
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from loja import api, dados_sinteticos
+from loja.management.commands.benchmark_rotas import percentil
+from loja.models import Produto
+
+
+def pares(ids, lote):
+    """
+    (nome, URLs das páginas HTML, URLs da API) com os mesmos dados.
+    O lote é o que o app faz hoje: uma página de detalhe por produto
+    """
+    produtos = reverse("api_produtos")
+    todos = ",".join(api.CAMPOS_PRODUTO)
+    categoria = f"?categoria={ids['categoria_id']}"
+    return [
+        ("listagem", [reverse("produtos")], [produtos]),
+        ("listagem da categoria", [reverse("produtos") + categoria], [produtos + categoria]),
+        ("produto", [reverse("produto_detalhe", args=[ids["produto_id"]])],
+         [f"{produtos}?ids={ids['produto_id']}&fields={todos}"]),
+        (f"{len(lote)} produtos",
+         [reverse("produto_detalhe", args=[pk]) for pk in lote],
+         [f"{produtos}?ids={','.join(map(str, lote))}&fields={todos}"]),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara a API JSON (loja/api.py) com as páginas HTML que o app lê "
+        "hoje: bytes (com e sem gzip), consultas e latência p50/p95, sem e "
+        "com o cache de página, para um visitante anônimo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--produtos", type=int, default=2000)
+        parser.add_argument("--lote", type=int, default=20,
+                            help="Quantos produtos buscar de uma vez")
+        parser.add_argument("--repeticoes", type=int, default=20)
+        parser.add_argument("--aquecimento", type=int, default=2)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        try:
+            with dados_sinteticos.banco_de_teste(), override_settings(CACHES={"default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "comparar-api",
+            }}):
+                ids = dados_sinteticos.semear(produtos=options["produtos"], clientes=5, pedidos=50)
+                lote = list(
+                    Produto.objects.filter(ativo=True, estoque__gt=0)
+                    .order_by("-data_cadastro", "id")
+                    .values_list("id", flat=True)[: options["lote"]]
+                )
+                linhas = []
+                for modo, cache_ligado in (("sem cache", False), ("com cache", True)):
+                    with override_settings(LOJA_CACHE_PAGINAS=cache_ligado):
+                        for nome, html, json in pares(ids, lote):
+                            linhas.append((
+                                nome, modo, self.medir(html, options), self.medir(json, options)
+                            ))
+        finally:
+            teardown_test_environment()
+
+        self.stdout.write(
+            f"{'dados':<24} {'modo':<10} {'bytes html':>10} {'json':>8} {'gz html':>8} {'json':>6} "
+            f"{'SQL html':>8} {'json':>5} {'p50 html':>9} {'json':>6} {'p95 html':>9} {'json':>6}"
+        )
+        for nome, modo, html, json in linhas:
+            self.stdout.write(
+                f"{nome:<24} {modo:<10} {html['bytes']:>10} {json['bytes']:>8} "
+                f"{html['gzip']:>8} {json['gzip']:>6} {html['consultas']:>8} {json['consultas']:>5} "
+                f"{html['p50_ms']:>9.2f} {json['p50_ms']:>6.2f} {html['p95_ms']:>9.2f} {json['p95_ms']:>6.2f}"
+            )
+
+    def medir(self, urls, options):
+        """
+        Soma de bytes, consultas e tempo para buscar todas as URLs
+        """
+        cliente = Client()
+        latencias = []
+        for rodada in range(options["aquecimento"] + options["repeticoes"]):
+            corpos = []
+            connection.queries_log.clear()
+            with CaptureQueriesContext(connection) as capturadas:
+                comeco = time.perf_counter()
+                for url in urls:
+                    resposta = cliente.get(url)
+                    assert resposta.status_code == 200, (url, resposta.status_code)
+                    corpos.append(resposta.content)
+                duracao = time.perf_counter() - comeco
+            if rodada >= options["aquecimento"]:
+                latencias.append(duracao * 1000)
+
+        return {
+            "bytes": sum(map(len, corpos)),
+            "gzip": sum(len(gzip.compress(corpo, mtime=0)) for corpo in corpos),
+            "consultas": len(capturadas),
+            "p50_ms": percentil(latencias, 50),
+            "p95_ms": percentil(latencias, 95),
+        }
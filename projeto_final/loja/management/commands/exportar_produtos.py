@@ -0,0 +1,56 @@
+import sys
+import time
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand, CommandError
+
+from loja.importacao import exportar, formato_do_arquivo, sem_sku
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporta o catálogo em CSV ou JSONL, no formato lido por "
+        "importar_produtos. Lê os produtos em lotes, então a memória não "
+        "cresce com o tamanho do catálogo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("arquivo", nargs="?", default="-",
+                            help="Caminho do arquivo (padrão: saída padrão)")
+        parser.add_argument("--formato", choices=["csv", "jsonl"],
+                            help="Padrão: pela extensão do arquivo, ou csv na saída padrão")
+        parser.add_argument("--lote", type=int, default=2000,
+                            help="Produtos lidos do banco por vez")
+
+    def handle(self, *args, **options):
+        self.verbosity = options["verbosity"]
+        caminho = options["arquivo"]
+        formato = options["formato"] or formato_do_arquivo(caminho)
+        try:
+            arquivo = (
+                nullcontext(sys.stdout) if caminho == "-"
+                else open(caminho, "w", newline="", encoding="utf-8")
+            )
+        except OSError as erro:
+            raise CommandError(f"Não foi possível criar {caminho}: {erro}")
+
+        # O relatório vai para stderr: stdout pode ser o próprio arquivo
+        inicio = time.perf_counter()
+
+        def progresso(total):
+            if self.verbosity >= 2:
+                self.stderr.write(f"{total} produtos, {total / (time.perf_counter() - inicio):.0f} produtos/s")
+
+        with arquivo as saida:
+            total = exportar(saida, formato, lote=options["lote"], progresso=progresso)
+
+        duracao = time.perf_counter() - inicio
+        self.stderr.write(self.style.SUCCESS(
+            f"{total} produtos exportados em {duracao:.1f}s "
+            f"({total / duracao if duracao else 0:.0f} produtos/s)."
+        ))
+        if ignorados := sem_sku().count():
+            self.stderr.write(self.style.WARNING(
+                f"{ignorados} produtos sem SKU ficaram de fora: a importação "
+                "identifica os produtos pelo SKU."
+            ))
@@ -0,0 +1,68 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from loja.fragmentos import invalidar_produtos
+from loja.imagens import gerar_miniaturas
+from loja.models import Produto
+
+EXTENSOES = {".jpg", ".jpeg", ".png", ".webp", ".avif", ".gif"}
+
+
+def _processar(nome, forcar):
+    try:
+        return nome, *gerar_miniaturas(nome, forcar=forcar), None
+    except Exception as erro:  # imagem corrompida não deve parar o lote
+        return nome, 0, {}, str(erro)
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera as miniaturas que faltam para as imagens em media/produtos e "
+        "registra a largura de cada uma nos produtos (Produto.miniaturas)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pasta", default="produtos")
+        parser.add_argument("--processos", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--forcar", action="store_true",
+                            help="Regera mesmo as miniaturas que já existem")
+
+    def handle(self, *args, **options):
+        pasta = options["pasta"]
+        _, arquivos = default_storage.listdir(pasta)
+        nomes = [
+            f"{pasta}/{arquivo}"
+            for arquivo in sorted(arquivos)
+            if os.path.splitext(arquivo)[1].lower() in EXTENSOES
+        ]
+
+        inicio = time.perf_counter()
+        gerados = registrados = 0
+        with ProcessPoolExecutor(
+            max_workers=options["processos"], initializer=django.setup
+        ) as executor:
+            tarefas = [executor.submit(_processar, nome, options["forcar"]) for nome in nomes]
+            for tarefa in as_completed(tarefas):
+                nome, quantidade, larguras, erro = tarefa.result()
+                if erro:
+                    # Mantém as larguras já registradas para essa imagem
+                    self.stderr.write(f"{nome}: {erro}")
+                    continue
+                gerados += quantidade
+                # Sem as larguras registradas as páginas servem a original
+                registrados += Produto.objects.filter(imagem=nome).update(miniaturas=larguras)
+
+        # Os fragmentos em cache ainda apontam para as originais
+        if gerados or registrados:
+            invalidar_produtos()
+
+        duracao = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(nomes)} imagens, {gerados} miniaturas geradas e {registrados} "
+            f"produtos atualizados em {duracao:.1f}s."
+        ))
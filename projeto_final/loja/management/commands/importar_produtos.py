@@ -0,0 +1,58 @@
+import sys
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand, CommandError
+
+from loja.importacao import formato_do_arquivo, importar, ler_linhas
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa produtos de um CSV ou JSONL (colunas: sku, nome, categoria, "
+        "preco, estoque, descricao, especificacoes, destaque, ativo). SKUs "
+        "que já existem são atualizados; a categoria é achada pelo nome."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("arquivo", help="Caminho do arquivo, ou - para ler da entrada padrão")
+        parser.add_argument("--formato", choices=["csv", "jsonl"],
+                            help="Padrão: pela extensão do arquivo")
+        parser.add_argument("--lote", type=int, default=1000,
+                            help="Registros gravados por transação")
+        parser.add_argument("--criar-categorias", action="store_true",
+                            help="Cria as categorias que não existem em vez de rejeitar a linha")
+
+    def handle(self, *args, **options):
+        self.verbosity = options["verbosity"]
+        caminho = options["arquivo"]
+        formato = options["formato"] or formato_do_arquivo(caminho)
+        try:
+            arquivo = (
+                nullcontext(sys.stdin) if caminho == "-"
+                else open(caminho, newline="", encoding="utf-8-sig")
+            )
+        except OSError as erro:
+            raise CommandError(f"Não foi possível abrir {caminho}: {erro}")
+
+        with arquivo as entrada:
+            resultado = importar(
+                ler_linhas(entrada, formato),
+                lote=options["lote"],
+                criar_categorias=options["criar_categorias"],
+                ao_errar=lambda numero, mensagem: self.stderr.write(f"registro {numero}: {mensagem}"),
+                progresso=self.progresso,
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultado['linhas']} registros em {resultado['segundos']:.1f}s "
+            f"({self.taxa(resultado):.0f} registros/s): {resultado['criados']} criados, "
+            f"{resultado['atualizados']} atualizados, {resultado['erros']} com erro, "
+            f"{resultado['categorias_criadas']} categorias novas."
+        ))
+
+    def taxa(self, resultado):
+        return resultado["linhas"] / resultado["segundos"] if resultado["segundos"] else 0
+
+    def progresso(self, resultado):
+        if self.verbosity >= 2:
+            self.stdout.write(f"{resultado['linhas']} registros, {self.taxa(resultado):.0f} registros/s")
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from loja.reservas import apagar_vencidas
+
+
+class Command(BaseCommand):
+    help = (
+        "Apaga as reservas de estoque vencidas. Vencidas já não seguram "
+        "estoque; a limpeza só mantém a tabela pequena."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--intervalo", type=float, default=0,
+                            help="Repete a limpeza a cada N segundos (0: limpa uma vez)")
+
+    def handle(self, *args, **options):
+        while True:
+            apagadas = apagar_vencidas()
+            self.stdout.write(f"{apagadas} reservas vencidas apagadas.")
+            if not options["intervalo"]:
+                break
+            time.sleep(options["intervalo"])
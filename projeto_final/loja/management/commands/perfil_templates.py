@@ -0,0 +1,140 @@
+import copy
+import re
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.template import engines
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from loja import dados_sinteticos, middleware, perfil_templates
+from loja.management.commands.benchmark_rotas import cenarios
+
+_SQL_MS = re.compile(r"\bsql;dur=([\d.]+)")
+
+
+class Command(BaseCommand):
+    help = (
+        "Renderiza cada página do benchmark de rotas e separa o tempo da "
+        "requisição em SQL, templates (fora o SQL que roda durante a "
+        "renderização) e o resto; lista os templates e blocos que mais "
+        "somaram tempo. --sem-cache recompila os templates a cada requisição."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--produtos", type=int, default=2000)
+        parser.add_argument("--pedidos", type=int, default=500)
+        parser.add_argument("--repeticoes", type=int, default=20)
+        parser.add_argument("--aquecimento", type=int, default=2)
+        parser.add_argument("--limite", type=int, default=15,
+                            help="Quantos templates e blocos listar")
+        parser.add_argument("--sem-cache", action="store_true",
+                            help="Sem o loader em cache, para medir o custo de compilar")
+
+    def handle(self, *args, **options):
+        # O loader que mede, em cache como o de settings; --sem-cache o
+        # esvazia antes de cada requisição
+        templates = copy.deepcopy(settings.TEMPLATES)
+        for motor in templates:
+            motor["OPTIONS"]["loaders"] = [(
+                "loja.perfil_templates.Loader",
+                [
+                    "django.template.loaders.filesystem.Loader",
+                    "django.template.loaders.app_directories.Loader",
+                ],
+            )]
+
+        with dados_sinteticos.banco_de_teste(), override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+            TEMPLATES=templates,
+            # O SQL vem do Server-Timing do perfil de SQL; o perfil de
+            # templates é montado aqui, somando todas as requisições
+            LOJA_PERFIL_SQL=True,
+            LOJA_PERFIL_TEMPLATES=False,
+            # Mede a renderização, não o cache de página dos anônimos
+            LOJA_CACHE_PAGINAS=False,
+            CACHES={"default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "perfil-templates",
+            }},
+        ):
+            rotas, geral = self.medir(options)
+
+        self.stdout.write(
+            f"{'rota':<28} {'total ms':>9} {'SQL ms':>7} {'tpl ms':>7} "
+            f"{'SQL no tpl':>10} {'resto ms':>9}"
+        )
+        for nome, linha in rotas.items():
+            resto = max(linha["total"] - linha["sql"] - linha["tpl"], 0.0)
+            self.stdout.write(
+                f"{nome:<28} {linha['total']:>9.2f} {linha['sql']:>7.2f} {linha['tpl']:>7.2f} "
+                f"{linha['sql_tpl']:>10.2f} {resto:>9.2f}"
+            )
+
+        for titulo, tabela in (("template", geral.templates), ("bloco", geral.blocos)):
+            self.stdout.write("")
+            self.stdout.write(f"{titulo:<40} {'vezes':>7} {'ms total':>10} {'ms/vez':>8}")
+            for nome, vezes, ms in geral.mais_lentos(tabela, options["limite"]):
+                self.stdout.write(f"{nome:<40} {vezes:>7} {ms:>10.1f} {ms / vezes:>8.3f}")
+
+    def medir(self, options):
+        ids = dados_sinteticos.semear(
+            produtos=options["produtos"], clientes=10, pedidos=options["pedidos"]
+        )
+        clientes = {None: Client()}
+        for tipo, usuario in (
+            ("cliente", User.objects.get(username="cliente0")),
+            ("staff", User.objects.create(username="perfil-staff", is_staff=True)),
+        ):
+            clientes[tipo] = Client()
+            clientes[tipo].force_login(usuario)
+
+        carregador = engines.all()[0].engine.template_loaders[0]
+        geral = perfil_templates.PerfilTemplates()
+        rotas = {}
+        for cenario in cenarios():
+            if cenario.metodo != "get" or cenario.descartavel:
+                continue
+            medidas = []
+            for rodada in range(options["aquecimento"] + options["repeticoes"]):
+                url = reverse(cenario.rota, kwargs=cenario.argumentos(ids))
+                if cenario.query:
+                    url += "?" + cenario.query.format(**ids)
+
+                if options["sem_cache"]:
+                    carregador.reset()
+                perfil = perfil_templates.PerfilTemplates(middleware.sql_acumulado)
+                token = perfil_templates.ativar(perfil)
+                try:
+                    inicio = time.perf_counter()
+                    resposta = clientes[cenario.usuario].get(url)
+                    if resposta.streaming:
+                        b"".join(resposta.streaming_content)
+                    total = time.perf_counter() - inicio
+                finally:
+                    perfil_templates.desativar(token)
+
+                if rodada < options["aquecimento"] or not perfil.templates:
+                    continue
+                sql = _SQL_MS.search(resposta.get("Server-Timing", ""))
+                medidas.append({
+                    "total": total * 1000,
+                    "sql": float(sql.group(1)) if sql else 0.0,
+                    "tpl": perfil.sem_sql * 1000,
+                    "sql_tpl": perfil.sql * 1000,
+                })
+                for nome, tabela in (("templates", perfil.templates), ("blocos", perfil.blocos)):
+                    for chave, (vezes, segundos) in tabela.items():
+                        linha = getattr(geral, nome)[chave]
+                        linha[0] += vezes
+                        linha[1] += segundos
+
+            if medidas:
+                rotas[cenario.nome] = {
+                    chave: statistics.median(medida[chave] for medida in medidas)
+                    for chave in medidas[0]
+                }
+        return rotas, geral
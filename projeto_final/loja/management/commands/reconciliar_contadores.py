@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from loja.contadores import reconciliar
+from loja.models import Categoria
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula o contador de produtos disponíveis de cada categoria a "
+        "partir da tabela de produtos, corrigindo desvios."
+    )
+
+    def handle(self, *args, **options):
+        # Do primário, onde o UPDATE acontece
+        contadores = Categoria.objects.using(DEFAULT_DB_ALIAS).values_list("id", "produtos_disponiveis")
+        antes = dict(contadores)
+        total = reconciliar()
+        corrigidas = sum(1 for pk, valor in contadores.all() if antes.get(pk) != valor)
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} categorias recalculadas, {corrigidas} estavam erradas."
+        ))
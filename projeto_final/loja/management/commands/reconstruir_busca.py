@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from loja.busca import obter_backend
+
+
+class Command(BaseCommand):
+    help = "Reconstrói o índice de busca do catálogo a partir da tabela de produtos"
+
+    def handle(self, *args, **options):
+        total = obter_backend().reconstruir()
+        self.stdout.write(self.style.SUCCESS(f"{total} produtos indexados."))
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from loja.recomendacoes import reconstruir
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula os produtos relacionados de cada produto a partir dos "
+        "pedidos (produtos comprados juntos). Rode periodicamente, fora do "
+        "horário de pico."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--vizinhos", type=int, default=8,
+                            help="Relacionados guardados por produto")
+        parser.add_argument("--minimo", type=int, default=1,
+                            help="Pedidos em comum para um par contar")
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        produtos, pares = reconstruir(vizinhos=options["vizinhos"], minimo=options["minimo"])
+        self.stdout.write(self.style.SUCCESS(
+            f"{produtos} produtos, {pares} pares comprados juntos, "
+            f"em {time.perf_counter() - inicio:.1f}s."
+        ))
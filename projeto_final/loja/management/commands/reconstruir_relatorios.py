@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from loja.relatorios import reconstruir
+
+
+class Command(BaseCommand):
+    help = "Recalcula os totais diários de vendas a partir dos itens de pedido"
+
+    def handle(self, *args, **options):
+        total = reconstruir()
+        self.stdout.write(self.style.SUCCESS(f"{total} linhas de produto por dia recalculadas."))
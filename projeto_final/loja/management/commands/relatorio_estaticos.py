@@ -0,0 +1,136 @@
+import gzip
+import re
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from loja import dados_sinteticos
+from loja.estaticos import SUFIXOS
+from loja.management.commands.benchmark_rotas import cenarios
+
+
+class Command(BaseCommand):
+    help = (
+        "Roda o collectstatic numa pasta temporária e mede, em cada página, "
+        "quantos bytes de HTML o CSS em arquivos com hash economiza (com e "
+        "sem gzip), além do tamanho das versões .gz/.br de cada arquivo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--produtos", type=int, default=200)
+        parser.add_argument("--pedidos", type=int, default=50)
+
+    def handle(self, *args, **options):
+        pasta = Path(tempfile.mkdtemp(prefix="relatorio-estaticos-"))
+        setup_test_environment()
+        try:
+            # DEBUG=False: os templates usam os nomes com hash do manifesto
+            with dados_sinteticos.banco_de_teste(), override_settings(
+                DEBUG=False,
+                STATIC_ROOT=pasta,
+                CACHES={"default": {
+                    "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                    "LOCATION": "relatorio-estaticos",
+                }},
+            ):
+                call_command("collectstatic", interactive=False, verbosity=0)
+                arquivos = self.medir_arquivos(pasta)
+                paginas = self.medir_paginas(pasta, options)
+        finally:
+            teardown_test_environment()
+            shutil.rmtree(pasta, ignore_errors=True)
+
+        self.stdout.write(f"{'arquivo':<40} {'bytes':>8} {'.gz':>8} {'.br':>8}")
+        for nome, tamanhos in arquivos.items():
+            colunas = " ".join(f"{tamanhos.get(c, '-'):>8}" for c in ("bytes", "gzip", "br"))
+            self.stdout.write(f"{nome:<40} {colunas}")
+
+        self.stdout.write("")
+        self.stdout.write(
+            f"{'página':<28} {'embutido':>9} {'agora':>8} {'economia':>9} "
+            f"{'gz embutido':>12} {'gz agora':>9} {'economia gz':>12}"
+        )
+        for nome, linha in paginas.items():
+            self.stdout.write(
+                f"{nome:<28} {linha['embutido']:>9} {linha['agora']:>8} "
+                f"{self.economia(linha['embutido'], linha['agora']):>9} "
+                f"{linha['gz_embutido']:>12} {linha['gz_agora']:>9} "
+                f"{self.economia(linha['gz_embutido'], linha['gz_agora']):>12}"
+            )
+
+    def medir_arquivos(self, pasta):
+        # Só os arquivos do projeto (STATICFILES_DIRS), não os do admin
+        proprios = {
+            caminho.relative_to(raiz).as_posix()
+            for raiz in map(Path, settings.STATICFILES_DIRS)
+            for caminho in raiz.rglob("*")
+            if caminho.is_file()
+        }
+        arquivos = {}
+        for original, nome in sorted(staticfiles_storage.hashed_files.items()):
+            if original not in proprios:
+                continue
+            tamanhos = {"bytes": (pasta / nome).stat().st_size}
+            for codificacao, sufixo in SUFIXOS.items():
+                comprimido = pasta / (nome + sufixo)
+                if comprimido.exists():
+                    tamanhos[codificacao] = comprimido.stat().st_size
+            arquivos[nome] = tamanhos
+        return arquivos
+
+    def medir_paginas(self, pasta, options):
+        ids = dados_sinteticos.semear(
+            categorias=5, produtos=options["produtos"], clientes=5, pedidos=options["pedidos"]
+        )
+        clientes = {None: Client()}
+        for tipo, usuario in (
+            ("cliente", User.objects.get(username="cliente0")),
+            ("staff", User.objects.create(username="relatorio-staff", is_staff=True)),
+        ):
+            clientes[tipo] = Client()
+            clientes[tipo].force_login(usuario)
+
+        # <link> para um CSS local -> o <style> que havia no lugar dele
+        link = re.compile(
+            r'<link rel="stylesheet" href="' + re.escape(settings.STATIC_URL) + r'([^"]+\.css)">'
+        )
+
+        def embutir(encontrado):
+            css = (pasta / encontrado.group(1)).read_text(encoding="utf-8")
+            return f"<style>\n{css}</style>"
+
+        paginas = {}
+        for cenario in cenarios():
+            if cenario.metodo != "get" or cenario.descartavel:
+                continue
+            url = reverse(cenario.rota, kwargs=cenario.argumentos(ids))
+            if cenario.query:
+                url += "?" + cenario.query.format(**ids)
+            resposta = clientes[cenario.usuario].get(url)
+            if resposta.status_code != 200 or not resposta["Content-Type"].startswith("text/html"):
+                continue
+
+            agora = resposta.content
+            texto = agora.decode("utf-8")
+            if not link.search(texto):
+                continue
+            embutido = link.sub(embutir, texto).encode("utf-8")
+            paginas[cenario.nome] = {
+                "embutido": len(embutido),
+                "agora": len(agora),
+                "gz_embutido": len(gzip.compress(embutido, mtime=0)),
+                "gz_agora": len(gzip.compress(agora, mtime=0)),
+            }
+        return paginas
+
+    def economia(self, antes, depois):
+        return f"{(antes - depois) / antes:.0%}" if antes else "-"
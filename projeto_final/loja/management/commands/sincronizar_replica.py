@@ -0,0 +1,89 @@
+import sqlite3
+import time
+from contextlib import closing
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from loja.roteador import alias_replica
+
+# Quanto uma tentativa espera a réplica destravar antes de desistir
+PRAZO_TENTATIVA = 5
+# Pausa entre tentativas; dobra a cada uma
+ESPERA_INICIAL = 0.5
+
+
+class Command(BaseCommand):
+    help = (
+        "Copia o banco primário para a réplica de leitura. Usa a API de "
+        "backup do SQLite, então a cópia é consistente mesmo com o site no ar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--intervalo", type=float, default=0,
+                            help="Repete a cópia a cada N segundos (0: copia uma vez)")
+        parser.add_argument("--tentativas", type=int, default=5,
+                            help="Tentativas quando a réplica está travada por leitores")
+
+    def handle(self, *args, **options):
+        alias = alias_replica()
+        if alias is None:
+            raise CommandError("Nenhuma réplica configurada; defina LOJA_REPLICA.")
+        if connections[alias].vendor != "sqlite":
+            raise CommandError("A cópia local só funciona com SQLite; use a replicação do banco.")
+
+        origem = connections[DEFAULT_DB_ALIAS].settings_dict["NAME"]
+        destino = connections[alias].settings_dict["NAME"]
+
+        while True:
+            inicio = time.perf_counter()
+            try:
+                self.copiar(origem, destino, options["tentativas"])
+            except CommandError as erro:
+                if not options["intervalo"]:
+                    raise
+                # Em modo contínuo a próxima rodada tenta de novo
+                self.stderr.write(str(erro))
+            else:
+                self.stdout.write(f"Réplica {destino} atualizada em {time.perf_counter() - inicio:.2f}s")
+            if not options["intervalo"]:
+                break
+            time.sleep(options["intervalo"])
+
+    def copiar(self, origem, destino, tentativas):
+        """
+        Backup do primário na réplica, esperando cada vez mais enquanto
+        ela estiver travada
+        """
+        espera = ESPERA_INICIAL
+        for tentativa in range(1, tentativas + 1):
+            try:
+                self.backup(origem, destino)
+                return
+            except sqlite3.OperationalError as erro:
+                if "locked" not in str(erro) and "busy" not in str(erro):
+                    raise CommandError(f"Falha ao copiar para a réplica {destino}: {erro}")
+                if tentativa == tentativas:
+                    raise CommandError(
+                        f"Réplica {destino} continua travada por leitores após "
+                        f"{tentativas} tentativas ({erro}); tente de novo mais tarde."
+                    )
+                self.stderr.write(f"Réplica travada ({erro}); nova tentativa em {espera:.1f}s")
+                time.sleep(espera)
+                espera *= 2
+
+    @staticmethod
+    def backup(origem, destino):
+        """
+        Connection.backup() repete sozinho, sem limite, os passos que
+        encontram a réplica travada; o progresso corta a espera no prazo
+        """
+        prazo = time.monotonic() + PRAZO_TENTATIVA
+
+        def progresso(status, restantes, total):
+            if status in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED) and time.monotonic() > prazo:
+                raise sqlite3.OperationalError("database is locked")
+
+        with closing(sqlite3.connect(origem)) as primario, \
+                closing(sqlite3.connect(destino, timeout=0)) as replica:
+            primario.backup(replica, progress=progresso)
@@ -0,0 +1,96 @@
+import re
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from loja import api, consultas
+from loja.models import CarrinhoItem, ItemPedido, Produto
+from loja.paginacao import codificar_cursor, filtrar_por_cursor
+
+# Linha do plano que lê a tabela inteira, sem índice
+VARREDURA = re.compile(r"\bSCAN (\w+)(?!\w| USING)")
+ORDENACAO_TEMPORARIA = "USE TEMP B-TREE FOR ORDER BY"
+
+
+def consultas_da_vitrine():
+    """
+    (nome, queryset, índice esperado) para cada consulta das páginas da loja
+    """
+    cursor = codificar_cursor(timezone.now(), 1)
+    return [
+        ("home: destaques", consultas.produtos_destaque(), "produto_destaque_idx"),
+        ("home/produtos: categorias", consultas.categorias_ativas(), "categoria_ativa_idx"),
+        ("produtos: primeira página",
+         filtrar_por_cursor(consultas.catalogo(), None)[:25], "produto_catalogo_idx"),
+        ("produtos: página seguinte",
+         filtrar_por_cursor(consultas.catalogo(), cursor)[:25], "produto_catalogo_idx"),
+        ("produtos: por categoria",
+         filtrar_por_cursor(consultas.catalogo(1), None)[:25], "produto_categoria_idx"),
+        ("produtos: por categoria, página seguinte",
+         filtrar_por_cursor(consultas.catalogo(1), cursor)[:25], "produto_categoria_idx"),
+        ("produto_detalhe: relacionados",
+         consultas.relacionados(Produto(id=1, categoria_id=1)), "relacionado_produto_idx"),
+        ("produto_detalhe: mesma categoria",
+         consultas.mesma_categoria(Produto(id=1, categoria_id=1)), "produto_categoria_idx"),
+        ("home/produtos: última atualização", consultas.atualizacoes()[:1], "produto_atualizacao_idx"),
+        ("produtos/produto_detalhe: última atualização da categoria",
+         consultas.atualizacoes(1)[:1], "produto_cat_atualizacao_idx"),
+        ("produto_detalhe: última atualização dos relacionados",
+         consultas.atualizacoes_relacionados(Produto(id=1)), "relacionado_produto_idx"),
+        ("api_produtos: página seguinte",
+         filtrar_por_cursor(api.valores(consultas.catalogo(), api.CAMPOS_PRODUTO, api.PADRAO_PRODUTO), cursor)[:25],
+         "produto_catalogo_idx"),
+        ("api_produtos: por ids",
+         api.valores(consultas.catalogo().filter(id__in=[1, 2]).order_by(), api.CAMPOS_PRODUTO, ["id"]), None),
+        ("historico_compras: pedidos",
+         filtrar_por_cursor(consultas.pedidos_do_usuario(User(pk=1)), cursor, "data_pedido")[:11],
+         "pedido_cliente_data_idx"),
+        ("historico_compras: itens",
+         ItemPedido.objects.filter(pedido_id__in=[1, 2]), None),
+        ("carrinho: linhas", CarrinhoItem.objects.filter(chave="0" * 32), None),
+    ]
+
+
+def problemas(plano, indice):
+    """
+    O que há de errado no plano: varredura completa, ordenação sem índice
+    ou o índice esperado ausente
+    """
+    encontrados = [
+        f"varredura completa de {tabela}" for tabela in VARREDURA.findall(plano)
+    ]
+    if ORDENACAO_TEMPORARIA in plano:
+        encontrados.append("ordenação sem índice")
+    if indice and indice not in plano:
+        encontrados.append(f"não usa {indice}")
+    return encontrados
+
+
+class Command(BaseCommand):
+    help = (
+        "Confere com EXPLAIN QUERY PLAN que cada consulta da vitrine usa "
+        "índice e falha se alguma voltar a varrer a tabela inteira. "
+        "É o mesmo teste de loja/tests.py, contra o banco configurado."
+    )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("A verificação lê o EXPLAIN QUERY PLAN do SQLite.")
+
+        falhas = []
+        for nome, queryset, indice in consultas_da_vitrine():
+            plano = queryset.explain()
+            encontrados = problemas(plano, indice)
+
+            if encontrados:
+                falhas.append(nome)
+                self.stdout.write(self.style.ERROR(f"FALHOU  {nome}: {', '.join(encontrados)}"))
+                self.stdout.write(plano)
+            else:
+                self.stdout.write(f"ok      {nome}")
+
+        if falhas:
+            raise CommandError(f"{len(falhas)} consulta(s) sem o índice esperado.")
+        self.stdout.write(self.style.SUCCESS("Todas as consultas usam índice."))
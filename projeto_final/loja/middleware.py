@@ -0,0 +1,277 @@
+"""
+Middlewares da loja.
+
+PerfilSQLMiddleware mede o SQL de cada requisição. Cada conexão ganha um
+execute_wrapper (funciona com DEBUG=False) que anota as consultas no perfil
+da requisição atual, guardado num ContextVar: sob ASGI o ORM roda em outra
+thread, mas o sync_to_async leva o contexto junto.
+As consultas são agrupadas por "impressão digital": o SQL com os valores
+trocados por ?. A mesma impressão repetida muitas vezes numa requisição é
+o sinal de N+1, como `produto.categoria` dentro do loop da grade.
+
+Os totais saem no cabeçalho Server-Timing (visível no DevTools) e, para
+uma amostra das requisições, numa linha JSON do logger "loja.sql".
+Requisições com suspeita de N+1 são sempre registradas. Como o cabeçalho
+expõe detalhes internos, os dois perfis só ligam com LOJA_PERFIL_SQL e
+LOJA_PERFIL_TEMPLATES, que por padrão seguem o DEBUG.
+
+PerfilTemplatesMiddleware soma ao Server-Timing o tempo gasto nos templates
+fora o SQL que roda durante a renderização (medido pelo loader de
+perfil_templates.py) e, na mesma amostra, registra os templates e blocos
+mais lentos no logger "loja.templates".
+
+ReplicaMiddleware mantém no banco primário, por um cookie, quem acabou de
+gravar (ver roteador.py).
+"""
+
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from . import perfil_templates, roteador
+
+logger = logging.getLogger("loja.sql")
+logger_templates = logging.getLogger("loja.templates")
+
+AMOSTRA = getattr(settings, "LOJA_PERFIL_SQL_AMOSTRA", 0.1)
+# A partir de quantas repetições do mesmo comando é suspeita de N+1
+REPETICOES_N1 = getattr(settings, "LOJA_PERFIL_SQL_REPETICOES", 5)
+
+_LISTA_IN = re.compile(r"\bIN \((?:%s, )*%s\)")
+_LITERAIS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_ESPACOS = re.compile(r"\s+")
+
+
+def impressao_digital(sql):
+    """
+    SQL sem valores: duas consultas que só diferem nos parâmetros batem
+    """
+    sql = _LISTA_IN.sub("IN (...)", sql)
+    sql = _LITERAIS.sub("?", sql)
+    return _ESPACOS.sub(" ", sql).strip().replace("%s", "?")
+
+
+class PerfilSQL:
+    """
+    Consultas acumuladas de uma requisição
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.duracao = 0.0
+        self.impressoes = Counter()
+
+    def registrar(self, sql, duracao):
+        self.duracao += duracao
+        self.total += 1
+        self.impressoes[impressao_digital(sql)] += 1
+
+    def suspeitas_n1(self):
+        return [
+            (sql, vezes)
+            for sql, vezes in self.impressoes.most_common()
+            if vezes >= REPETICOES_N1
+        ]
+
+
+_perfil_atual = ContextVar("perfil_sql", default=None)
+
+
+def _anotar(execute, sql, params, many, context):
+    perfil = _perfil_atual.get()
+    if perfil is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        perfil.registrar(sql, time.perf_counter() - inicio)
+
+
+def sql_acumulado():
+    """
+    Segundos de SQL da requisição atual até agora
+    """
+    perfil = _perfil_atual.get()
+    return perfil.duracao if perfil is not None else 0.0
+
+
+def _instalar(connection, **kwargs):
+    # connection_created dispara a cada reconexão; o wrapper entra uma vez só
+    if _anotar not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_anotar)
+
+
+connection_created.connect(_instalar)
+
+
+class PerfilSQLMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "LOJA_PERFIL_SQL", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+        # Conexões abertas antes de o middleware carregar (nesta thread)
+        for conexao in connections.all(initialized_only=True):
+            _instalar(conexao)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        perfil, inicio = PerfilSQL(), time.perf_counter()
+        token = _perfil_atual.set(perfil)
+        try:
+            response = self.get_response(request)
+        finally:
+            _perfil_atual.reset(token)
+        return self.concluir(request, response, perfil, inicio)
+
+    async def __acall__(self, request):
+        perfil, inicio = PerfilSQL(), time.perf_counter()
+        token = _perfil_atual.set(perfil)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _perfil_atual.reset(token)
+        return self.concluir(request, response, perfil, inicio)
+
+    def concluir(self, request, response, perfil, inicio):
+        duracao = time.perf_counter() - inicio
+
+        # Respostas em streaming consultam depois daqui; ficam de fora
+        suspeitas = perfil.suspeitas_n1()
+        _somar_server_timing(
+            response,
+            f'sql;dur={perfil.duracao * 1000:.1f};desc="{perfil.total} consultas"',
+            f"total;dur={duracao * 1000:.1f}",
+            *([f'n1;desc="{len(suspeitas)} comando(s) repetido(s)"'] if suspeitas else []),
+        )
+
+        if suspeitas or random.random() < AMOSTRA:
+            registro = {
+                "metodo": request.method,
+                "caminho": request.path,
+                "rota": getattr(request.resolver_match, "view_name", None),
+                "status": response.status_code,
+                "consultas": perfil.total,
+                "sql_ms": round(perfil.duracao * 1000, 2),
+                "total_ms": round(duracao * 1000, 2),
+                "n1": [{"sql": sql, "vezes": vezes} for sql, vezes in suspeitas],
+            }
+            nivel = logging.WARNING if suspeitas else logging.INFO
+            logger.log(nivel, json.dumps(registro, ensure_ascii=False))
+
+        return response
+
+
+def _somar_server_timing(response, *metricas):
+    anterior = response.headers.get("Server-Timing")
+    response.headers["Server-Timing"] = ", ".join([*metricas, *([anterior] if anterior else [])])
+
+
+class PerfilTemplatesMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "LOJA_PERFIL_TEMPLATES", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        perfil = perfil_templates.PerfilTemplates(sql_acumulado)
+        token = perfil_templates.ativar(perfil)
+        try:
+            response = self.get_response(request)
+        finally:
+            perfil_templates.desativar(token)
+        return self.concluir(request, response, perfil)
+
+    async def __acall__(self, request):
+        perfil = perfil_templates.PerfilTemplates(sql_acumulado)
+        token = perfil_templates.ativar(perfil)
+        try:
+            response = await self.get_response(request)
+        finally:
+            perfil_templates.desativar(token)
+        return self.concluir(request, response, perfil)
+
+    def concluir(self, request, response, perfil):
+        if not perfil.templates:
+            return response
+        _somar_server_timing(
+            response,
+            f'tpl;dur={perfil.sem_sql * 1000:.1f};desc="templates sem SQL"',
+        )
+        if random.random() < AMOSTRA:
+            registro = {
+                "caminho": request.path,
+                "rota": getattr(request.resolver_match, "view_name", None),
+                "templates_ms": round(perfil.duracao * 1000, 2),
+                "sql_nos_templates_ms": round(perfil.sql * 1000, 2),
+                "templates": perfil.mais_lentos(perfil.templates),
+                "blocos": perfil.mais_lentos(perfil.blocos),
+            }
+            logger_templates.info(json.dumps(registro, ensure_ascii=False))
+        return response
+
+
+class ReplicaMiddleware:
+    """
+    Leia-suas-escritas entre requisições quando há réplica configurada
+    """
+
+    sync_capable = True
+    async_capable = True
+    COOKIE = "loja_primario"
+
+    def __init__(self, get_response):
+        if roteador.alias_replica() is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.atraso = getattr(settings, "LOJA_REPLICA_ATRASO", 10)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = roteador.iniciar_requisicao(self.COOKIE in request.COOKIES)
+        try:
+            response = self.get_response(request)
+        finally:
+            gravou = roteador.encerrar_requisicao(token)
+        return self.concluir(response, gravou)
+
+    async def __acall__(self, request):
+        token = roteador.iniciar_requisicao(self.COOKIE in request.COOKIES)
+        try:
+            response = await self.get_response(request)
+        finally:
+            gravou = roteador.encerrar_requisicao(token)
+        return self.concluir(response, gravou)
+
+    def concluir(self, response, gravou):
+        if gravou:
+            # Renova a cada escrita; expira quando a réplica já deve ter alcançado
+            response.set_cookie(self.COOKIE, "1", max_age=self.atraso, httponly=True, samesite="Lax")
+        return response
@@ -0,0 +1,35 @@
+from django.db import migrations
+
+TABELA = "loja_produto_busca"
+
+
+def criar_indice(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABELA} USING fts5("
+        "nome, descricao, especificacoes, "
+        "tokenize = 'unicode61 remove_diacritics 2', "
+        "prefix = '2 3')"
+    )
+    schema_editor.execute(
+        f"INSERT INTO {TABELA} (rowid, nome, descricao, especificacoes) "
+        "SELECT id, nome, descricao, especificacoes FROM loja_produto"
+    )
+
+
+def remover_indice(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(f"DROP TABLE IF EXISTS {TABELA}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("loja", "0002_alter_categoria_options_alter_cliente_options_and_more"),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_indice, remover_indice),
+    ]
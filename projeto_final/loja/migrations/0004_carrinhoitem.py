@@ -0,0 +1,27 @@
+# Generated by Django 5.2 on 2026-10-18 12:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loja', '0003_produto_busca_fts5'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CarrinhoItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chave', models.CharField(max_length=32)),
+                ('quantidade', models.PositiveIntegerField(default=1)),
+                ('data_atualizacao', models.DateTimeField(auto_now=True)),
+                ('produto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='loja.produto')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('chave', 'produto'), name='carrinhoitem_chave_produto_unico')],
+            },
+        ),
+    ]
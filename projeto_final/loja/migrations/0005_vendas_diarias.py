@@ -0,0 +1,44 @@
+# Generated by Django 5.2 on 2026-10-18 12:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loja', '0004_carrinhoitem'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VendaDiariaCategoria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField()),
+                ('unidades', models.IntegerField(default=0)),
+                ('receita', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('pedidos', models.IntegerField(default=0)),
+                ('categoria', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vendas_diarias', to='loja.categoria')),
+            ],
+            options={
+                'ordering': ['-data'],
+                'constraints': [models.UniqueConstraint(fields=('data', 'categoria'), name='vendadiariacategoria_unica')],
+            },
+        ),
+        migrations.CreateModel(
+            name='VendaDiariaProduto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField()),
+                ('unidades', models.IntegerField(default=0)),
+                ('receita', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('pedidos', models.IntegerField(default=0)),
+                ('produto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vendas_diarias', to='loja.produto')),
+            ],
+            options={
+                'ordering': ['-data'],
+                'constraints': [models.UniqueConstraint(fields=('data', 'produto'), name='vendadiariaproduto_unica')],
+            },
+        ),
+    ]
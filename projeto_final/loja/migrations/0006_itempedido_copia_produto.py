@@ -0,0 +1,35 @@
+# Generated by Django 5.2 on 2026-10-18 12:20
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copiar_nomes(apps, schema_editor):
+    ItemPedido = apps.get_model('loja', 'ItemPedido')
+    Produto = apps.get_model('loja', 'Produto')
+    ItemPedido.objects.update(
+        produto_nome=Subquery(
+            Produto.objects.filter(pk=OuterRef('produto_id')).values('nome')[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loja', '0005_vendas_diarias'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='itempedido',
+            name='produto_imagem',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='itempedido',
+            name='produto_nome',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.RunPython(copiar_nomes, migrations.RunPython.noop),
+    ]
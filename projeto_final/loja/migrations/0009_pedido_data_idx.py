@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-18 12:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loja', '0008_produto_sku'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['-data_pedido', 'id'], name='pedido_data_idx'),
+        ),
+    ]
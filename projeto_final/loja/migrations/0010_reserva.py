@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-18 12:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loja', '0009_pedido_data_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Reserva',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chave', models.CharField(max_length=32)),
+                ('quantidade', models.PositiveIntegerField()),
+                ('expira_em', models.DateTimeField()),
+                ('produto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservas', to='loja.produto')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['produto', 'expira_em', 'quantidade'], name='reserva_ativa_idx'), models.Index(fields=['expira_em'], name='reserva_expira_idx')],
+                'constraints': [models.UniqueConstraint(fields=('chave', 'produto'), name='reserva_chave_produto_unica')],
+            },
+        ),
+    ]
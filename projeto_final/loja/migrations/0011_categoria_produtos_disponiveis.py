@@ -0,0 +1,38 @@
+# Generated by Django 5.2 on 2026-10-18 13:00
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def contar_disponiveis(apps, schema_editor):
+    Categoria = apps.get_model('loja', 'Categoria')
+    Produto = apps.get_model('loja', 'Produto')
+    Categoria.objects.update(
+        produtos_disponiveis=Coalesce(
+            Subquery(
+                Produto.objects.filter(categoria=OuterRef('pk'), ativo=True, estoque__gt=0)
+                .order_by()
+                .values('categoria')
+                .annotate(total=Count('pk'))
+                .values('total')
+            ),
+            0,
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loja', '0010_reserva'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='categoria',
+            name='produtos_disponiveis',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(contar_disponiveis, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-18 13:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loja', '0011_categoria_produtos_disponiveis'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProdutoRelacionado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posicao', models.PositiveSmallIntegerField()),
+                ('pontuacao', models.FloatField()),
+                ('produto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='relacionados', to='loja.produto')),
+                ('relacionado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recomendado_em', to='loja.produto')),
+            ],
+            options={
+                'ordering': ['produto', 'posicao'],
+                'indexes': [models.Index(fields=['produto', 'posicao'], name='relacionado_produto_idx')],
+            },
+        ),
+    ]
@@ -6,9 +6,14 @@ class Categoria(models.Model):
     nome = models.CharField(max_length=100)
     descricao = models.TextField(blank=True)
     ativo = models.BooleanField(default=True)
+    # Produtos ativos com estoque; mantido por loja/contadores.py
+    produtos_disponiveis = models.IntegerField(default=0, editable=False)
 
     class Meta:
         ordering = ['nome']
+        indexes = [
+            models.Index(fields=['nome'], condition=models.Q(ativo=True), name='categoria_ativa_idx'),
+        ]
 
     def __str__(self):
         return self.nome
@@ -16,11 +21,15 @@ class Categoria(models.Model):
 
 class Produto(models.Model):
     nome = models.CharField(max_length=200)
+    # Código do fornecedor; chave do upsert em `manage.py importar_produtos`
+    sku = models.CharField(max_length=50, unique=True, null=True, blank=True)
     categoria = models.ForeignKey(Categoria, on_delete=models.CASCADE)
     descricao = models.TextField()
     preco = models.DecimalField(max_digits=10, decimal_places=2)
     estoque = models.IntegerField(default=0)
     imagem = models.ImageField(upload_to='produtos/', blank=True, null=True)
+    # Largura real de cada miniatura gerada ({"400": 320}); loja/imagens.py
+    miniaturas = models.JSONField(default=dict, blank=True, editable=False)
     especificacoes = models.TextField(blank=True)
     destaque = models.BooleanField(default=False)
     ativo = models.BooleanField(default=True)
@@ -32,6 +41,28 @@ class Produto(models.Model):
 
     class Meta:
         ordering = ['-data_cadastro']
+        indexes = [
+            # Catálogo: ativos, mais novos primeiro, com ou sem categoria
+            models.Index(
+                fields=['-data_cadastro', 'id'],
+                condition=models.Q(ativo=True),
+                name='produto_catalogo_idx',
+            ),
+            models.Index(
+                fields=['categoria', '-data_cadastro', 'id'],
+                condition=models.Q(ativo=True),
+                name='produto_categoria_idx',
+            ),
+            # Destaques da home
+            models.Index(
+                fields=['-data_cadastro'],
+                condition=models.Q(ativo=True, destaque=True),
+                name='produto_destaque_idx',
+            ),
+            # Last-Modified das páginas do catálogo (loja/condicional.py)
+            models.Index(fields=['data_atualizacao'], name='produto_atualizacao_idx'),
+            models.Index(fields=['categoria', 'data_atualizacao'], name='produto_cat_atualizacao_idx'),
+        ]
 
     def __str__(self):
         return self.nome
@@ -41,6 +72,24 @@ class Produto(models.Model):
         return self.ativo and self.estoque > 0
 
 
+class ProdutoRelacionado(models.Model):
+    """Vizinhos de cada produto, por compras em comum (loja/recomendacoes.py)"""
+    produto = models.ForeignKey(Produto, on_delete=models.CASCADE, related_name='relacionados')
+    relacionado = models.ForeignKey(Produto, on_delete=models.CASCADE, related_name='recomendado_em')
+    posicao = models.PositiveSmallIntegerField()
+    pontuacao = models.FloatField()
+
+    class Meta:
+        ordering = ['produto', 'posicao']
+        indexes = [
+            # produto_detalhe: os vizinhos do produto, já na ordem
+            models.Index(fields=['produto', 'posicao'], name='relacionado_produto_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.produto_id} -> {self.relacionado_id} ({self.posicao})"
+
+
 class Venda(models.Model):
     produto = models.ForeignKey(Produto, on_delete=models.CASCADE, related_name="vendas")
     quantidade = models.PositiveIntegerField()
@@ -56,6 +105,42 @@ class Venda(models.Model):
         return f"{self.produto.nome} - {self.quantidade} un"
 
 
+class VendaDiariaProduto(models.Model):
+    """Totais de vendas por produto e dia, mantidos a cada pedido (loja/relatorios.py)"""
+    data = models.DateField()
+    produto = models.ForeignKey(Produto, on_delete=models.CASCADE, related_name='vendas_diarias')
+    unidades = models.IntegerField(default=0)
+    receita = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    pedidos = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['-data']
+        constraints = [
+            models.UniqueConstraint(fields=['data', 'produto'], name='vendadiariaproduto_unica'),
+        ]
+
+    def __str__(self):
+        return f"{self.data} - {self.produto_id}: {self.unidades} un"
+
+
+class VendaDiariaCategoria(models.Model):
+    """Totais de vendas por categoria e dia"""
+    data = models.DateField()
+    categoria = models.ForeignKey(Categoria, on_delete=models.CASCADE, related_name='vendas_diarias')
+    unidades = models.IntegerField(default=0)
+    receita = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    pedidos = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['-data']
+        constraints = [
+            models.UniqueConstraint(fields=['data', 'categoria'], name='vendadiariacategoria_unica'),
+        ]
+
+    def __str__(self):
+        return f"{self.data} - {self.categoria_id}: {self.unidades} un"
+
+
 
 class Cliente(models.Model):
     usuario = models.OneToOneField(User, on_delete=models.CASCADE)
@@ -87,6 +172,12 @@ class Pedido(models.Model):
 
     class Meta:
         ordering = ['-data_pedido']
+        indexes = [
+            # Histórico de compras do cliente
+            models.Index(fields=['cliente', '-data_pedido', 'id'], name='pedido_cliente_data_idx'),
+            # Exportação de vendas por período
+            models.Index(fields=['-data_pedido', 'id'], name='pedido_data_idx'),
+        ]
 
     def __str__(self):
         return f"Pedido #{self.id}"
@@ -97,9 +188,56 @@ class ItemPedido(models.Model):
     produto = models.ForeignKey(Produto, on_delete=models.CASCADE)
     quantidade = models.IntegerField(default=1)
     preco_unitario = models.DecimalField(max_digits=10, decimal_places=2)
+    # Cópia do nome e da miniatura no momento da compra (histórico sem JOIN)
+    produto_nome = models.CharField(max_length=200, blank=True)
+    produto_imagem = models.CharField(max_length=255, blank=True)
+
+    def __str__(self):
+        return f"{self.quantidade}x {self.produto_nome or self.produto.nome}"
+
+    @property
+    def subtotal(self):
+        return self.preco_unitario * self.quantidade
+
+
+class CarrinhoItem(models.Model):
+    """Linha do carrinho quando o backend de banco está ativo"""
+    chave = models.CharField(max_length=32)
+    produto = models.ForeignKey(Produto, on_delete=models.CASCADE)
+    quantidade = models.PositiveIntegerField(default=1)
+    data_atualizacao = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['chave', 'produto'], name='carrinhoitem_chave_produto_unico'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.quantidade}x {self.produto_id} ({self.chave})"
+
+
+class Reserva(models.Model):
+    """Unidades seguradas por uma linha do carrinho até expira_em (loja/reservas.py)"""
+    chave = models.CharField(max_length=32)
+    produto = models.ForeignKey(Produto, on_delete=models.CASCADE, related_name='reservas')
+    quantidade = models.PositiveIntegerField()
+    expira_em = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['chave', 'produto'], name='reserva_chave_produto_unica'),
+        ]
+        indexes = [
+            # Soma das reservas ativas do produto sem ler a tabela
+            models.Index(fields=['produto', 'expira_em', 'quantidade'], name='reserva_ativa_idx'),
+            # Limpeza das vencidas
+            models.Index(fields=['expira_em'], name='reserva_expira_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.quantidade}x {self.produto.nome}"
+        return f"{self.quantidade}x {self.produto_id} ({self.chave})"
 
 
 class Contato(models.Model):
@@ -0,0 +1,119 @@
+import base64
+import json
+from collections import namedtuple
+from datetime import datetime
+
+from django.db.models import Q
+
+LIMITE_PADRAO = 24
+LIMITE_MAXIMO = 60
+
+Pagina = namedtuple("Pagina", ["itens", "proximo_cursor"])
+
+
+def limitar_tamanho(valor, padrao=LIMITE_PADRAO, maximo=LIMITE_MAXIMO):
+    """
+    Converte o tamanho de página pedido na URL, respeitando o teto
+    """
+    try:
+        tamanho = int(valor)
+    except (TypeError, ValueError):
+        return padrao
+    return max(1, min(tamanho, maximo))
+
+
+def codificar_cursor(valor, pk):
+    if isinstance(valor, datetime):
+        valor = valor.isoformat()
+    bruto = json.dumps([valor, pk]).encode()
+    return base64.urlsafe_b64encode(bruto).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor, tipo=datetime):
+    """
+    Retorna (valor, pk) ou None se o cursor for inválido.
+
+    `tipo` é o do campo de ordenação: datetime (vem como texto ISO) ou
+    float (relevância da busca). Um valor de outro tipo é cursor adulterado
+    e volta para a primeira página.
+    """
+    if not cursor:
+        return None
+    try:
+        preenchido = cursor + "=" * (-len(cursor) % 4)
+        valor, pk = json.loads(base64.urlsafe_b64decode(preenchido))
+        if not isinstance(pk, int) or isinstance(pk, bool):
+            return None
+        if tipo is datetime:
+            if not isinstance(valor, str):
+                return None
+            valor = datetime.fromisoformat(valor)
+        elif isinstance(valor, (int, float)) and not isinstance(valor, bool):
+            valor = tipo(valor)
+        else:
+            return None
+        return valor, pk
+    except (ValueError, TypeError, UnicodeDecodeError):
+        return None
+
+
+def filtrar_por_cursor(queryset, cursor, campo="data_cadastro", descendente=True, tipo=datetime):
+    """
+    Ordena por (campo, id) e filtra a partir da posição do cursor
+    """
+    sentido = "lt" if descendente else "gt"
+    queryset = queryset.order_by(f"-{campo}" if descendente else campo, "id")
+
+    posicao = decodificar_cursor(cursor, tipo)
+    if posicao:
+        valor, pk = posicao
+        # O limite simples (<= ou >=) deixa o banco começar a leitura do
+        # índice já na posição do cursor; o OR só desempata pelo id
+        queryset = queryset.filter(
+            Q(**{f"{campo}__{sentido}e": valor}),
+            Q(**{f"{campo}__{sentido}": valor}) | Q(id__gt=pk),
+        )
+    return queryset
+
+
+def paginar_por_cursor(
+    queryset, cursor, limite, campo="data_cadastro", descendente=True, tipo=datetime
+):
+    """
+    Paginação keyset ordenada por (campo, id).
+
+    Em vez de OFFSET, filtra a partir da última linha vista, então o custo
+    de cada página não cresce com a posição no catálogo. Retorna a lista de
+    objetos da página e o cursor da próxima (ou None na última página)
+    como uma Pagina.
+    """
+    queryset = filtrar_por_cursor(queryset, cursor, campo, descendente, tipo)
+
+    # Busca um a mais só para saber se existe próxima página
+    itens = list(queryset[: limite + 1])
+    return _montar_pagina(itens, limite, campo)
+
+
+async def apaginar_por_cursor(
+    queryset, cursor, limite, campo="data_cadastro", descendente=True, tipo=datetime
+):
+    """
+    paginar_por_cursor() para views assíncronas
+    """
+    queryset = filtrar_por_cursor(queryset, cursor, campo, descendente, tipo)
+    itens = [objeto async for objeto in queryset[: limite + 1].aiterator()]
+    return _montar_pagina(itens, limite, campo)
+
+
+def _montar_pagina(itens, limite, campo):
+    proximo = None
+    if len(itens) > limite:
+        itens = itens[:limite]
+        ultimo = itens[-1]
+        # Objetos do modelo ou dicionários de values() (loja/api.py)
+        if isinstance(ultimo, dict):
+            proximo = codificar_cursor(ultimo[campo], ultimo["id"])
+        else:
+            proximo = codificar_cursor(getattr(ultimo, campo), ultimo.pk)
+
+    return Pagina(itens, proximo)
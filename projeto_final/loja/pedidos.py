@@ -0,0 +1,102 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import contadores, reservas
+from .carrinho import TAMANHO_MINIATURA
+from .fragmentos import invalidar_produtos
+from .imagens import miniatura_url
+from .models import ItemPedido, Pedido, Produto
+from .relatorios import registrar_pedido
+from .transacoes import transacao_de_escrita
+
+
+class PedidoInvalido(Exception):
+    """O pedido não pode ser fechado; a mensagem vai para o cliente"""
+
+
+class EstoqueInsuficiente(PedidoInvalido):
+    def __init__(self, produto):
+        self.produto = produto
+        super().__init__(f"Estoque insuficiente para {produto.nome}")
+
+
+def finalizar_pedido(cliente, carrinho, reserva=None):
+    """
+    Fecha o pedido do carrinho numa única transação.
+
+    `reserva` é a chave das reservas de estoque do carrinho: as unidades
+    reservadas por outros carrinhos não podem ser vendidas, e as deste
+    carrinho viram o pedido e deixam de existir.
+
+    Os produtos são buscados (e travados, onde o banco suporta) numa
+    consulta só. A baixa de estoque é um UPDATE condicional
+    `estoque = estoque - n WHERE estoque >= n`: se outro checkout levou as
+    últimas unidades, nenhuma linha é afetada e tudo é desfeito, então
+    não há como vender além do estoque.
+    """
+    quantidades = {}
+    for item in carrinho:
+        quantidades[item["id"]] = quantidades.get(item["id"], 0) + item["quantidade"]
+
+    if not quantidades:
+        raise PedidoInvalido("Seu carrinho está vazio.")
+
+    with transacao_de_escrita():
+        produtos = Produto.objects.select_for_update().in_bulk(quantidades.keys())
+        reservado = reservas.reservado(quantidades.keys(), exceto=reserva)
+
+        for produto_id, quantidade in quantidades.items():
+            produto = produtos.get(produto_id)
+            if produto is None or not produto.ativo:
+                raise PedidoInvalido("Um dos produtos do carrinho não está mais disponível.")
+            if produto.estoque - reservado.get(produto_id, 0) < quantidade:
+                raise EstoqueInsuficiente(produto)
+
+        # Preço do momento da compra, não o guardado no carrinho
+        itens = [
+            ItemPedido(
+                produto=produtos[produto_id],
+                quantidade=quantidade,
+                preco_unitario=produtos[produto_id].preco,
+                produto_nome=produtos[produto_id].nome,
+                produto_imagem=miniatura_url(produtos[produto_id].imagem, TAMANHO_MINIATURA),
+            )
+            for produto_id, quantidade in quantidades.items()
+        ]
+
+        pedido = Pedido.objects.create(
+            cliente=cliente,
+            status="confirmado",
+            valor_total=sum(item.preco_unitario * item.quantidade for item in itens),
+        )
+
+        # O UPDATE não passa pelo auto_now; o horário é o Last-Modified das páginas
+        agora = timezone.now()
+        for produto_id, quantidade in quantidades.items():
+            baixados = Produto.objects.filter(
+                id=produto_id, estoque__gte=quantidade
+            ).update(estoque=F("estoque") - quantidade, data_atualizacao=agora)
+            if not baixados:
+                raise EstoqueInsuficiente(produtos[produto_id])
+
+        # Produtos que esgotaram saem do contador da categoria
+        esgotados = {}
+        for produto_id, quantidade in quantidades.items():
+            produto = produtos[produto_id]
+            if produto.estoque == quantidade:
+                esgotados[produto.categoria_id] = esgotados.get(produto.categoria_id, 0) - 1
+        contadores.ajustar(esgotados)
+
+        for item in itens:
+            item.pedido = pedido
+        ItemPedido.objects.bulk_create(itens)
+        registrar_pedido(pedido, itens)
+        if reserva:
+            reservas.liberar(reserva)
+
+        # O UPDATE não dispara sinais; o estoque exibido na grade mudou
+        categorias = {produto.categoria_id for produto in produtos.values()}
+        transaction.on_commit(lambda: invalidar_produtos(*categorias))
+
+    return pedido
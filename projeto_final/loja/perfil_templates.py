@@ -0,0 +1,117 @@
+"""
+Tempo de renderização por template e por {% block %}.
+
+O Loader daqui é o cached.Loader do Django que devolve os templates como
+TemplateMedido, com os {% block %} como BlocoMedido: eles anotam o tempo no
+perfil da renderização atual, guardado num ContextVar como o perfil de SQL
+(middleware.py). Nada do Django é trocado; o loader só entra em
+settings.TEMPLATES com LOJA_PERFIL_TEMPLATES ligado, e sem perfil ativo o
+custo é um ContextVar.get() por template e por bloco. (O sinal
+template_rendered só existe sob o ambiente de testes e não traz o tempo.)
+
+Os tempos são inclusivos: o de base.html inclui os blocos e os includes
+dele, e o de um bloco inclui os blocos de dentro. O SQL que roda durante a
+renderização (querysets preguiçosos, {% cache %} vazio) é medido à parte,
+para separar o custo dos templates do custo do ORM.
+"""
+
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+
+from django.template.base import Template
+from django.template.loader_tags import BlockNode
+from django.template.loaders import cached
+
+_perfil_atual = ContextVar("perfil_templates", default=None)
+
+
+class PerfilTemplates:
+    """
+    Tempos acumulados de uma ou mais renderizações
+    """
+
+    def __init__(self, sql_acumulado=None):
+        # sql_acumulado(): segundos de SQL até agora (ver middleware.py)
+        self.sql_acumulado = sql_acumulado
+        # nome -> [vezes, segundos]
+        self.templates = defaultdict(lambda: [0, 0.0])
+        self.blocos = defaultdict(lambda: [0, 0.0])
+        # Só as renderizações de fora (a view), sem contar os aninhados duas vezes
+        self.duracao = 0.0
+        self.sql = 0.0
+        self._profundidade = 0
+
+    @property
+    def sem_sql(self):
+        return max(self.duracao - self.sql, 0.0)
+
+    def anotar(self, tabela, nome, duracao):
+        linha = tabela[nome]
+        linha[0] += 1
+        linha[1] += duracao
+
+    def mais_lentos(self, tabela, limite=10):
+        """
+        [(nome, vezes, ms)] dos que mais somaram tempo
+        """
+        linhas = sorted(tabela.items(), key=lambda item: item[1][1], reverse=True)[:limite]
+        return [(nome, vezes, round(segundos * 1000, 2)) for nome, (vezes, segundos) in linhas]
+
+
+class TemplateMedido(Template):
+    def _render(self, context):
+        perfil = _perfil_atual.get()
+        if perfil is None:
+            return super()._render(context)
+
+        externo = perfil._profundidade == 0 and perfil.sql_acumulado is not None
+        sql_antes = perfil.sql_acumulado() if externo else 0.0
+        perfil._profundidade += 1
+        inicio = time.perf_counter()
+        try:
+            return super()._render(context)
+        finally:
+            duracao = time.perf_counter() - inicio
+            perfil._profundidade -= 1
+            perfil.anotar(perfil.templates, self.origin.template_name or self.origin.name, duracao)
+            if perfil._profundidade == 0:
+                perfil.duracao += duracao
+            if externo:
+                perfil.sql += perfil.sql_acumulado() - sql_antes
+
+
+class BlocoMedido(BlockNode):
+    def render(self, context):
+        perfil = _perfil_atual.get()
+        if perfil is None:
+            return super().render(context)
+        inicio = time.perf_counter()
+        try:
+            return super().render(context)
+        finally:
+            perfil.anotar(perfil.blocos, self.name, time.perf_counter() - inicio)
+
+
+class Loader(cached.Loader):
+    """
+    cached.Loader que devolve os templates já medidos
+    """
+
+    def get_template(self, template_name, skip=None):
+        template = super().get_template(template_name, skip)
+        if not isinstance(template, TemplateMedido):
+            # Os loaders filhos criam Template direto; a troca de classe vale
+            # só para os templates deste loader e fica no cache com eles
+            template.__class__ = TemplateMedido
+            for bloco in template.nodelist.get_nodes_by_type(BlockNode):
+                bloco.__class__ = BlocoMedido
+        return template
+
+
+def ativar(perfil):
+    return _perfil_atual.set(perfil)
+
+
+def desativar(token):
+    _perfil_atual.reset(token)
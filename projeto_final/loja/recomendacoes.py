@@ -0,0 +1,102 @@
+"""
+Produtos relacionados por compras em comum.
+
+`manage.py reconstruir_relacionados` lê os itens dos pedidos contabilizados,
+conta quantas vezes cada par de produtos saiu no mesmo pedido e guarda os
+melhores vizinhos de cada produto em ProdutoRelacionado. A pontuação é a
+similaridade do cosseno entre os produtos:
+
+    juntos(a, b) / sqrt(pedidos(a) * pedidos(b))
+
+Produtos com poucos vizinhos são completados com os mais novos da mesma
+categoria, então a página de detalhe só precisa de uma consulta.
+"""
+
+import heapq
+import math
+from collections import Counter, defaultdict
+from itertools import combinations, groupby
+from operator import itemgetter
+
+from .fragmentos import invalidar_produtos
+from .models import ItemPedido, Produto, ProdutoRelacionado
+from .relatorios import STATUS_CONTABILIZADOS
+from .transacoes import transacao_de_escrita
+
+# Pedidos maiores que isso (compras de atacado) só trariam ruído e pares demais
+MAX_ITENS_POR_PEDIDO = 50
+
+
+def contar_pares():
+    """
+    (pedidos por produto, pedidos por par de produtos), lendo os itens em lotes
+    """
+    compras, pares = Counter(), Counter()
+    itens = (
+        ItemPedido.objects.filter(pedido__status__in=STATUS_CONTABILIZADOS)
+        .order_by("pedido_id")
+        .values_list("pedido_id", "produto_id")
+        .iterator(chunk_size=5000)
+    )
+    for _, linhas in groupby(itens, key=itemgetter(0)):
+        cesta = sorted({produto_id for _, produto_id in linhas})
+        if len(cesta) > MAX_ITENS_POR_PEDIDO:
+            continue
+        compras.update(cesta)
+        pares.update(combinations(cesta, 2))
+    return compras, pares
+
+
+def reconstruir(vizinhos=8, minimo=1):
+    """
+    Recalcula a tabela inteira; devolve (produtos, pares usados)
+    """
+    compras, pares = contar_pares()
+
+    candidatos = defaultdict(list)
+    usados = 0
+    for (a, b), juntos in pares.items():
+        if juntos < minimo:
+            continue
+        pontuacao = juntos / math.sqrt(compras[a] * compras[b])
+        candidatos[a].append((pontuacao, juntos, b))
+        candidatos[b].append((pontuacao, juntos, a))
+        usados += 1
+
+    # Os mais novos de cada categoria, para completar quem tem poucos vizinhos
+    recentes = defaultdict(list)
+    for pk, categoria_id in (
+        Produto.objects.filter(ativo=True, estoque__gt=0)
+        .order_by("-data_cadastro", "id")
+        .values_list("id", "categoria_id")
+        .iterator(chunk_size=5000)
+    ):
+        if len(recentes[categoria_id]) <= vizinhos:
+            recentes[categoria_id].append(pk)
+
+    linhas = []
+    produtos = Produto.objects.values_list("id", "categoria_id").iterator(chunk_size=5000)
+    for produto_id, categoria_id in produtos:
+        escolhidos = [
+            (pontuacao, outro)
+            for pontuacao, _, outro in heapq.nlargest(vizinhos, candidatos.get(produto_id, ()))
+        ]
+        ja_escolhidos = {outro for _, outro in escolhidos}
+        for outro in recentes[categoria_id]:
+            if len(escolhidos) >= vizinhos:
+                break
+            if outro != produto_id and outro not in ja_escolhidos:
+                escolhidos.append((0.0, outro))
+        linhas.extend(
+            ProdutoRelacionado(
+                produto_id=produto_id, relacionado_id=outro, posicao=posicao, pontuacao=pontuacao
+            )
+            for posicao, (pontuacao, outro) in enumerate(escolhidos)
+        )
+
+    with transacao_de_escrita():
+        ProdutoRelacionado.objects.all().delete()
+        ProdutoRelacionado.objects.bulk_create(linhas, batch_size=2000)
+    # Os fragmentos de relacionados usam a versão de todos os produtos
+    invalidar_produtos()
+    return len({linha.produto_id for linha in linhas}), usados
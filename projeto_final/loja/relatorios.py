@@ -0,0 +1,195 @@
+"""
+Relatórios de vendas do painel.
+
+Em vez de varrer ItemPedido, o painel lê totais diários já agregados
+(VendaDiariaProduto e VendaDiariaCategoria). Os totais são somados em
+registrar_pedido() quando o pedido é confirmado e subtraídos se ele for
+cancelado; `manage.py reconstruir_relatorios` recalcula tudo do zero.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import ItemPedido, VendaDiariaCategoria, VendaDiariaProduto
+from .transacoes import transacao_de_escrita
+
+# Status que contam como venda realizada
+STATUS_CONTABILIZADOS = ("confirmado", "enviado", "entregue")
+
+
+def _acumular(modelo, coluna, linhas):
+    """
+    Soma (unidades, receita, pedidos) nas linhas do dia com um único
+    INSERT ... ON CONFLICT DO UPDATE, válido no SQLite e no PostgreSQL
+    """
+    if not linhas:
+        return
+    tabela = modelo._meta.db_table
+    valores = ", ".join(["(%s, %s, %s, %s, %s)"] * len(linhas))
+    parametros = [valor for linha in linhas for valor in linha]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {tabela} (data, {coluna}, unidades, receita, pedidos) "
+            f"VALUES {valores} "
+            f"ON CONFLICT (data, {coluna}) DO UPDATE SET "
+            "unidades = unidades + excluded.unidades, "
+            "receita = receita + excluded.receita, "
+            "pedidos = pedidos + excluded.pedidos",
+            parametros,
+        )
+
+
+def registrar_pedido(pedido, itens, sinal=1):
+    """
+    Soma (sinal=1) ou subtrai (sinal=-1) os itens do pedido nos totais do dia.
+
+    `itens` são ItemPedido com o produto carregado.
+    """
+    data = timezone.localdate(pedido.data_pedido)
+    por_produto = defaultdict(lambda: [0, Decimal("0")])
+    por_categoria = defaultdict(lambda: [0, Decimal("0")])
+
+    for item in itens:
+        receita = item.preco_unitario * item.quantidade
+        for total in (
+            por_produto[item.produto_id],
+            por_categoria[item.produto.categoria_id],
+        ):
+            total[0] += item.quantidade
+            total[1] += receita
+
+    # Um pedido conta uma vez para cada produto e cada categoria que contém
+    _acumular(
+        VendaDiariaProduto,
+        "produto_id",
+        [(data, pk, sinal * u, sinal * r, sinal) for pk, (u, r) in por_produto.items()],
+    )
+    _acumular(
+        VendaDiariaCategoria,
+        "categoria_id",
+        [(data, pk, sinal * u, sinal * r, sinal) for pk, (u, r) in por_categoria.items()],
+    )
+
+    if sinal < 0:
+        # Cancelamento pode zerar o dia; remove as linhas vazias
+        VendaDiariaProduto.objects.filter(data=data, pedidos__lte=0).delete()
+        VendaDiariaCategoria.objects.filter(data=data, pedidos__lte=0).delete()
+
+
+def reconstruir():
+    """
+    Recalcula todos os totais diários a partir de ItemPedido
+    """
+    itens = ItemPedido.objects.filter(
+        pedido__status__in=STATUS_CONTABILIZADOS
+    ).annotate(
+        data=TruncDate("pedido__data_pedido"),
+        valor=ExpressionWrapper(
+            F("quantidade") * F("preco_unitario"),
+            output_field=DecimalField(max_digits=14, decimal_places=2),
+        ),
+    )
+
+    por_produto = itens.values("data", "produto_id").annotate(
+        total_unidades=Sum("quantidade"),
+        total_receita=Sum("valor"),
+        total_pedidos=Count("pedido", distinct=True),
+    )
+    por_categoria = itens.values("data", "produto__categoria_id").annotate(
+        total_unidades=Sum("quantidade"),
+        total_receita=Sum("valor"),
+        total_pedidos=Count("pedido", distinct=True),
+    )
+
+    # Numa transação só: o painel não vê as tabelas vazias e nenhum pedido
+    # registrado no meio fica de fora (ou contado duas vezes) na recontagem
+    with transacao_de_escrita():
+        VendaDiariaProduto.objects.all().delete()
+        VendaDiariaCategoria.objects.all().delete()
+        VendaDiariaProduto.objects.bulk_create(
+            VendaDiariaProduto(
+                data=linha["data"],
+                produto_id=linha["produto_id"],
+                unidades=linha["total_unidades"],
+                receita=linha["total_receita"],
+                pedidos=linha["total_pedidos"],
+            )
+            for linha in por_produto
+        )
+        VendaDiariaCategoria.objects.bulk_create(
+            VendaDiariaCategoria(
+                data=linha["data"],
+                categoria_id=linha["produto__categoria_id"],
+                unidades=linha["total_unidades"],
+                receita=linha["total_receita"],
+                pedidos=linha["total_pedidos"],
+            )
+            for linha in por_categoria
+        )
+        return VendaDiariaProduto.objects.count()
+
+
+def _desde(dias):
+    return timezone.localdate() - timedelta(days=dias - 1)
+
+
+def receita_por_dia(dias=30):
+    """
+    Receita e unidades de cada dia do período, incluindo dias sem venda
+    """
+    inicio = _desde(dias)
+    totais = {
+        linha["data"]: linha
+        for linha in VendaDiariaCategoria.objects.filter(data__gte=inicio)
+        .values("data")
+        .annotate(total_receita=Sum("receita"), total_unidades=Sum("unidades"))
+        .order_by()
+    }
+    maior = max((linha["total_receita"] for linha in totais.values()), default=0)
+
+    serie = []
+    for deslocamento in range(dias):
+        data = inicio + timedelta(days=deslocamento)
+        linha = totais.get(data, {})
+        receita = linha.get("total_receita") or Decimal("0")
+        serie.append({
+            "data": data,
+            "receita": receita,
+            "unidades": linha.get("total_unidades") or 0,
+            "percentual": round(receita * 100 / maior) if maior else 0,
+        })
+    return serie
+
+
+def mais_vendidos(dias=30, limite=10):
+    return list(
+        VendaDiariaProduto.objects.filter(data__gte=_desde(dias))
+        .values("produto_id", "produto__nome")
+        .annotate(
+            total_unidades=Sum("unidades"),
+            total_receita=Sum("receita"),
+            total_pedidos=Sum("pedidos"),
+        )
+        .filter(total_unidades__gt=0)
+        .order_by("-total_unidades", "-total_receita")[:limite]
+    )
+
+
+def mix_categorias(dias=30):
+    linhas = list(
+        VendaDiariaCategoria.objects.filter(data__gte=_desde(dias))
+        .values("categoria_id", "categoria__nome")
+        .annotate(total_unidades=Sum("unidades"), total_receita=Sum("receita"))
+        .filter(total_receita__gt=0)
+        .order_by("-total_receita")
+    )
+    receita_total = sum(linha["total_receita"] for linha in linhas)
+    for linha in linhas:
+        linha["percentual"] = round(linha["total_receita"] * 100 / receita_total)
+    return linhas
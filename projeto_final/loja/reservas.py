@@ -0,0 +1,75 @@
+"""
+Reservas de estoque do carrinho.
+
+Cada linha do carrinho segura as unidades dela por settings.LOJA_RESERVA_TTL
+segundos, renovados a cada mudança na linha. O que os outros clientes
+podem comprar é `estoque - reservas ativas dos outros`; no checkout as
+reservas do carrinho viram o pedido (loja/pedidos.py). Reservas vencidas
+já não contam e são apagadas por `manage.py liberar_reservas`.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import Produto, Reserva
+from .transacoes import transacao_de_escrita
+
+
+def validade():
+    return timezone.now() + timedelta(seconds=getattr(settings, "LOJA_RESERVA_TTL", 15 * 60))
+
+
+def reservado(produto_ids, exceto=None):
+    """
+    {produto_id: unidades} em reservas ativas, fora as do carrinho `exceto`
+    """
+    reservas = Reserva.objects.filter(produto_id__in=produto_ids, expira_em__gt=timezone.now())
+    if exceto:
+        reservas = reservas.exclude(chave=exceto)
+    return dict(
+        reservas.values("produto_id").annotate(total=Sum("quantidade")).values_list("produto_id", "total")
+    )
+
+
+def disponivel(produto, exceto=None):
+    return max(produto.estoque - reservado([produto.id], exceto).get(produto.id, 0), 0)
+
+
+def reservar(chave, produto, quantidade):
+    """
+    Ajusta a reserva do carrinho `chave` para `quantidade` unidades, até o
+    disponível; devolve quantas ficaram reservadas
+    """
+    with transacao_de_escrita():
+        # Trava o produto (onde o banco suporta): duas reservas simultâneas
+        # não podem contar com a mesma unidade livre
+        produto = Produto.objects.select_for_update().get(pk=produto.pk)
+        quantidade = min(quantidade, disponivel(produto, exceto=chave))
+        if quantidade <= 0:
+            Reserva.objects.filter(chave=chave, produto=produto).delete()
+            return 0
+        # Upsert numa consulta só
+        Reserva.objects.bulk_create(
+            [Reserva(chave=chave, produto=produto, quantidade=quantidade, expira_em=validade())],
+            update_conflicts=True,
+            unique_fields=["chave", "produto"],
+            update_fields=["quantidade", "expira_em"],
+        )
+    return quantidade
+
+
+def liberar(chave, produto_id=None):
+    reservas = Reserva.objects.filter(chave=chave)
+    if produto_id is not None:
+        reservas = reservas.filter(produto_id=produto_id)
+    reservas.delete()
+
+
+def apagar_vencidas():
+    """
+    Apaga as reservas vencidas; devolve quantas eram
+    """
+    return Reserva.objects.filter(expira_em__lte=timezone.now()).delete()[0]
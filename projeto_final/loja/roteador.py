@@ -0,0 +1,82 @@
+"""
+Roteador de banco: leituras do catálogo na réplica, o resto no primário.
+
+Produto e Categoria são lidos do alias settings.LOJA_REPLICA_ALIAS
+("replica"); toda escrita, e toda leitura de pedidos e clientes, vai para
+o "default". Uma leitura dentro de transação no primário (o checkout lendo
+o estoque, por exemplo) fica no primário.
+
+Leia-suas-escritas: quem grava no catálogo ou fecha um pedido passa a ler
+só do primário até a réplica alcançar. Na própria requisição isso vale
+logo após a escrita; nas seguintes, ReplicaMiddleware (middleware.py)
+lembra por um cookie durante settings.LOJA_REPLICA_ATRASO segundos.
+"""
+
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+MODELOS_CATALOGO = {"loja.produto", "loja.categoria"}
+
+# Escritas nestes modelos fixam o cliente no primário
+MODELOS_FIXAM = MODELOS_CATALOGO | {"loja.pedido", "loja.itempedido", "loja.cliente"}
+
+# Estado da requisição atual; um dicionário para que a escrita feita numa
+# thread do sync_to_async seja vista pelo middleware
+_estado = ContextVar("estado_replica", default=None)
+
+
+def alias_replica():
+    alias = getattr(settings, "LOJA_REPLICA_ALIAS", "replica")
+    return alias if alias in settings.DATABASES else None
+
+
+def iniciar_requisicao(fixado):
+    """
+    Abre o estado da requisição; devolve o token para encerrar_requisicao()
+    """
+    return _estado.set({"primario": fixado, "gravou": False})
+
+
+def encerrar_requisicao(token):
+    """
+    Fecha o estado e diz se a requisição gravou algo que fixa o cliente
+    """
+    estado = _estado.get()
+    _estado.reset(token)
+    return bool(estado and estado["gravou"])
+
+
+def fixar_no_primario():
+    estado = _estado.get()
+    if estado is not None:
+        estado["primario"] = estado["gravou"] = True
+
+
+def _fixado():
+    estado = _estado.get()
+    return bool(estado and estado["primario"])
+
+
+class RoteadorReplica:
+    def db_for_read(self, model, **hints):
+        if model._meta.label_lower not in MODELOS_CATALOGO:
+            return DEFAULT_DB_ALIAS
+        replica = alias_replica()
+        if replica is None or _fixado() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return replica
+
+    def db_for_write(self, model, **hints):
+        if model._meta.label_lower in MODELOS_FIXAM:
+            fixar_no_primario()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # A réplica é uma cópia do primário: os objetos são os mesmos
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # A réplica recebe o esquema junto com os dados, pela cópia
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,105 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import contadores
+from .busca import obter_backend
+from .fragmentos import CATEGORIAS, invalidar, invalidar_produtos
+from .models import Categoria, Pedido, Produto
+from .relatorios import STATUS_CONTABILIZADOS, registrar_pedido
+
+
+@receiver(post_save, sender=Produto)
+def indexar_produto(sender, instance, raw=False, **kwargs):
+    """Mantém o índice de busca atualizado ao salvar um produto"""
+    if raw:
+        return
+    obter_backend().indexar(instance)
+
+
+@receiver(post_delete, sender=Produto)
+def remover_produto_do_indice(sender, instance, **kwargs):
+    obter_backend().remover(instance.pk)
+
+
+@receiver(pre_save, sender=Produto)
+def guardar_estado_anterior(sender, instance, raw=False, using=None, **kwargs):
+    """
+    Categoria, ativo e estoque antes do save: se o produto mudar de
+    categoria a grade antiga também é invalidada, e o contador de
+    disponíveis sai da categoria em que o produto contava
+    """
+    instance._categoria_anterior = None
+    instance._contava_em = None
+    if not raw and instance.pk:
+        anterior = (
+            Produto.objects.using(using)
+            .filter(pk=instance.pk)
+            .values_list("categoria_id", "ativo", "estoque")
+            .first()
+        )
+        if anterior:
+            categoria_id, ativo, estoque = anterior
+            instance._categoria_anterior = categoria_id
+            if contadores.conta(ativo, estoque):
+                instance._contava_em = categoria_id
+
+
+@receiver(post_save, sender=Produto)
+def atualizar_contador_categoria(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    deltas = {}
+    contava_em = getattr(instance, "_contava_em", None)
+    if contava_em:
+        deltas[contava_em] = -1
+    if contadores.conta(instance.ativo, instance.estoque):
+        deltas[instance.categoria_id] = deltas.get(instance.categoria_id, 0) + 1
+    contadores.ajustar(deltas)
+
+
+@receiver(post_delete, sender=Produto)
+def descontar_produto_removido(sender, instance, **kwargs):
+    if contadores.conta(instance.ativo, instance.estoque):
+        contadores.ajustar({instance.categoria_id: -1})
+
+
+@receiver(post_save, sender=Produto)
+@receiver(post_delete, sender=Produto)
+def invalidar_fragmentos_produto(sender, instance, **kwargs):
+    invalidar_produtos(
+        instance.categoria_id, getattr(instance, "_categoria_anterior", None)
+    )
+
+
+@receiver(post_save, sender=Categoria)
+@receiver(post_delete, sender=Categoria)
+def invalidar_fragmentos_categoria(sender, instance, **kwargs):
+    # O nome da categoria aparece nos cards da grade
+    invalidar(CATEGORIAS)
+    invalidar_produtos(instance.pk)
+
+
+@receiver(pre_save, sender=Pedido)
+def guardar_status_anterior(sender, instance, raw=False, **kwargs):
+    instance._status_anterior = None
+    if not raw and instance.pk:
+        instance._status_anterior = (
+            Pedido.objects.filter(pk=instance.pk)
+            .values_list("status", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Pedido)
+def atualizar_relatorios(sender, instance, created, raw=False, **kwargs):
+    """
+    Pedidos novos entram nos relatórios em finalizar_pedido(); aqui só
+    tratamos mudanças de status, como um cancelamento pelo admin
+    """
+    if created or raw:
+        return
+    contava = getattr(instance, "_status_anterior", None) in STATUS_CONTABILIZADOS
+    conta = instance.status in STATUS_CONTABILIZADOS
+    if contava != conta:
+        itens = instance.itens.select_related("produto")
+        registrar_pedido(instance, itens, sinal=1 if conta else -1)
@@ -0,0 +1,47 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from loja.imagens import largura_adequada, larguras_geradas, miniatura_url, srcset
+
+register = template.Library()
+
+
+@register.filter
+def miniatura(imagem, largura=400):
+    """{{ produto.imagem|miniatura:400 }} -> URL da menor versão adequada"""
+    return miniatura_url(imagem, int(largura))
+
+
+@register.simple_tag
+def imagem_responsiva(
+    imagem, largura=400, alt="", sizes=None, loading="lazy", **atributos
+):
+    """
+    <picture> com WebP e JPEG em srcset; o navegador escolhe a versão.
+
+    Se as miniaturas ainda não existirem, cai para a imagem original.
+    """
+    if not imagem:
+        return ""
+
+    extras = format_html_join(" ", '{}="{}"', atributos.items())
+    if largura_adequada(largura) not in larguras_geradas(imagem):
+        return format_html(
+            '<img src="{}" alt="{}" loading="{}" {}>', imagem.url, alt, loading, extras
+        )
+
+    sizes = sizes or f"{largura}px"
+    return format_html(
+        '<picture style="display: block;">'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}" loading="{}" {}>'
+        "</picture>",
+        srcset(imagem, "webp"),
+        sizes,
+        miniatura_url(imagem, largura),
+        srcset(imagem, "jpeg"),
+        sizes,
+        alt,
+        loading,
+        extras,
+    )
@@ -0,0 +1,24 @@
+from django.db import connection
+from django.test import TestCase
+
+from loja import dados_sinteticos
+from loja.management.commands.verificar_indices import consultas_da_vitrine, problemas
+
+
+class IndicesDaVitrineTests(TestCase):
+    """
+    Cada consulta das páginas da loja usa o índice esperado no
+    EXPLAIN QUERY PLAN, sem varrer a tabela nem ordenar fora do índice
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        dados_sinteticos.semear(produtos=200, clientes=5, pedidos=20)
+
+    def test_consultas_usam_indice(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("Os planos esperados são os do SQLite")
+        for nome, queryset, indice in consultas_da_vitrine():
+            with self.subTest(nome):
+                plano = queryset.explain()
+                self.assertEqual(problemas(plano, indice), [], plano)
@@ -0,0 +1,43 @@
+"""
+Transações de escrita da loja.
+"""
+
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import transaction
+
+
+@contextmanager
+def transacao_de_escrita(using=None):
+    """
+    transaction.atomic() que, no SQLite, começa com BEGIN IMMEDIATE.
+
+    Com o BEGIN padrão (DEFERRED) o checkout lê o estoque com um lock de
+    leitura e só pede o de escrita no UPDATE; se outro checkout já o tem,
+    o SQLite falha na hora com "database is locked", sem esperar o timeout.
+    IMMEDIATE pega o lock de escrita logo no início, e os checkouts
+    concorrentes esperam na fila. Dentro de outra transação vira um
+    savepoint normal.
+    """
+    conexao = transaction.get_connection(using)
+    imediato = (
+        conexao.vendor == "sqlite"
+        and not conexao.in_atomic_block
+        and getattr(settings, "LOJA_CHECKOUT_IMEDIATO", True)
+    )
+    if not imediato:
+        with transaction.atomic(using=using):
+            yield
+        return
+
+    # Conecta antes: a conexão nova redefine transaction_mode pelas OPTIONS
+    conexao.ensure_connection()
+    anterior = conexao.transaction_mode
+    conexao.transaction_mode = "IMMEDIATE"
+    try:
+        with transaction.atomic(using=using):
+            conexao.transaction_mode = anterior
+            yield
+    finally:
+        conexao.transaction_mode = anterior
@@ -1,12 +1,16 @@
+from django.conf import settings
 from django.urls import path
 
-from . import views
+from . import api, views, views_async
+
+# Sob ASGI as páginas de leitura usam as versões assíncronas (views_async.py)
+vitrine = views_async if settings.LOJA_VIEWS_ASSINCRONAS else views
 
 urlpatterns = [
     # Páginas principais
-    path("", views.home, name="home"),
-    path("produtos/", views.produtos, name="produtos"),
-    path("produto/<int:produto_id>/", views.produto_detalhe, name="produto_detalhe"),
+    path("", vitrine.home, name="home"),
+    path("produtos/", vitrine.produtos, name="produtos"),
+    path("produto/<int:produto_id>/", vitrine.produto_detalhe, name="produto_detalhe"),
     path("sobre/", views.sobre, name="sobre"),
     path("contato/", views.contato, name="contato"),
     path("cadastro/", views.cadastro, name="cadastro"),
@@ -14,7 +18,7 @@ urlpatterns = [
     path("logout/", views.logout_view, name="logout"),
     path("perfil/", views.perfil, name="perfil"),
     # CARRINHO
-    path("carrinho/", views.carrinho, name="carrinho"),
+    path("carrinho/", vitrine.carrinho, name="carrinho"),
     path(
         "carrinho/adicionar/<int:produto_id>/",
         views.adicionar_carrinho,
@@ -47,6 +51,7 @@ urlpatterns = [
     # Painel principal
     path("painel/", views.painel_admin, name="painel_admin"),
     path("painel/vendas/", views.admin_vendas, name="admin_vendas"),
+    path("painel/vendas/csv/", views.admin_vendas_csv, name="admin_vendas_csv"),
     # PRODUTOS
     path("painel/produtos/", views.admin_produtos, name="admin_produtos"),
     path(
@@ -79,6 +84,9 @@ urlpatterns = [
         views.admin_deletar_categoria,
         name="admin_deletar_categoria",
     ),
+    # API JSON de leitura do catálogo (loja/api.py)
+    path("api/produtos/", api.produtos, name="api_produtos"),
+    path("api/categorias/", api.categorias, name="api_categorias"),
     # Vendas duplicada removida
     # path("painel/vendas/", views.admin_vendas, name="admin_vendas"),  # ← REMOVIDA (duplicada)
 ]
@@ -1,62 +1,115 @@
+import csv
+from datetime import datetime, time, timedelta
 from decimal import Decimal
 
+from django import forms
 from django.contrib import messages
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.contrib.auth.views import PasswordChangeView
-from django.db import transaction
-from django.db.models import Q
+from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse_lazy
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.functional import SimpleLazyObject
 
-from .carrinho import Carrinho
+from . import cache_pagina, condicional, consultas, relatorios
+from .busca import obter_backend
+from .carrinho import obter_carrinho, quantidade_no_carrinho
 from .forms import ProdutoForm
+from .fragmentos import CATEGORIAS, TODOS_PRODUTOS, escopo_produtos, versao
+from .fragmentos import TIMEOUT as FRAGMENTOS_TIMEOUT
+from .imagens import gerar_miniaturas_do_produto
 from .models import Cliente  # ← ADICIONADO Pedido, ItemPedido
 from .models import Categoria, Contato, ItemPedido, Pedido, Produto, Venda
+from .paginacao import limitar_tamanho, paginar_por_cursor
+from .pedidos import PedidoInvalido, finalizar_pedido
+from .transacoes import transacao_de_escrita
 
 
+@cache_pagina.anonima(CATEGORIAS, TODOS_PRODUTOS)
 def home(request):
     """Página inicial com produtos em destaque"""
-    produtos_destaque = Produto.objects.filter(ativo=True, destaque=True)[:6]
-    categorias = Categoria.objects.filter(ativo=True)
+    versao_categorias = versao(CATEGORIAS)
+    versao_destaques = versao(TODOS_PRODUTOS)
+    carrinho_qtd = quantidade_no_carrinho(request)
+    etag, modificado = condicional.validadores(
+        request, consultas.atualizacoes().first(), carrinho_qtd, versao_categorias, versao_destaques
+    )
+    if resposta := condicional.nao_modificado(request, etag, modificado):
+        return resposta
+
+    produtos_destaque = consultas.produtos_destaque()
+    categorias = consultas.categorias_ativas()
     context = {
         "produtos_destaque": produtos_destaque,
         "categorias": categorias,
+        "carrinho_qtd": carrinho_qtd,
+        # Querysets acima só rodam se o fragmento não estiver em cache
+        "versao_categorias": versao_categorias,
+        "versao_destaques": versao_destaques,
+        "fragmentos_timeout": FRAGMENTOS_TIMEOUT,
     }
-    return render(request, "loja/home.html", context)
+    return condicional.finalizar(request, render(request, "loja/home.html", context), etag, modificado)
 
 
+@cache_pagina.anonima(CATEGORIAS, por_categoria=True)
 def produtos(request):
     """Lista todos os produtos com filtro por categoria"""
     categoria_id = request.GET.get("categoria")
     busca = request.GET.get("busca")
-    produtos = Produto.objects.filter(ativo=True, estoque__gt=0)
-
-    produtos_lista = Produto.objects.filter(ativo=True)
+    limite = limitar_tamanho(request.GET.get("por_pagina"))
+    cursor = request.GET.get("cursor")
+
+    versao_grade = versao(escopo_produtos(categoria_id))
+    versao_categorias = versao(CATEGORIAS)
+    carrinho_qtd = quantidade_no_carrinho(request)
+    etag, modificado = condicional.validadores(
+        request, consultas.atualizacoes(categoria_id).first(), carrinho_qtd, versao_grade, versao_categorias
+    )
+    if resposta := condicional.nao_modificado(request, etag, modificado):
+        return resposta
 
-    if categoria_id:
-        produtos_lista = produtos_lista.filter(categoria_id=categoria_id)
+    # Só os campos que o card de produtos.html usa
+    produtos_lista = consultas.catalogo(categoria_id)
 
+    # Com busca, os resultados vêm por relevância; sem ela, os mais novos primeiro
+    ordenacao = {}
     if busca:
-        produtos_lista = produtos_lista.filter(
-            Q(nome__icontains=busca)
-            | Q(descricao__icontains=busca)
-            | Q(especificacoes__icontains=busca)
-        )
+        backend = obter_backend()
+        produtos_lista = backend.filtrar(produtos_lista, busca)
+        if backend.ordena_por_relevancia:
+            ordenacao = {"campo": "relevancia", "descendente": False, "tipo": float}
+
+    # Só consulta o banco se o fragmento da grade não estiver em cache
+    pagina = SimpleLazyObject(
+        lambda: paginar_por_cursor(produtos_lista, cursor, limite, **ordenacao)
+    )
 
-    categorias = Categoria.objects.filter(ativo=True)
+    categorias = consultas.categorias_ativas()
 
     context = {
-        "produtos": produtos_lista,
+        "pagina": pagina,
         "categorias": categorias,
         "categoria_selecionada": categoria_id,
         "busca": busca,
+        "cursor": cursor,
+        "por_pagina": limite,
+        "paginado": bool(cursor),
+        "carrinho_qtd": carrinho_qtd,
+        "versao_grade": versao_grade,
+        "versao_categorias": versao_categorias,
+        "fragmentos_timeout": FRAGMENTOS_TIMEOUT,
     }
-    return render(request, "loja/produtos.html", context)
+    return condicional.finalizar(request, render(request, "loja/produtos.html", context), etag, modificado)
 
 
+@cache_pagina.anonima(TODOS_PRODUTOS)
 def produto_detalhe(request, produto_id):
     """Exibe detalhes de um produto específico"""
 
@@ -68,16 +121,36 @@ def produto_detalhe(request, produto_id):
         messages.warning(request, f"Produto '{produto.nome}' indisponível no momento.")
         return redirect("produtos")
 
-    # Produtos relacionados 
-    produtos_relacionados = Produto.objects.filter(
-        categoria=produto.categoria, ativo=True, estoque__gt=0
-    ).exclude(id=produto_id)[:4]
+    # A página muda com o produto, os relacionados e a categoria (de onde
+    # vêm os relacionados de quem ainda não tem vizinhos calculados)
+    atualizado_em = condicional.mais_recente(
+        produto.data_atualizacao,
+        consultas.atualizacoes(produto.categoria_id).first(),
+        *consultas.atualizacoes_relacionados(produto),
+    )
+    versao_relacionados = versao(TODOS_PRODUTOS)
+    carrinho_qtd = quantidade_no_carrinho(request)
+    etag, modificado = condicional.validadores(request, atualizado_em, carrinho_qtd, versao_relacionados)
+    if resposta := condicional.nao_modificado(request, etag, modificado):
+        return resposta
+
+    # Produtos relacionados: comprados junto, ou da mesma categoria se o
+    # produto ainda não tem vizinhos calculados. Só consulta fora do cache
+    produtos_relacionados = SimpleLazyObject(
+        lambda: list(consultas.relacionados(produto)) or list(consultas.mesma_categoria(produto))
+    )
 
     context = {
         "produto": produto,
         "produtos_relacionados": produtos_relacionados,
+        "carrinho_qtd": carrinho_qtd,
+        # Os relacionados vêm de qualquer categoria
+        "versao_relacionados": versao_relacionados,
+        "fragmentos_timeout": FRAGMENTOS_TIMEOUT,
     }
-    return render(request, "loja/produto_detalhe.html", context)
+    return condicional.finalizar(
+        request, render(request, "loja/produto_detalhe.html", context), etag, modificado
+    )
 
 
 def sobre(request):
@@ -205,22 +278,24 @@ def logout_view(request):
 
 
 def carrinho(request):
-    carrinho = Carrinho(request)
+    carrinho = obter_carrinho(request)
     return render(request, "loja/carrinho.html", {"carrinho": carrinho})
 
 
 def adicionar_carrinho(request, produto_id):
     """Adiciona 1 unidade do produto ao carrinho"""
     produto = get_object_or_404(Produto, id=produto_id)
-    carrinho = Carrinho(request)
-    carrinho.adicionar(produto, quantidade=1)
-    messages.success(request, f"{produto.nome} adicionado ao carrinho!")
+    carrinho = obter_carrinho(request)
+    if carrinho.adicionar(produto, quantidade=1) > 0:
+        messages.success(request, f"{produto.nome} adicionado ao carrinho!")
+    else:
+        messages.warning(request, f"Não há mais unidades disponíveis de {produto.nome}.")
     return redirect("carrinho")
 
 
 def diminuir_carrinho(request, produto_id):
     """Remove 1 unidade do produto do carrinho"""
-    carrinho = Carrinho(request)
+    carrinho = obter_carrinho(request)
     produto = Produto.objects.get(id=produto_id)
     carrinho.diminuir(produto, quantidade=1)  # ← DIMINUIR, não remover!
     messages.success(request, "Quantidade diminuída!")
@@ -229,7 +304,7 @@ def diminuir_carrinho(request, produto_id):
 
 def remover_carrinho(request, produto_id):
     """Remove completamente o produto do carrinho"""
-    carrinho = Carrinho(request)
+    carrinho = obter_carrinho(request)
     produto = Produto.objects.get(id=produto_id)
     carrinho.remover(produto)
     messages.success(request, "Item removido do carrinho!")
@@ -237,59 +312,40 @@ def remover_carrinho(request, produto_id):
 
 
 def checkout(request):
-    carrinho = Carrinho(request)
+    carrinho = obter_carrinho(request)
 
     if request.method == "POST":
 
-        # TRANSAÇAO: ou tudo funciona, ou nada funciona
-        with transaction.atomic():
-
-            # CLIENTE
-            cliente, created = Cliente.objects.get_or_create(
-                usuario=request.user,
-                defaults={
-                    "cpf": request.POST.get("cpf", "000.000.000-00"),
-                    "telefone": request.POST.get("telefone", ""),
-                    "endereco": request.POST.get("endereco", ""),
-                    "cidade": request.POST.get("cidade", ""),
-                    "estado": request.POST.get("estado", "SP"),
-                    "cep": request.POST.get("cep", ""),
-                },
-            )
-
-            # PEDIDO
-            pedido = Pedido.objects.create(
-                cliente=cliente, status="confirmado", valor_total=carrinho.total()
-            )
-
-            # ITENS E BAIXA DE ESTOQUE
-            for item in carrinho:
-                produto = get_object_or_404(Produto, id=item["id"])
-
-                # VERIFICA ESTOQUE
-                if produto.estoque < item["quantidade"]:
-                    messages.error(request, f"Estoque insuficiente para {produto.nome}")
-                    return redirect("carrinho")
-
-                # CRIA ITEM DO PEDIDO
-                ItemPedido.objects.create(
-                    pedido=pedido,
-                    produto=produto,
-                    quantidade=item["quantidade"],
-                    preco_unitario=item["preco"],
+        try:
+            # TRANSAÇAO: ou tudo funciona, ou nada funciona
+            with transacao_de_escrita():
+
+                # CLIENTE
+                cliente, created = Cliente.objects.get_or_create(
+                    usuario=request.user,
+                    defaults={
+                        "cpf": request.POST.get("cpf", "000.000.000-00"),
+                        "telefone": request.POST.get("telefone", ""),
+                        "endereco": request.POST.get("endereco", ""),
+                        "cidade": request.POST.get("cidade", ""),
+                        "estado": request.POST.get("estado", "SP"),
+                        "cep": request.POST.get("cep", ""),
+                    },
                 )
 
-                #  ABAIXA O ESTOQUE AQUI
-                produto.estoque -= item["quantidade"]
-                produto.save()
+                # PEDIDO, ITENS E BAIXA DE ESTOQUE
+                pedido = finalizar_pedido(cliente, carrinho, reserva=carrinho.chave)
+
+        except PedidoInvalido as erro:
+            messages.error(request, str(erro))
+            return redirect("carrinho")
 
-            # LIMPA O CARRINHO
-            request.session["carrinho"] = {}
-            request.session.modified = True
+        # LIMPA O CARRINHO
+        carrinho.limpar()
 
-            messages.success(request, f"Pedido #{pedido.id} confirmado com sucesso!")
+        messages.success(request, f"Pedido #{pedido.id} confirmado com sucesso!")
 
-            return redirect("checkout_sucesso", pedido_id=pedido.id)
+        return redirect("checkout_sucesso", pedido_id=pedido.id)
 
     return render(request, "loja/checkout.html", {"carrinho": carrinho})
 
@@ -304,14 +360,20 @@ def historico_compras(request):
     if not request.user.is_authenticated:
         return redirect("login")
 
-    cliente = Cliente.objects.filter(usuario=request.user).first()
-    pedidos = (
-        Pedido.objects.filter(cliente=cliente).order_by("-data_pedido")
-        if cliente
-        else []
-    )
+    # Itens e produtos de todos os pedidos da página em duas consultas fixas
+    pedidos = consultas.pedidos_do_usuario(request.user)
 
-    return render(request, "loja/historico_compras.html", {"pedidos": pedidos})
+    limite = limitar_tamanho(request.GET.get("por_pagina"), padrao=10, maximo=50)
+    cursor = request.GET.get("cursor")
+    pagina = paginar_por_cursor(pedidos, cursor, limite, campo="data_pedido")
+
+    context = {
+        "pedidos": pagina.itens,
+        "proximo_cursor": pagina.proximo_cursor,
+        "paginado": bool(cursor),
+        "por_pagina": limite,
+    }
+    return render(request, "loja/historico_compras.html", context)
 
 
 @login_required
@@ -377,12 +439,20 @@ class MinhaPasswordChangeView(PasswordChangeView):
 
 @staff_member_required
 def painel_admin(request):
-    return render(request, "loja/admin/painel.html")
+    # Lê só os totais diários pré-agregados, nunca ItemPedido
+    dias = limitar_tamanho(request.GET.get("dias"), padrao=30, maximo=365)
+    context = {
+        "dias": dias,
+        "receita_por_dia": relatorios.receita_por_dia(dias),
+        "mais_vendidos": relatorios.mais_vendidos(dias),
+        "mix_categorias": relatorios.mix_categorias(dias),
+    }
+    return render(request, "loja/admin/painel.html", context)
 
 
 @staff_member_required
 def admin_produtos(request):
-    produtos = Produto.objects.all()
+    produtos = Produto.objects.select_related("categoria")
     return render(request, "loja/admin/produtos/listar.html", {"produtos": produtos})
 
 
@@ -411,10 +481,24 @@ def admin_editar_produto(request, produto_id):
         produto.descricao = request.POST.get("descricao")
         produto.especificacoes = request.POST.get("especificacoes")
 
-        if request.FILES.get("imagem"):
-            produto.imagem = request.FILES["imagem"]
+        nova_imagem = request.FILES.get("imagem")
+        if nova_imagem:
+            # Mesma validação do ImageField do ProdutoForm: o Pillow precisa ler o arquivo
+            try:
+                produto.imagem = forms.ImageField().clean(nova_imagem)
+            except ValidationError as erro:
+                messages.error(request, erro.messages[0])
+                return render(
+                    request,
+                    "loja/admin/produtos/editar.html",
+                    {"produto": produto, "categorias": categorias},
+                    status=400,
+                )
 
         produto.save()
+
+        if nova_imagem:
+            gerar_miniaturas_do_produto(produto)
         messages.success(request, "Produto atualizado!")
         return redirect("admin_produtos")
 
@@ -489,7 +573,105 @@ def admin_vendas(request):
     vendas = ItemPedido.objects.select_related("produto", "pedido").order_by(
         "-pedido__data_pedido"
     )
-    return render(request, "loja/admin/vendas/listar.html", {"vendas": vendas})
+    return render(request, "loja/admin/vendas/listar.html", {
+        "vendas": vendas,
+        "status_choices": Pedido.STATUS_CHOICES,
+    })
+
+
+CABECALHO_VENDAS = [
+    "pedido", "data", "status", "cliente_id", "cliente", "produto_id", "sku",
+    "produto", "quantidade", "preco_unitario", "subtotal",
+]
+
+# Linhas lidas do banco por vez na exportação
+LOTE_VENDAS = 2000
+
+
+class _Eco:
+    """Arquivo falso: o csv.writer devolve a linha em vez de gravar"""
+
+    def write(self, linha):
+        return linha
+
+
+def _linha_venda(item):
+    pedido = item.pedido
+    return [
+        pedido.id,
+        timezone.localtime(pedido.data_pedido).strftime("%Y-%m-%d %H:%M:%S"),
+        pedido.status,
+        pedido.cliente_id,
+        pedido.cliente.usuario.get_full_name() or pedido.cliente.usuario.username,
+        item.produto_id,
+        item.produto.sku or "",
+        item.produto_nome or item.produto.nome,
+        item.quantidade,
+        item.preco_unitario,
+        item.subtotal,
+    ]
+
+
+def _data_do_filtro(request, campo):
+    valor = request.GET.get(campo)
+    if not valor:
+        return None
+    # parse_date devolve None se o formato não bate
+    data = parse_date(valor)
+    if data is None:
+        raise ValueError(valor)
+    return data
+
+
+def _inicio_do_dia(data):
+    return timezone.make_aware(datetime.combine(data, time.min))
+
+
+@staff_member_required
+def admin_vendas_csv(request):
+    """
+    Vendas em CSV, geradas enquanto são enviadas: a memória não cresce com
+    o número de linhas. Filtros: ?de=AAAA-MM-DD&ate=AAAA-MM-DD&status=...
+    """
+    vendas = ItemPedido.objects.select_related(
+        "produto", "pedido__cliente__usuario"
+    ).order_by("-pedido__data_pedido", "-pedido_id", "id")
+
+    try:
+        de, ate = _data_do_filtro(request, "de"), _data_do_filtro(request, "ate")
+    except ValueError:
+        return HttpResponseBadRequest("Data inválida; use AAAA-MM-DD.")
+    # Intervalo em datetime, não __date: assim o índice de data_pedido é usado
+    if de:
+        vendas = vendas.filter(pedido__data_pedido__gte=_inicio_do_dia(de))
+    if ate:
+        vendas = vendas.filter(pedido__data_pedido__lt=_inicio_do_dia(ate + timedelta(days=1)))
+
+    status = [s for s in request.GET.getlist("status") if s]
+    if any(s not in dict(Pedido.STATUS_CHOICES) for s in status):
+        return HttpResponseBadRequest("Status inválido.")
+    if status:
+        vendas = vendas.filter(pedido__status__in=status)
+
+    escritor = csv.writer(_Eco())
+    if isinstance(request, ASGIRequest):
+        # No ASGI um iterador síncrono seria lido inteiro antes do envio
+        async def linhas():
+            yield escritor.writerow(CABECALHO_VENDAS)
+            async for item in vendas.aiterator(chunk_size=LOTE_VENDAS):
+                yield escritor.writerow(_linha_venda(item))
+    else:
+        def linhas():
+            yield escritor.writerow(CABECALHO_VENDAS)
+            for item in vendas.iterator(chunk_size=LOTE_VENDAS):
+                yield escritor.writerow(_linha_venda(item))
+
+    nome = "_".join(["vendas", *(str(d) for d in (de, ate) if d)])
+    return StreamingHttpResponse(
+        linhas(),
+        content_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="{nome}.csv"'},
+    )
 
 
 class MinhaPasswordChangeView(PasswordChangeView):
@@ -0,0 +1,153 @@
+"""
+Versões assíncronas das páginas de leitura da vitrine.
+
+Sob ASGI, cada view síncrona custa um salto de thread (sync_to_async) e
+prende essa thread enquanto espera o banco e o cliente. Estas views usam o
+ORM assíncrono (aget, aiterator, ain_bulk) e a API assíncrona da sessão.
+loja/urls.py escolhe entre elas e as de views.py por
+settings.LOJA_VIEWS_ASSINCRONAS, ligado em ecommerce/asgi.py.
+
+O usuário, o contador do carrinho e as listas chegam prontos no contexto,
+buscados com o ORM assíncrono: o template não consulta o banco. As versões
+dos fragmentos vêm de fragmentos.aversao(). A renderização vai para uma
+thread num salto só, porque a tag {% cache %} lê o cache de forma síncrona
+(e bloquearia o loop com o cache em arquivo ou redis).
+"""
+
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.shortcuts import aget_object_or_404, redirect, render
+
+from . import cache_pagina, condicional, consultas
+from .busca import obter_backend
+from .carrinho import aobter_carrinho, aquantidade_no_carrinho
+from .fragmentos import CATEGORIAS, TODOS_PRODUTOS, aversao, escopo_produtos
+from .fragmentos import TIMEOUT as FRAGMENTOS_TIMEOUT
+from .models import Produto
+from .paginacao import apaginar_por_cursor, limitar_tamanho
+
+
+async def _preparar(request):
+    """
+    Carrega usuário e sessão sem bloquear e devolve o contexto comum
+    """
+    # request.user passa a ser o usuário já carregado: o template não consulta
+    request.user = await request.auser()
+    return {"carrinho_qtd": await aquantidade_no_carrinho(request)}
+
+
+async def _listar(queryset):
+    return [objeto async for objeto in queryset.aiterator()]
+
+
+async def _render(request, template, context):
+    # Tudo o que o template usa do banco já está em listas no contexto
+    return await sync_to_async(render)(request, template, context)
+
+
+@cache_pagina.anonima(CATEGORIAS, TODOS_PRODUTOS)
+async def home(request):
+    """Página inicial com produtos em destaque"""
+    context = await _preparar(request)
+    versao_categorias = await aversao(CATEGORIAS)
+    versao_destaques = await aversao(TODOS_PRODUTOS)
+    etag, modificado = condicional.validadores(
+        request, await consultas.atualizacoes().afirst(), context["carrinho_qtd"],
+        versao_categorias, versao_destaques,
+    )
+    if resposta := condicional.nao_modificado(request, etag, modificado):
+        return resposta
+
+    context.update({
+        "categorias": await _listar(consultas.categorias_ativas()),
+        "produtos_destaque": await _listar(consultas.produtos_destaque()),
+        "versao_categorias": versao_categorias,
+        "versao_destaques": versao_destaques,
+        "fragmentos_timeout": FRAGMENTOS_TIMEOUT,
+    })
+    resposta = await _render(request, "loja/home.html", context)
+    return condicional.finalizar(request, resposta, etag, modificado)
+
+
+@cache_pagina.anonima(CATEGORIAS, por_categoria=True)
+async def produtos(request):
+    """Lista todos os produtos com filtro por categoria"""
+    context = await _preparar(request)
+    categoria_id = request.GET.get("categoria")
+    busca = request.GET.get("busca")
+    limite = limitar_tamanho(request.GET.get("por_pagina"))
+    cursor = request.GET.get("cursor")
+
+    produtos_lista = consultas.catalogo(categoria_id)
+    ordenacao = {}
+    if busca:
+        backend = obter_backend()
+        produtos_lista = backend.filtrar(produtos_lista, busca)
+        if backend.ordena_por_relevancia:
+            ordenacao = {"campo": "relevancia", "descendente": False, "tipo": float}
+
+    versao_grade = await aversao(escopo_produtos(categoria_id))
+    versao_categorias = await aversao(CATEGORIAS)
+    etag, modificado = condicional.validadores(
+        request, await consultas.atualizacoes(categoria_id).afirst(), context["carrinho_qtd"],
+        versao_grade, versao_categorias,
+    )
+    if resposta := condicional.nao_modificado(request, etag, modificado):
+        return resposta
+
+    context.update({
+        "pagina": await apaginar_por_cursor(produtos_lista, cursor, limite, **ordenacao),
+        "categorias": await _listar(consultas.categorias_ativas()),
+        "categoria_selecionada": categoria_id,
+        "busca": busca,
+        "cursor": cursor,
+        "por_pagina": limite,
+        "paginado": bool(cursor),
+        "versao_grade": versao_grade,
+        "versao_categorias": versao_categorias,
+        "fragmentos_timeout": FRAGMENTOS_TIMEOUT,
+    })
+    resposta = await _render(request, "loja/produtos.html", context)
+    return condicional.finalizar(request, resposta, etag, modificado)
+
+
+@cache_pagina.anonima(TODOS_PRODUTOS)
+async def produto_detalhe(request, produto_id):
+    """Exibe detalhes de um produto específico"""
+    context = await _preparar(request)
+    produto = await aget_object_or_404(Produto.objects.select_related("categoria"), id=produto_id)
+
+    if not request.user.is_staff and not (produto.ativo and produto.estoque > 0):
+        messages.warning(request, f"Produto '{produto.nome}' indisponível no momento.")
+        return redirect("produtos")
+
+    atualizado_em = condicional.mais_recente(
+        produto.data_atualizacao,
+        await consultas.atualizacoes(produto.categoria_id).afirst(),
+        *[horario async for horario in consultas.atualizacoes_relacionados(produto)],
+    )
+    versao_relacionados = await aversao(TODOS_PRODUTOS)
+    etag, modificado = condicional.validadores(
+        request, atualizado_em, context["carrinho_qtd"], versao_relacionados
+    )
+    if resposta := condicional.nao_modificado(request, etag, modificado):
+        return resposta
+
+    relacionados = await _listar(consultas.relacionados(produto))
+    if not relacionados:
+        # Produto ainda sem vizinhos calculados
+        relacionados = await _listar(consultas.mesma_categoria(produto))
+    context.update({
+        "produto": produto,
+        "produtos_relacionados": relacionados,
+        "versao_relacionados": versao_relacionados,
+        "fragmentos_timeout": FRAGMENTOS_TIMEOUT,
+    })
+    resposta = await _render(request, "loja/produto_detalhe.html", context)
+    return condicional.finalizar(request, resposta, etag, modificado)
+
+
+async def carrinho(request):
+    context = await _preparar(request)
+    context["carrinho"] = await aobter_carrinho(request)
+    return await _render(request, "loja/carrinho.html", context)